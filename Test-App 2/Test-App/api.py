@@ -0,0 +1,334 @@
+"""JSON HTTP API for POS terminals and other integrations.
+
+Run with ``uvicorn api:app --host 0.0.0.0 --port 8000``. Endpoints wrap the
+``inventory`` service functions; those are synchronous SQLAlchemy code, so
+each one runs in a worker thread and the number running at once is capped
+at the database connection pool size, keeping the event loop free and
+requests queued in the API rather than waiting inside the pool.
+
+Sales may carry an idempotency key (in the body, or the ``Idempotency-Key``
+header for single sales); resending a sale with the same key returns the
+originally recorded sale id instead of selling the stock again.
+
+With ``SALE_BUFFER=1`` single sales go through a write-behind
+``SaleBuffer`` that group-commits concurrent requests; the response is sent
+once the sale is committed and carries ``sale_id``, ``product_id`` and
+``quantity`` only.
+
+    GET  /products                          product list
+    GET  /products/{product_id}             one product
+    POST /sales                             {"product_id", "quantity", "idempotency_key"?}
+    POST /sales/batch                       {"sales": [{"product_id", "quantity", "idempotency_key"?}, ...]}
+    GET  /purchase-orders                   ?status=&product_id=&limit=&offset=
+    POST /purchase-orders                   {"product_id", "quantity", "cost_per_unit", "expected_delivery"}
+    POST /purchase-orders/{order_id}/receipts   {"quantity"}
+    POST /purchase-orders/receive           {"order_ids": [...]}
+    POST /purchase-orders/cancel            {"order_ids": [...]}
+"""
+import asyncio
+import functools
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import anyio  # pyright: ignore[reportMissingImports]
+from starlette.applications import Starlette  # pyright: ignore[reportMissingImports]
+from starlette.middleware import Middleware  # pyright: ignore[reportMissingImports]
+from starlette.requests import Request  # pyright: ignore[reportMissingImports]
+from starlette.responses import JSONResponse  # pyright: ignore[reportMissingImports]
+from starlette.routing import Route  # pyright: ignore[reportMissingImports]
+
+import inventory
+from database import DATABASE_URL, DB_MAX_OVERFLOW, DB_POOL_SIZE, init_db, track_writes
+from inventory import (
+    SaleBuffer,
+    IdempotencyKeyConflictError,
+    InsufficientStockError,
+    InvalidQuantityError,
+    InventoryError,
+    ProductNotFoundError,
+    PurchaseOrderNotOpenError,
+    sale_buffer_from_env,
+)
+
+MAX_BATCH_SIZE = 10_000
+MAX_PAGE_SIZE = 500
+MAX_IDEMPOTENCY_KEY_LENGTH = 64
+
+_ERROR_STATUS = {
+    ProductNotFoundError: 404,
+    InsufficientStockError: 409,
+    PurchaseOrderNotOpenError: 409,
+    IdempotencyKeyConflictError: 409,
+    InvalidQuantityError: 422,
+}
+
+# SQLite serialises writers anyway, so more than one thread only adds lock waits.
+_db_limiter = anyio.CapacityLimiter(1 if DATABASE_URL.startswith("sqlite") else DB_POOL_SIZE + DB_MAX_OVERFLOW)
+
+
+class BadRequest(Exception):
+    pass
+
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking service call in a worker thread, bounded by the connection pool."""
+    return await anyio.to_thread.run_sync(functools.partial(func, *args, **kwargs), limiter=_db_limiter)
+
+
+def _product_json(product):
+    return {
+        'product_id': product.product_id,
+        'name': product.name,
+        'buying_price': float(product.buying_price),
+        'selling_price': float(product.selling_price),
+        'current_stock': product.current_stock,
+        'reorder_level': product.reorder_level
+    }
+
+
+def _purchase_order_json(order, product_name=None, received_quantity=None):
+    data = {
+        'order_id': order.order_id,
+        'product_id': order.product_id,
+        'quantity': order.quantity,
+        'order_date': order.order_date.isoformat() if order.order_date else None,
+        'expected_delivery': order.expected_delivery.isoformat() if order.expected_delivery else None,
+        'status': order.status,
+        'cost_per_unit': float(order.cost_per_unit),
+        'total_cost': float(order.total_cost)
+    }
+    if product_name is not None:
+        data['product_name'] = product_name
+    if received_quantity is not None:
+        data['received_quantity'] = received_quantity
+    return data
+
+
+async def _json_body(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise BadRequest("Request body must be JSON")
+    if not isinstance(body, dict):
+        raise BadRequest("Request body must be a JSON object")
+    return body
+
+
+def _int_field(data, key, minimum=None):
+    value = data.get(key)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise BadRequest(f"'{key}' must be an integer")
+    if minimum is not None and value < minimum:
+        raise BadRequest(f"'{key}' must be at least {minimum}")
+    return value
+
+
+def _number_field(data, key, positive=False):
+    value = data.get(key)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise BadRequest(f"'{key}' must be a number")
+    if positive and not value > 0:
+        raise BadRequest(f"'{key}' must be greater than 0")
+    return float(value)
+
+
+def _idempotency_key_field(data, default=None):
+    value = data.get('idempotency_key', default)
+    if value is None:
+        return None
+    if not isinstance(value, str) or not 0 < len(value) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise BadRequest(f"'idempotency_key' must be a string of 1 to {MAX_IDEMPOTENCY_KEY_LENGTH} characters")
+    return value
+
+
+def _int_list_field(data, key):
+    values = data.get(key)
+    if not isinstance(values, list):
+        raise BadRequest(f"'{key}' must be a list of integers")
+    return [_int_field({key: value}, key) for value in values]
+
+
+def _int_param(request, key, default, minimum=0, maximum=None):
+    raw = request.query_params.get(key)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise BadRequest(f"'{key}' must be an integer")
+    if value < minimum:
+        raise BadRequest(f"'{key}' must be at least {minimum}")
+    if maximum is not None and value > maximum:
+        raise BadRequest(f"'{key}' must be at most {maximum}")
+    return value
+
+
+def _handle_errors(endpoint):
+    """Map refused requests and malformed input to JSON error responses."""
+    @functools.wraps(endpoint)
+    async def wrapper(request):
+        try:
+            return await endpoint(request)
+        except BadRequest as e:
+            return JSONResponse({'error': str(e)}, status_code=400)
+        except InventoryError as e:
+            return JSONResponse({'error': str(e)}, status_code=_ERROR_STATUS.get(type(e), 400))
+    return wrapper
+
+
+@_handle_errors
+async def list_products(request: Request):
+    products = await run_db(inventory.get_all_products)
+    return JSONResponse({'products': [_product_json(p) for p in products]})
+
+
+@_handle_errors
+async def get_product(request: Request):
+    product = await run_db(inventory.get_product, request.path_params['product_id'])
+    return JSONResponse(_product_json(product))
+
+
+@_handle_errors
+async def create_sale(request: Request):
+    body = await _json_body(request)
+    product_id = _int_field(body, 'product_id')
+    quantity = _int_field(body, 'quantity', minimum=1)
+    idempotency_key = _idempotency_key_field(body, request.headers.get('idempotency-key'))
+    sale_buffer: SaleBuffer | None = request.app.state.sale_buffer
+    if sale_buffer is not None:
+        sale_id = await asyncio.wrap_future(sale_buffer.submit(product_id, quantity, idempotency_key))
+        return JSONResponse({'sale_id': sale_id, 'product_id': product_id, 'quantity': quantity}, status_code=201)
+    sale = await run_db(inventory.record_sale, product_id, quantity, idempotency_key)
+    return JSONResponse({
+        'sale_id': sale.sale_id,
+        'product_id': sale.product_id,
+        'quantity': sale.quantity,
+        'sale_price': float(sale.sale_price),
+        'sale_date': sale.sale_date.isoformat()
+    }, status_code=201)
+
+
+@_handle_errors
+async def create_sales_batch(request: Request):
+    body = await _json_body(request)
+    sales = body.get('sales')
+    if not isinstance(sales, list) or not sales:
+        raise BadRequest("'sales' must be a non-empty list")
+    if len(sales) > MAX_BATCH_SIZE:
+        raise BadRequest(f"At most {MAX_BATCH_SIZE} sales per batch")
+    items = []
+    for sale in sales:
+        if not isinstance(sale, dict):
+            raise BadRequest("Each sale must be an object")
+        items.append((
+            _int_field(sale, 'product_id'),
+            _int_field(sale, 'quantity', minimum=1),
+            _idempotency_key_field(sale)
+        ))
+    sale_ids = await run_db(inventory.record_sales, items)
+    return JSONResponse({'sale_ids': sale_ids}, status_code=201)
+
+
+@_handle_errors
+async def list_purchase_orders(request: Request):
+    status = request.query_params.get('status')
+    if status is not None and status not in inventory.PURCHASE_ORDER_STATUSES:
+        raise BadRequest(f"'status' must be one of {', '.join(inventory.PURCHASE_ORDER_STATUSES)}")
+    product_id = _int_param(request, 'product_id', None, minimum=1)
+    limit = _int_param(request, 'limit', 50, minimum=1, maximum=MAX_PAGE_SIZE)
+    offset = _int_param(request, 'offset', 0)
+    rows, total = await run_db(
+        inventory.get_purchase_orders,
+        status=status,
+        product_id=product_id,
+        limit=limit,
+        offset=offset
+    )
+    return JSONResponse({
+        'purchase_orders': [_purchase_order_json(order, name, received) for order, name, received in rows],
+        'total': total,
+        'limit': limit,
+        'offset': offset
+    })
+
+
+@_handle_errors
+async def create_purchase_order(request: Request):
+    body = await _json_body(request)
+    expected_delivery = body.get('expected_delivery')
+    if expected_delivery is not None:
+        try:
+            expected_delivery = datetime.fromisoformat(expected_delivery)
+        except (TypeError, ValueError):
+            raise BadRequest("'expected_delivery' must be an ISO 8601 date")
+    order = await run_db(
+        inventory.create_purchase_order,
+        _int_field(body, 'product_id'),
+        _int_field(body, 'quantity', minimum=1),
+        expected_delivery,
+        _number_field(body, 'cost_per_unit', positive=True)
+    )
+    return JSONResponse(_purchase_order_json(order), status_code=201)
+
+
+@_handle_errors
+async def create_purchase_order_receipt(request: Request):
+    body = await _json_body(request)
+    await run_db(
+        inventory.record_purchase_order_receipt,
+        request.path_params['order_id'],
+        _int_field(body, 'quantity', minimum=1)
+    )
+    return JSONResponse({'order_id': request.path_params['order_id']}, status_code=201)
+
+
+@_handle_errors
+async def receive_purchase_orders(request: Request):
+    body = await _json_body(request)
+    received = await run_db(inventory.receive_purchase_orders, _int_list_field(body, 'order_ids'))
+    return JSONResponse({'received': received})
+
+
+@_handle_errors
+async def cancel_purchase_orders(request: Request):
+    body = await _json_body(request)
+    cancelled = await run_db(inventory.cancel_purchase_orders, _int_list_field(body, 'order_ids'))
+    return JSONResponse({'cancelled': cancelled})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await run_db(init_db)
+    app.state.sale_buffer = sale_buffer_from_env()
+    if app.state.sale_buffer is not None:
+        await run_db(app.state.sale_buffer.start)
+    yield
+    if app.state.sale_buffer is not None:
+        await run_db(app.state.sale_buffer.stop)
+
+
+routes = [
+    Route("/products", list_products, methods=["GET"]),
+    Route("/products/{product_id:int}", get_product, methods=["GET"]),
+    Route("/sales", create_sale, methods=["POST"]),
+    Route("/sales/batch", create_sales_batch, methods=["POST"]),
+    Route("/purchase-orders", list_purchase_orders, methods=["GET"]),
+    Route("/purchase-orders", create_purchase_order, methods=["POST"]),
+    Route("/purchase-orders/receive", receive_purchase_orders, methods=["POST"]),
+    Route("/purchase-orders/cancel", cancel_purchase_orders, methods=["POST"]),
+    Route("/purchase-orders/{order_id:int}/receipts", create_purchase_order_receipt, methods=["POST"]),
+]
+
+class _TrackWritesMiddleware:
+    """Give each request its own read-after-write marker (see ``database.track_writes``)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            track_writes()
+        await self.app(scope, receive, send)
+
+
+app = Starlette(routes=routes, lifespan=lifespan, middleware=[Middleware(_TrackWritesMiddleware)])
@@ -1,7 +1,11 @@
+import time
+
+_RUN_STARTED = time.perf_counter()
+
 import base64
-import importlib
 import mimetypes
 import os
+import re
 from pathlib import Path
 import subprocess
 import sys
@@ -206,21 +210,12 @@ def build_theme_css(theme: dict) -> str:
     """
 
 
-def _ensure_package(package_name: str, import_name: str | None = None):
-    module_name = import_name or package_name
-    try:
-        return importlib.import_module(module_name)
-    except ModuleNotFoundError:  # pragma: no cover - dependency bootstrap
-        subprocess.check_call([sys.executable, "-m", "pip", "install", package_name])
-        return importlib.import_module(module_name)
-
-
-st = _ensure_package("streamlit")  # pyright: ignore[reportMissingImports]
-pd = _ensure_package("pandas")  # pyright: ignore[reportMissingImports]
-px = _ensure_package("plotly", "plotly.express")
-go = _ensure_package("plotly", "plotly.graph_objects")
-relativedelta_module = _ensure_package("python-dateutil", "dateutil.relativedelta")
-relativedelta = relativedelta_module.relativedelta  # pyright: ignore[attr-defined]
+# Dependencies are declared in pyproject.toml and installed at build time.
+# pandas, numpy, plotly and the forecasting module are imported inside the
+# functions and pages that use them, so pages without charts or tables don't
+# pay for loading them.
+import streamlit as st  # pyright: ignore[reportMissingImports]
+from dateutil.relativedelta import relativedelta  # pyright: ignore[reportMissingImports]
 
 
 if __name__ == "__main__":
@@ -241,12 +236,77 @@ if __name__ == "__main__":
         )
         sys.exit(result.returncode)
 from datetime import datetime, timedelta
-from database import init_db, get_db, Product, Sale, PurchaseOrder
-from sqlalchemy import func  # pyright: ignore[reportMissingImports]
+import inventory
+from inventory import (
+    ABC_CLASSES,
+    DEFAULT_TREND_POINT_BUDGET,
+    OPEN_PURCHASE_ORDER_STATUSES,
+    PURCHASE_ORDER_STATUSES,
+    PRODUCT_TREND_METRICS,
+    TREND_GRANULARITIES,
+    TREND_PERIODS,
+    InventoryError,
+    compute_product_trend_stats,
+    create_dashboard_scheduler,
+    downsample_series,
+    get_abc_classification,
+    get_all_products,
+    get_filtered_sales,
+    get_monthly_sales,
+    get_monthly_stats,
+    get_product_names,
+    get_product_sales_breakdown,
+    get_product_sales_matrix,
+    get_purchase_order_status_counts,
+    get_purchase_orders,
+    get_stock_as_of,
+    get_stockout_forecast,
+    get_time_bucket_stats,
+    query_inventory_valuation,
+)
+from database import WriteMarker, init_db, track_writes
+import functools
 import io
+import itertools
 import os
+import uuid
+
+_IMPORTS_DONE = time.perf_counter()
+
 
-init_db()
+@st.cache_resource(show_spinner=False)
+def ensure_schema_ready():
+    """Create the schema once per server process rather than on every rerun."""
+    init_db()
+    return True
+
+
+@st.cache_resource(show_spinner=False)
+def _script_run_counter():
+    return itertools.count(1)
+
+
+def report_run_timing(page):
+    """Print where this script run spent its time when ``STARTUP_TIMING=1``.
+
+    Run 1 of a process is the cold start. The heavy modules listed are the
+    ones loaded by this or any earlier run.
+    """
+    finished = time.perf_counter()
+    loaded = [name for name in ("pandas", "numpy", "plotly", "forecasting") if name in sys.modules]
+    print(
+        f"[timing] run={next(_script_run_counter())} page={page!r} "
+        f"imports={_IMPORTS_DONE - _RUN_STARTED:.3f}s schema={_SCHEMA_READY - _IMPORTS_DONE:.3f}s "
+        f"render={finished - _SCHEMA_READY:.3f}s total={finished - _RUN_STARTED:.3f}s "
+        f"heavy_modules={','.join(loaded) or 'none'}",
+        file=sys.stderr,
+    )
+
+
+ensure_schema_ready()
+_SCHEMA_READY = time.perf_counter()
+# Each browser session reads its own writes from the primary; see database.track_writes.
+track_writes(st.session_state.setdefault("write_marker", WriteMarker()))
 
 st.set_page_config(page_title="Business Inventory Manager", layout="wide")
 
@@ -311,7 +371,19 @@ with header_col2:
             st.session_state.selected_theme = theme_names[next_idx]
         st.markdown("</div>", unsafe_allow_html=True)
 
-st.markdown(build_theme_css(THEMES[st.session_state.selected_theme]), unsafe_allow_html=True)
+def _minify_css(css: str) -> str:
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};,])\s*", r"\1", css).strip()
+
+
+@st.cache_resource(show_spinner=False)
+def theme_stylesheets() -> dict[str, str]:
+    """Minified stylesheet for every theme, built once per process instead of on each rerun."""
+    return {name: _minify_css(build_theme_css(theme)) for name, theme in THEMES.items()}
+
+
+st.markdown(theme_stylesheets()[st.session_state.selected_theme], unsafe_allow_html=True)
 
 st.markdown(
     """
@@ -434,7 +506,7 @@ st.markdown(
 
 menu = st.sidebar.selectbox(
     "Navigation",
-    ["Products", "Add Product", "Manage Products", "Record Sale", "Price Comparison", "Monthly Sales Report", "Sales History", "Purchase Orders", "Financial Dashboard", "Trends & Analytics"]
+    ["Products", "Add Product", "Manage Products", "Record Sale", "Price Comparison", "Monthly Sales Report", "Sales History", "Purchase Orders", "Financial Dashboard", "Trends & Analytics", "Product Trends"]
 )
 
 def save_uploaded_image(uploaded_file):
@@ -493,274 +565,167 @@ def render_product_card(product):
     """
 
 
-def _month_bounds(year: int, month: int):
-    """Return the inclusive start and exclusive end datetime for a calendar month."""
-    start = datetime(year, month, 1)
-    end = start + relativedelta(months=1)
-    return start, end
-
-def add_product(name, buying_price, selling_price, stock, reorder_level=10, image_url=None):
-    db = get_db()
-    try:
-        product = Product(
-            name=name,
-            buying_price=buying_price,
-            selling_price=selling_price,
-            current_stock=stock,
-            reorder_level=reorder_level,
-            image_url=image_url
-        )
-        db.add(product)
-        db.commit()
-        db.refresh(product)
-        return True
-    except Exception as e:
-        db.rollback()
-        st.error(f"Error adding product: {e}")
-        return False
-    finally:
-        db.close()
-
-def get_all_products():
-    db = get_db()
-    try:
-        products = db.query(Product).all()
-        return products
-    finally:
-        db.close()
-
-def update_product(product_id, name, buying_price, selling_price, stock, reorder_level=10, image_url=None):
-    db = get_db()
-    try:
-        product = db.query(Product).filter(Product.product_id == product_id).first()
-        if product:
-            product.name = name
-            product.buying_price = buying_price
-            product.selling_price = selling_price
-            product.current_stock = stock
-            product.reorder_level = reorder_level
-            product.image_url = image_url
-            db.commit()
-            return True
-        return False
-    except Exception as e:
-        db.rollback()
-        st.error(f"Error updating product: {e}")
-        return False
-    finally:
-        db.close()
-
-def delete_product(product_id):
-    db = get_db()
-    try:
-        product = db.query(Product).filter(Product.product_id == product_id).first()
-        if product:
-            db.delete(product)
-            db.commit()
-            return True
-        return False
-    except Exception as e:
-        db.rollback()
-        st.error(f"Error deleting product: {e}")
-        return False
-    finally:
-        db.close()
-
-def record_sale(product_id, quantity):
-    db = get_db()
-    try:
-        product = db.query(Product).filter(Product.product_id == product_id).first()
-        if not product:
-            st.error("Product not found")
-            return False
-        
-        if product.current_stock < quantity:
-            st.error(f"Insufficient stock. Available: {product.current_stock}")
-            return False
-        
-        sale = Sale(
-            product_id=product_id,
-            quantity=quantity,
-            sale_price=product.selling_price,
-            cost_price=product.buying_price
-        )
-        
-        product.current_stock -= quantity
-        
-        db.add(sale)
-        db.commit()
-        return True
-    except Exception as e:
-        db.rollback()
-        st.error(f"Error recording sale: {e}")
-        return False
-    finally:
-        db.close()
-
-def get_monthly_sales(year, month):
-    db = get_db()
-    try:
-        start, end = _month_bounds(year, month)
-        sales = db.query(Sale).filter(
-            Sale.sale_date >= start,
-            Sale.sale_date < end
-        ).all()
-        return sales
-    finally:
-        db.close()
-
-
-def get_monthly_stats(year, month):
-    db = get_db()
-    try:
-        start, end = _month_bounds(year, month)
-        stats = db.query(
-            func.sum(Sale.quantity * Sale.sale_price).label('total_revenue'),
-            func.sum(Sale.quantity * (Sale.sale_price - Sale.cost_price)).label('total_profit'),
-            func.count(Sale.sale_id).label('total_transactions')
-        ).filter(
-            Sale.sale_date >= start,
-            Sale.sale_date < end
-        ).first()
-
-        return {
-            'total_revenue': stats.total_revenue or 0,
-            'total_profit': stats.total_profit or 0,
-            'total_transactions': stats.total_transactions or 0
-        }
-    finally:
-        db.close()
-
-def get_multi_month_stats(months_back=6):
-    db = get_db()
-    try:
-        end_date = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        start_date = end_date - relativedelta(months=months_back - 1)
-
-        monthly_data = []
-        current = start_date
-
-        for _ in range(months_back):
-            month_start = current
-            month_end = month_start + relativedelta(months=1)
-            stats = db.query(
-                func.sum(Sale.quantity * Sale.sale_price).label('total_revenue'),
-                func.sum(Sale.quantity * (Sale.sale_price - Sale.cost_price)).label('total_profit'),
-                func.count(Sale.sale_id).label('total_transactions')
-            ).filter(
-                Sale.sale_date >= month_start,
-                Sale.sale_date < month_end
-            ).first()
-
-            monthly_data.append({
-                'year': month_start.year,
-                'month': month_start.month,
-                'month_name': month_start.strftime('%b %Y'),
-                'revenue': float(stats.total_revenue or 0),
-                'profit': float(stats.total_profit or 0),
-                'transactions': int(stats.total_transactions or 0)
-            })
+def _reported(service_function, failure_message, default=False):
+    """Wrap a service write so failures are shown with ``st.error`` and ``default`` is returned."""
+    @functools.wraps(service_function)
+    def wrapper(*args, **kwargs):
+        try:
+            return service_function(*args, **kwargs)
+        except InventoryError as e:
+            st.error(str(e))
+        except Exception as e:
+            st.error(f"{failure_message}: {e}")
+        return default
+    return wrapper
+
+add_product = _reported(inventory.add_product, "Error adding product")
+update_product = _reported(inventory.update_product, "Error updating product")
+delete_product = _reported(inventory.delete_product, "Error deleting product")
+record_sale = _reported(inventory.record_sale, "Error recording sale")
+create_purchase_order = _reported(inventory.create_purchase_order, "Error creating purchase order")
+record_purchase_order_receipt = _reported(inventory.record_purchase_order_receipt, "Error recording receipt")
+receive_purchase_orders = _reported(inventory.receive_purchase_orders, "Error receiving purchase orders", default=0)
+cancel_purchase_orders = _reported(inventory.cancel_purchase_orders, "Error cancelling purchase orders", default=0)
+compute_abc_classification = _reported(inventory.compute_abc_classification, "Error computing ABC classification", default=0)
+
+@st.cache_resource(show_spinner=False)
+def get_dashboard_scheduler():
+    """The process-wide dashboard precompute worker, started on first use."""
+    scheduler = create_dashboard_scheduler()
+    scheduler.start()
+    return scheduler
+
+TREND_FIGURE_CACHE_SIZE = 16
+
+@st.cache_resource(max_entries=TREND_FIGURE_CACHE_SIZE, show_spinner=False)
+def build_trend_figures(months_back, data_version, _trend_data):
+    """Build the Trends & Analytics figures from precomputed trend data.
+
+    Cached per (period, precomputed data version) so reruns that don't change
+    the data reuse the built figures. The returned objects are shared between
+    sessions and must not be mutated.
+    """
+    import pandas as pd
+    import plotly.graph_objects as go
+    df_trends = pd.DataFrame(_trend_data)
+    if not ((df_trends['revenue'] > 0) | (df_trends['profit'] > 0)).any():
+        return df_trends, None
+
+    df_trends['profit_margin'] = df_trends.apply(
+        lambda x: (x['profit'] / x['revenue'] * 100) if x['revenue'] > 0 else 0,
+        axis=1
+    )
 
-            current = month_end
+    fig_revenue = go.Figure()
+    fig_revenue.add_trace(go.Scatter(
+        x=df_trends['month_name'],
+        y=df_trends['revenue'],
+        mode='lines+markers',
+        name='Revenue',
+        line=dict(color='#1f77b4', width=3),
+        marker=dict(size=8),
+        fill='tozeroy',
+        fillcolor='rgba(31, 119, 180, 0.2)'
+    ))
+    fig_revenue.update_layout(
+        xaxis_title="Month",
+        yaxis_title="Revenue ($)",
+        hovermode='x unified',
+        height=400
+    )
 
-        return monthly_data
-    finally:
-        db.close()
+    fig_profit = go.Figure()
+    fig_profit.add_trace(go.Scatter(
+        x=df_trends['month_name'],
+        y=df_trends['profit'],
+        mode='lines+markers',
+        name='Profit',
+        line=dict(color='#2ca02c', width=3),
+        marker=dict(size=8),
+        fill='tozeroy',
+        fillcolor='rgba(44, 160, 44, 0.2)'
+    ))
+    fig_profit.update_layout(
+        xaxis_title="Month",
+        yaxis_title="Profit ($)",
+        hovermode='x unified',
+        height=400
+    )
 
-def get_filtered_sales(start_date=None, end_date=None, product_id=None):
-    db = get_db()
-    try:
-        query = db.query(Sale)
-        
-        if start_date:
-            query = query.filter(Sale.sale_date >= start_date)
-        if end_date:
-            end_datetime = datetime.combine(end_date, datetime.max.time())
-            query = query.filter(Sale.sale_date <= end_datetime)
-        if product_id:
-            query = query.filter(Sale.product_id == product_id)
-        
-        sales = query.order_by(Sale.sale_date.desc()).all()
-        return sales
-    finally:
-        db.close()
+    fig_combined = go.Figure()
+    fig_combined.add_trace(go.Bar(
+        x=df_trends['month_name'],
+        y=df_trends['revenue'],
+        name='Revenue',
+        marker_color='#1f77b4'
+    ))
+    fig_combined.add_trace(go.Bar(
+        x=df_trends['month_name'],
+        y=df_trends['profit'],
+        name='Profit',
+        marker_color='#2ca02c'
+    ))
+    fig_combined.update_layout(
+        xaxis_title="Month",
+        yaxis_title="Amount ($)",
+        barmode='group',
+        hovermode='x unified',
+        height=400
+    )
+
+    fig_margin = go.Figure()
+    fig_margin.add_trace(go.Scatter(
+        x=df_trends['month_name'],
+        y=df_trends['profit_margin'],
+        mode='lines+markers',
+        name='Profit Margin %',
+        line=dict(color='#ff7f0e', width=3),
+        marker=dict(size=8)
+    ))
+    fig_margin.update_layout(
+        xaxis_title="Month",
+        yaxis_title="Profit Margin (%)",
+        hovermode='x unified',
+        height=400
+    )
+
+    return df_trends, {
+        'revenue': fig_revenue,
+        'profit': fig_profit,
+        'combined': fig_combined,
+        'margin': fig_margin
+    }
+
+def abc_class_filter(key):
+    """Render an ABC class multiselect and return ``(classifications, selected classes)``."""
+    classifications = get_abc_classification()
+    if not classifications:
+        return classifications, []
+    computed_at = max(c.computed_at for c in classifications.values())
+    selected = st.multiselect(
+        "ABC Class (by revenue)",
+        ABC_CLASSES,
+        key=key,
+        help=f"Classification computed at {computed_at.strftime('%Y-%m-%d %H:%M')} UTC"
+    )
+    return classifications, selected
 
 def export_to_csv(dataframe, filename):
     csv = dataframe.to_csv(index=False)
     return csv
 
-def create_purchase_order(product_id, quantity, expected_delivery, cost_per_unit):
-    db = get_db()
-    try:
-        total_cost = quantity * cost_per_unit
-        order = PurchaseOrder(
-            product_id=product_id,
-            quantity=quantity,
-            expected_delivery=expected_delivery,
-            cost_per_unit=cost_per_unit,
-            total_cost=total_cost,
-            status="Pending"
-        )
-        db.add(order)
-        db.commit()
-        return True
-    except Exception as e:
-        db.rollback()
-        st.error(f"Error creating purchase order: {e}")
-        return False
-    finally:
-        db.close()
-
-def receive_purchase_order(order_id):
-    db = get_db()
-    try:
-        order = db.query(PurchaseOrder).filter(PurchaseOrder.order_id == order_id).first()
-        if order and order.status == "Pending":
-            product = db.query(Product).filter(Product.product_id == order.product_id).first()
-            if product:
-                product.current_stock += order.quantity
-                order.status = "Received"
-                db.commit()
-                return True
-        return False
-    except Exception as e:
-        db.rollback()
-        st.error(f"Error receiving purchase order: {e}")
-        return False
-    finally:
-        db.close()
-
-def get_all_purchase_orders():
-    db = get_db()
-    try:
-        orders = db.query(PurchaseOrder).order_by(PurchaseOrder.order_date.desc()).all()
-        return orders
-    finally:
-        db.close()
-
-def cancel_purchase_order(order_id):
-    db = get_db()
-    try:
-        order = db.query(PurchaseOrder).filter(PurchaseOrder.order_id == order_id).first()
-        if order and order.status == "Pending":
-            order.status = "Cancelled"
-            db.commit()
-            return True
-        return False
-    except Exception as e:
-        db.rollback()
-        st.error(f"Error cancelling purchase order: {e}")
-        return False
-    finally:
-        db.close()
+# Starts the background worker (dashboard aggregates, stock snapshots) on first load.
+get_dashboard_scheduler()
 
 if menu == "Products":
+    import pandas as pd
+    from forecasting import FORECAST_METHODS
     st.header("📦 Products Overview")
     
     products = get_all_products()
     
     if products:
-        tab1, tab2, tab3 = st.tabs(["🖼️ Product Catalog", "📊 Product List", "⚠️ Stock Alerts"])
+        tab1, tab2, tab3, tab4 = st.tabs(["🖼️ Product Catalog", "📊 Product List", "⚠️ Stock Alerts", "🕒 Stock History"])
 
         with tab1:
             st.subheader("Product Catalog")
@@ -774,15 +739,21 @@ if menu == "Products":
 
         with tab2:
             st.subheader("Product List")
+            classifications, selected_classes = abc_class_filter("product_list_abc")
             product_data = []
             for p in products:
+                classification = classifications.get(p.product_id)
+                if selected_classes and (not classification or classification.revenue_class not in selected_classes):
+                    continue
                 stock_color = "🔴" if p.current_stock < 10 else "🟡" if p.current_stock < 25 else "🟢"
                 product_data.append({
                     'ID': p.product_id,
                     'Product Name': p.name,
                     'Selling Price': f"₹{p.selling_price:.2f}",
                     'Current Stock': p.current_stock,
-                    'Status': stock_color
+                    'Status': stock_color,
+                    'ABC (Revenue)': classification.revenue_class if classification else "-",
+                    'ABC (Profit)': classification.profit_class if classification else "-"
                 })
 
             df = pd.DataFrame(product_data)
@@ -839,6 +810,44 @@ if menu == "Products":
 
             if not critical_stock and not low_stock:
                 st.success("✅ All products have adequate stock levels!")
+
+            st.markdown("### 🔮 Stock-out Forecast")
+            forecast_method = st.selectbox("Forecast Method", list(FORECAST_METHODS.keys()), key="forecast_method")
+            forecast_horizon = st.slider("Look-ahead (days)", min_value=7, max_value=90, value=30, key="forecast_horizon")
+            forecast_df = get_stockout_forecast(products, FORECAST_METHODS[forecast_method])
+            at_risk = forecast_df[
+                forecast_df['stockout_before_delivery'] & (forecast_df['days_to_stockout'] <= forecast_horizon)
+            ]
+            if at_risk.empty:
+                st.success(f"✅ No products are forecast to stock out before their next delivery in the next {forecast_horizon} days.")
+            else:
+                st.dataframe(pd.DataFrame({
+                    'Product': at_risk['name'],
+                    'Current Stock': at_risk['current_stock'],
+                    'Forecast Daily Demand': at_risk['daily_demand'].round(2),
+                    'Days to Stock-out': at_risk['days_to_stockout'].round(1),
+                    'Stock-out Date': at_risk['stockout_date'].dt.strftime('%Y-%m-%d'),
+                    'Next Delivery': at_risk['next_delivery'].dt.strftime('%Y-%m-%d').fillna("None scheduled")
+                }), use_container_width=True, hide_index=True)
+
+        with tab4:
+            st.subheader("Stock History")
+
+            col1, col2 = st.columns(2)
+            with col1:
+                history_date = st.date_input("Stock as of", value=datetime.now(), max_value=datetime.now(), key="stock_history_date")
+            with col2:
+                history_time = st.time_input("Time (UTC)", value=datetime.max.time().replace(second=0, microsecond=0), key="stock_history_time")
+
+            stock_as_of = get_stock_as_of(datetime.combine(history_date, history_time))
+            history_df = pd.DataFrame([{
+                'ID': p.product_id,
+                'Product Name': p.name,
+                'Stock Then': stock_as_of.get(p.product_id, 0),
+                'Stock Now': p.current_stock,
+                'Change Since': p.current_stock - stock_as_of.get(p.product_id, 0)
+            } for p in products])
+            st.dataframe(history_df, use_container_width=True, hide_index=True)
     else:
         st.info("No products available. Add your first product using the 'Add Product' menu.")
 
@@ -853,6 +862,13 @@ elif menu == "Manage Products":
         
         st.subheader("📋 All Products - Click Edit to Modify")
         
+        classifications, selected_classes = abc_class_filter("manage_products_abc")
+        if selected_classes:
+            products = [
+                p for p in products
+                if p.product_id in classifications and classifications[p.product_id].revenue_class in selected_classes
+            ]
+        
         for p in products:
             stock_status = "🔴" if p.current_stock < 10 else "🟡" if p.current_stock < 25 else "🟢"
             
@@ -997,16 +1013,23 @@ elif menu == "Record Sale":
                 
                 submit = st.form_submit_button("Record Sale")
                 
+                # A submit that arrives again before the form is redrawn (double
+                # click, retried request) reuses the key and can't sell twice.
                 if submit:
-                    if record_sale(selected_product[0], quantity):
+                    sale_key = st.session_state.setdefault("sale_idempotency_key", uuid.uuid4().hex)
+                    if record_sale(selected_product[0], quantity, sale_key):
+                        st.session_state.sale_idempotency_key_used = True
                         st.success(f"Sale recorded successfully! {quantity} unit(s) of {product.name} sold.")
                         st.rerun()
+                elif st.session_state.pop("sale_idempotency_key_used", False):
+                    del st.session_state["sale_idempotency_key"]
         else:
             st.warning("No products available in stock. Please add stock to existing products.")
     else:
         st.info("No products available. Please add products first.")
 
 elif menu == "Price Comparison":
+    import pandas as pd
     st.header("💵 Price Comparison Analysis")
     
     products = get_all_products()
@@ -1014,17 +1037,19 @@ elif menu == "Price Comparison":
     if products:
         comparison_data = []
         for p in products:
-            profit_per_unit = p.selling_price - p.buying_price
-            profit_margin = (profit_per_unit / p.buying_price * 100) if p.buying_price > 0 else 0
+            buying_price = float(p.buying_price)
+            selling_price = float(p.selling_price)
+            profit_per_unit = selling_price - buying_price
+            profit_margin = (profit_per_unit / buying_price * 100) if buying_price > 0 else 0
             
             comparison_data.append({
                 'Product Name': p.name,
-                'Buying Price': p.buying_price,
-                'Selling Price': p.selling_price,
+                'Buying Price': buying_price,
+                'Selling Price': selling_price,
                 'Profit/Unit': profit_per_unit,
                 'Profit Margin %': profit_margin,
-                'Stock Value (Cost)': p.buying_price * p.current_stock,
-                'Stock Value (Retail)': p.selling_price * p.current_stock,
+                'Stock Value (Cost)': buying_price * p.current_stock,
+                'Stock Value (Retail)': selling_price * p.current_stock,
                 'Potential Profit': profit_per_unit * p.current_stock
             })
         
@@ -1059,6 +1084,7 @@ elif menu == "Price Comparison":
         st.info("No products available for comparison.")
 
 elif menu == "Monthly Sales Report":
+    import pandas as pd
     st.header("📅 Monthly Sales Report")
     
     col1, col2 = st.columns(2)
@@ -1072,34 +1098,30 @@ elif menu == "Monthly Sales Report":
     if sales:
         sales_data = []
         export_monthly_data = []
-        db = get_db()
-        try:
-            for sale in sales:
-                product = db.query(Product).filter(Product.product_id == sale.product_id).first()
-                product_name = product.name if product else "Unknown"
-                
-                revenue = sale.quantity * sale.sale_price
-                profit = sale.quantity * (sale.sale_price - sale.cost_price)
-                
-                sales_data.append({
-                    'Date': sale.sale_date.strftime('%Y-%m-%d %H:%M'),
-                    'Product': product_name,
-                    'Quantity': sale.quantity,
-                    'Unit Price': f"₹{sale.sale_price:.2f}",
-                    'Revenue': f"₹{revenue:.2f}",
-                    'Profit': f"₹{profit:.2f}"
-                })
-                
-                export_monthly_data.append({
-                    'Date': sale.sale_date.strftime('%Y-%m-%d %H:%M'),
-                    'Product': product_name,
-                    'Quantity': sale.quantity,
-                    'Unit Price': sale.sale_price,
-                    'Revenue': revenue,
-                    'Profit': profit
-                })
-        finally:
-            db.close()
+        product_names = get_product_names()
+        for sale in sales:
+            product_name = product_names.get(sale.product_id, "Unknown")
+            
+            revenue = sale.quantity * sale.sale_price
+            profit = sale.quantity * (sale.sale_price - sale.cost_price)
+            
+            sales_data.append({
+                'Date': sale.sale_date.strftime('%Y-%m-%d %H:%M'),
+                'Product': product_name,
+                'Quantity': sale.quantity,
+                'Unit Price': f"₹{sale.sale_price:.2f}",
+                'Revenue': f"₹{revenue:.2f}",
+                'Profit': f"₹{profit:.2f}"
+            })
+            
+            export_monthly_data.append({
+                'Date': sale.sale_date.strftime('%Y-%m-%d %H:%M'),
+                'Product': product_name,
+                'Quantity': sale.quantity,
+                'Unit Price': sale.sale_price,
+                'Revenue': revenue,
+                'Profit': profit
+            })
         
         df = pd.DataFrame(sales_data)
         st.dataframe(df, use_container_width=True, hide_index=True)
@@ -1132,6 +1154,7 @@ elif menu == "Monthly Sales Report":
         st.info(f"No sales recorded for {datetime(2000, selected_month, 1).strftime('%B')} {selected_year}")
 
 elif menu == "Sales History":
+    import pandas as pd
     st.header("📜 Detailed Sales History")
     
     st.subheader("🔍 Filter Options")
@@ -1182,56 +1205,46 @@ elif menu == "Sales History":
             total_profit = 0
             total_quantity = 0
             
-            db = get_db()
-            try:
-                for sale in sales:
-                    product = db.query(Product).filter(Product.product_id == sale.product_id).first()
-                    product_name = product.name if product else "Unknown"
-                    
-                    revenue = sale.quantity * sale.sale_price
-                    profit = sale.quantity * (sale.sale_price - sale.cost_price)
-                    
-                    total_revenue += revenue
-                    total_profit += profit
-                    total_quantity += sale.quantity
-                    
-                    sales_data.append({
-                        'Sale ID': sale.sale_id,
-                        'Date & Time': sale.sale_date.strftime('%Y-%m-%d %H:%M:%S'),
-                        'Product': product_name,
-                        'Quantity': sale.quantity,
-                        'Unit Price': f"₹{sale.sale_price:.2f}",
-                        'Cost Price': f"₹{sale.cost_price:.2f}",
-                        'Revenue': f"₹{revenue:.2f}",
-                        'Profit': f"₹{profit:.2f}"
-                    })
-            finally:
-                db.close()
+            product_names = get_product_names()
+            for sale in sales:
+                product_name = product_names.get(sale.product_id, "Unknown")
+                
+                revenue = sale.quantity * sale.sale_price
+                profit = sale.quantity * (sale.sale_price - sale.cost_price)
+                
+                total_revenue += revenue
+                total_profit += profit
+                total_quantity += sale.quantity
+                
+                sales_data.append({
+                    'Sale ID': sale.sale_id,
+                    'Date & Time': sale.sale_date.strftime('%Y-%m-%d %H:%M:%S'),
+                    'Product': product_name,
+                    'Quantity': sale.quantity,
+                    'Unit Price': f"₹{sale.sale_price:.2f}",
+                    'Cost Price': f"₹{sale.cost_price:.2f}",
+                    'Revenue': f"₹{revenue:.2f}",
+                    'Profit': f"₹{profit:.2f}"
+                })
             
             st.subheader("📊 Sales Records")
             df = pd.DataFrame(sales_data)
             st.dataframe(df, use_container_width=True, hide_index=True)
             
-            db_export = get_db()
-            try:
-                export_sales_data = []
-                for sale in sales:
-                    product = db_export.query(Product).filter(Product.product_id == sale.product_id).first()
-                    product_name = product.name if product else "Unknown"
-                    export_sales_data.append({
-                        'Sale ID': sale.sale_id,
-                        'Date & Time': sale.sale_date.strftime('%Y-%m-%d %H:%M:%S'),
-                        'Product ID': sale.product_id,
-                        'Product': product_name,
-                        'Quantity': sale.quantity,
-                        'Unit Price': sale.sale_price,
-                        'Cost Price': sale.cost_price,
-                        'Revenue': sale.quantity * sale.sale_price,
-                        'Profit': sale.quantity * (sale.sale_price - sale.cost_price)
-                    })
-                export_sales_df = pd.DataFrame(export_sales_data)
-            finally:
-                db_export.close()
+            export_sales_data = []
+            for sale in sales:
+                export_sales_data.append({
+                    'Sale ID': sale.sale_id,
+                    'Date & Time': sale.sale_date.strftime('%Y-%m-%d %H:%M:%S'),
+                    'Product ID': sale.product_id,
+                    'Product': product_names.get(sale.product_id, "Unknown"),
+                    'Quantity': sale.quantity,
+                    'Unit Price': sale.sale_price,
+                    'Cost Price': sale.cost_price,
+                    'Revenue': sale.quantity * sale.sale_price,
+                    'Profit': sale.quantity * (sale.sale_price - sale.cost_price)
+                })
+            export_sales_df = pd.DataFrame(export_sales_data)
             
             csv_sales = export_to_csv(export_sales_df, "sales_history.csv")
             st.download_button(
@@ -1257,43 +1270,27 @@ elif menu == "Sales History":
                 profit_margin = (total_profit / total_revenue) * 100
                 st.info(f"📊 Average Profit Margin: {profit_margin:.2f}%")
             
-            db = get_db()
-            try:
-                product_breakdown = db.query(
-                    Product.name,
-                    func.sum(Sale.quantity).label('total_quantity'),
-                    func.sum(Sale.quantity * Sale.sale_price).label('total_revenue'),
-                    func.sum(Sale.quantity * (Sale.sale_price - Sale.cost_price)).label('total_profit')
-                ).join(Sale).filter(
-                    Sale.sale_date >= datetime.combine(start_date, datetime.min.time()),
-                    Sale.sale_date <= datetime.combine(end_date, datetime.max.time())
-                )
-                
-                if product_filter:
-                    product_breakdown = product_breakdown.filter(Sale.product_id == product_filter)
+            product_breakdown = get_product_sales_breakdown(start_date, end_date, product_filter)
+            
+            if product_breakdown and len(product_breakdown) > 1:
+                st.subheader("🏆 Product Performance Breakdown")
                 
-                product_breakdown = product_breakdown.group_by(Product.name).all()
+                breakdown_data = []
+                for name, qty, rev, prof in product_breakdown:
+                    breakdown_data.append({
+                        'Product': name,
+                        'Units Sold': qty,
+                        'Revenue': f"₹{rev:.2f}",
+                        'Profit': f"₹{prof:.2f}"
+                    })
                 
-                if product_breakdown and len(product_breakdown) > 1:
-                    st.subheader("🏆 Product Performance Breakdown")
-                    
-                    breakdown_data = []
-                    for name, qty, rev, prof in product_breakdown:
-                        breakdown_data.append({
-                            'Product': name,
-                            'Units Sold': qty,
-                            'Revenue': f"₹{rev:.2f}",
-                            'Profit': f"₹{prof:.2f}"
-                        })
-                    
-                    breakdown_df = pd.DataFrame(breakdown_data)
-                    st.dataframe(breakdown_df, use_container_width=True, hide_index=True)
-            finally:
-                db.close()
+                breakdown_df = pd.DataFrame(breakdown_data)
+                st.dataframe(breakdown_df, use_container_width=True, hide_index=True)
         else:
             st.info("No sales found for the selected filters.")
 
 elif menu == "Purchase Orders":
+    import pandas as pd
     st.header("📦 Purchase Order Management")
     
     tab1, tab2 = st.tabs(["Create Purchase Order", "View Purchase Orders"])
@@ -1346,96 +1343,152 @@ elif menu == "Purchase Orders":
     with tab2:
         st.subheader("📋 All Purchase Orders")
         
-        orders = get_all_purchase_orders()
+        status_counts = get_purchase_order_status_counts()
         
-        if orders:
-            col1, col2, col3 = st.columns(3)
+        if sum(status_counts.values()):
+            col1, col2, col3, col4 = st.columns(4)
             with col1:
-                pending_orders = [o for o in orders if o.status == "Pending"]
-                st.metric("Pending Orders", len(pending_orders))
+                st.metric("Pending Orders", status_counts["Pending"])
             with col2:
-                received_orders = [o for o in orders if o.status == "Received"]
-                st.metric("Received Orders", len(received_orders))
+                st.metric("Partially Received", status_counts["Partially Received"])
             with col3:
-                cancelled_orders = [o for o in orders if o.status == "Cancelled"]
-                st.metric("Cancelled Orders", len(cancelled_orders))
+                st.metric("Received Orders", status_counts["Received"])
+            with col4:
+                st.metric("Cancelled Orders", status_counts["Cancelled"])
             
-            status_filter = st.selectbox("Filter by Status", ["All", "Pending", "Received", "Cancelled"])
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                status_filter = st.selectbox("Filter by Status", ["All"] + PURCHASE_ORDER_STATUSES)
+            with col2:
+                po_start_date = st.date_input("Ordered From", value=None, key="po_start_date")
+            with col3:
+                po_end_date = st.date_input("Ordered To", value=None, key="po_end_date")
+            with col4:
+                po_products = get_all_products()
+                po_product_options = [("all", "All Products")] + [(p.product_id, p.name) for p in po_products]
+                po_selected_product = st.selectbox(
+                    "Product",
+                    options=po_product_options,
+                    format_func=lambda x: x[1],
+                    key="po_product_filter"
+                )
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                page_size = st.selectbox("Orders per Page", [25, 50, 100, 200], index=1)
+            
+            po_filters = {
+                'status': None if status_filter == "All" else status_filter,
+                'start_date': datetime.combine(po_start_date, datetime.min.time()) if po_start_date else None,
+                'end_date': po_end_date,
+                'product_id': None if po_selected_product[0] == "all" else po_selected_product[0],
+            }
+            page_orders, total_orders = get_purchase_orders(**po_filters, limit=page_size)
+            total_pages = max(1, -(-total_orders // page_size))
+            with col2:
+                page = st.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1)
             
-            filtered_orders = orders if status_filter == "All" else [o for o in orders if o.status == status_filter]
+            if page > 1:
+                page_orders, total_orders = get_purchase_orders(**po_filters, limit=page_size, offset=(page - 1) * page_size)
             
-            if filtered_orders:
+            if page_orders:
                 order_data = []
-                db = get_db()
-                try:
-                    for order in filtered_orders:
-                        product = db.query(Product).filter(Product.product_id == order.product_id).first()
-                        product_name = product.name if product else "Unknown"
-                        
-                        order_data.append({
-                            'Order ID': order.order_id,
-                            'Product': product_name,
-                            'Quantity': order.quantity,
-                            'Cost/Unit': f"₹{order.cost_per_unit:.2f}",
-                            'Total Cost': f"₹{order.total_cost:.2f}",
-                            'Order Date': order.order_date.strftime('%Y-%m-%d'),
-                            'Expected Delivery': order.expected_delivery.strftime('%Y-%m-%d') if order.expected_delivery else "N/A",
-                            'Status': order.status
-                        })
-                finally:
-                    db.close()
+                for order, product_name, received_quantity in page_orders:
+                    order_data.append({
+                        'Order ID': order.order_id,
+                        'Product': product_name,
+                        'Quantity': order.quantity,
+                        'Received': received_quantity,
+                        'Cost/Unit': f"₹{order.cost_per_unit:.2f}",
+                        'Total Cost': f"₹{order.total_cost:.2f}",
+                        'Order Date': order.order_date.strftime('%Y-%m-%d'),
+                        'Expected Delivery': order.expected_delivery.strftime('%Y-%m-%d') if order.expected_delivery else "N/A",
+                        'Status': order.status
+                    })
                 
                 df = pd.DataFrame(order_data)
                 st.dataframe(df, use_container_width=True, hide_index=True)
+                st.caption(f"Page {page} of {total_pages} ({total_orders} matching orders)")
                 
                 st.subheader("🔧 Manage Orders")
                 
-                pending_orders_list = [o for o in filtered_orders if o.status == "Pending"]
+                pending_orders_list = [o for o, _, _ in page_orders if o.status in OPEN_PURCHASE_ORDER_STATUSES]
+                outstanding_by_order = {o.order_id: o.quantity - received for o, _, received in page_orders}
                 if pending_orders_list:
                     col1, col2 = st.columns(2)
                     
+                    pending_options = [(o.order_id, f"Order #{o.order_id}") for o in pending_orders_list]
+
                     with col1:
-                        st.write("**Receive Order**")
-                        order_to_receive = st.selectbox(
-                            "Select Order to Receive",
-                            options=[(o.order_id, f"Order #{o.order_id}") for o in pending_orders_list],
+                        st.write("**Receive Orders**")
+                        orders_to_receive = st.multiselect(
+                            "Select Orders to Receive",
+                            options=pending_options,
                             format_func=lambda x: x[1]
                         )
                         
-                        if st.button("Mark as Received", type="primary"):
-                            if receive_purchase_order(order_to_receive[0]):
-                                st.success("Order received and stock updated!")
+                        if st.button("Mark as Received", type="primary", disabled=not orders_to_receive):
+                            received_count = receive_purchase_orders([o[0] for o in orders_to_receive])
+                            if received_count:
+                                st.success(f"{received_count} order(s) received and stock updated!")
                                 st.rerun()
                     
                     with col2:
-                        st.write("**Cancel Order**")
-                        order_to_cancel = st.selectbox(
-                            "Select Order to Cancel",
-                            options=[(o.order_id, f"Order #{o.order_id}") for o in pending_orders_list],
+                        st.write("**Cancel Orders**")
+                        orders_to_cancel = st.multiselect(
+                            "Select Orders to Cancel",
+                            options=pending_options,
                             format_func=lambda x: x[1],
                             key="cancel_select"
                         )
                         
-                        if st.button("Cancel Order", type="secondary"):
-                            if cancel_purchase_order(order_to_cancel[0]):
-                                st.success("Order cancelled successfully!")
+                        if st.button("Cancel Orders", type="secondary", disabled=not orders_to_cancel):
+                            cancelled_count = cancel_purchase_orders([o[0] for o in orders_to_cancel])
+                            if cancelled_count:
+                                st.success(f"{cancelled_count} order(s) cancelled successfully!")
+                                st.rerun()
+                    
+                    st.write("**Record Partial Delivery**")
+                    col1, col2, col3 = st.columns([2, 1, 1])
+                    with col1:
+                        order_to_part_receive = st.selectbox(
+                            "Select Order",
+                            options=[
+                                (o.order_id, f"Order #{o.order_id} ({outstanding_by_order[o.order_id]} of {o.quantity} outstanding)")
+                                for o in pending_orders_list
+                            ],
+                            format_func=lambda x: x[1],
+                            key="partial_receipt_select"
+                        )
+                    with col2:
+                        receipt_quantity = st.number_input(
+                            "Quantity Delivered",
+                            min_value=1,
+                            max_value=outstanding_by_order[order_to_part_receive[0]],
+                            step=1,
+                            key="partial_receipt_quantity"
+                        )
+                    with col3:
+                        st.write("")
+                        if st.button("Record Delivery", key="record_partial_receipt"):
+                            if record_purchase_order_receipt(order_to_part_receive[0], receipt_quantity):
+                                st.success("Delivery recorded and stock updated!")
                                 st.rerun()
                 else:
                     st.info("No pending orders to manage.")
             else:
-                st.info(f"No {status_filter.lower()} orders found.")
+                st.info("No orders match the selected filters.")
         else:
             st.info("No purchase orders created yet.")
 
 elif menu == "Financial Dashboard":
+    import pandas as pd
     st.header("💼 Financial Dashboard")
     
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-    
     st.subheader(f"Current Month: {datetime.now().strftime('%B %Y')}")
     
-    current_stats = get_monthly_stats(current_year, current_month)
+    dashboard = get_dashboard_scheduler()
+    current_stats = dashboard.get("current_month_stats")
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -1452,12 +1505,12 @@ elif menu == "Financial Dashboard":
         else:
             st.metric("Profit Margin", "0.00%")
     
-    products = get_all_products()
-    if products:
+    inventory_totals = dashboard.get("inventory_totals")
+    if inventory_totals['product_count']:
         st.subheader("📦 Current Inventory Overview")
         
-        total_stock_value_cost = sum(p.buying_price * p.current_stock for p in products)
-        total_stock_value_retail = sum(p.selling_price * p.current_stock for p in products)
+        total_stock_value_cost = inventory_totals['value_cost']
+        total_stock_value_retail = inventory_totals['value_retail']
         potential_profit = total_stock_value_retail - total_stock_value_cost
         
         col1, col2, col3 = st.columns(3)
@@ -1477,130 +1530,120 @@ elif menu == "Financial Dashboard":
         else:
             st.info("No profit or loss this month")
         
-        db = get_db()
-        try:
-            month_start, month_end = _month_bounds(current_year, current_month)
-            top_products = db.query(
-                Product.name,
-                func.sum(Sale.quantity).label('total_sold'),
-                func.sum(Sale.quantity * (Sale.sale_price - Sale.cost_price)).label('product_profit')
-            ).join(Sale).filter(
-                Sale.sale_date >= month_start,
-                Sale.sale_date < month_end
-            ).group_by(Product.name).order_by(func.sum(Sale.quantity * (Sale.sale_price - Sale.cost_price)).desc()).limit(5).all()
-
-            if top_products:
-                st.subheader("🏆 Top Performing Products This Month")
-                for idx, (name, sold, profit) in enumerate(top_products, 1):
-                    st.write(f"{idx}. **{name}** - {sold} units sold, ₹{profit:.2f} profit")
-        finally:
-            db.close()
+        top_products = dashboard.get("top_products")
+        if top_products:
+            st.subheader("🏆 Top Performing Products This Month")
+            for idx, (name, sold, profit) in enumerate(top_products, 1):
+                st.write(f"{idx}. **{name}** - {sold} units sold, ₹{profit:.2f} profit")
+        
+        st.caption(f"Figures precomputed at {dashboard.entry('current_month_stats').computed_at.strftime('%H:%M:%S')} UTC")
+        
+        st.subheader("🔤 ABC Classification")
+        col1, col2, col3 = st.columns([2, 2, 1])
+        with col1:
+            abc_start = st.date_input("Period Start", value=datetime.now() - timedelta(days=90), max_value=datetime.now(), key="abc_start")
+        with col2:
+            abc_end = st.date_input("Period End", value=datetime.now(), max_value=datetime.now(), key="abc_end")
+        with col3:
+            st.write("")
+            if st.button("Recompute", key="recompute_abc"):
+                classified = compute_abc_classification(
+                    datetime.combine(abc_start, datetime.min.time()),
+                    datetime.combine(abc_end + timedelta(days=1), datetime.min.time())
+                )
+                if classified:
+                    st.success(f"Classified {classified} products.")
+        
+        classifications = get_abc_classification()
+        if classifications:
+            abc_df = pd.DataFrame([{
+                'revenue_class': c.revenue_class,
+                'profit_class': c.profit_class,
+                'revenue': float(c.revenue),
+                'profit': float(c.profit)
+            } for c in classifications.values()])
+            abc_summary = abc_df.groupby('revenue_class').agg(
+                Products=('revenue', 'size'),
+                Revenue=('revenue', 'sum'),
+                Profit=('profit', 'sum')
+            ).reindex(ABC_CLASSES, fill_value=0)
+            abc_summary['Revenue Share %'] = (abc_summary['Revenue'] / abc_summary['Revenue'].sum() * 100).fillna(0).round(1)
+            any_classification = next(iter(classifications.values()))
+            st.caption(
+                f"Sales from {any_classification.period_start.strftime('%Y-%m-%d')} to "
+                f"{(any_classification.period_end - timedelta(days=1)).strftime('%Y-%m-%d')}, "
+                f"computed at {any_classification.computed_at.strftime('%Y-%m-%d %H:%M')} UTC"
+            )
+            st.dataframe(abc_summary.rename_axis('Class').reset_index(), use_container_width=True, hide_index=True)
+        else:
+            st.info("No classification yet. Choose a period and click Recompute.")
+        
+        st.subheader("🗓️ Inventory Valuation as of Date")
+        st.caption("Quantities are as of the chosen date; values use today's buying and selling prices.")
+        valuation_date = st.date_input(
+            "Valuation Date (end of day, UTC)",
+            value=datetime.now().replace(day=1) - timedelta(days=1),
+            max_value=datetime.now(),
+            key="valuation_date"
+        )
+        valuation_df = query_inventory_valuation(datetime.combine(valuation_date, datetime.max.time()))
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Units on Hand", int(valuation_df['on_hand'].sum()))
+        with col2:
+            st.metric("Valuation (Cost, current prices)", f"₹{valuation_df['value_cost'].sum():.2f}")
+        with col3:
+            st.metric("Valuation (Retail, current prices)", f"₹{valuation_df['value_retail'].sum():.2f}")
+        
+        if not valuation_df.empty:
+            export_valuation_df = valuation_df.rename(columns={
+                'product_id': 'Product ID',
+                'name': 'Product',
+                'on_hand': 'On Hand',
+                'buying_price': 'Buying Price',
+                'selling_price': 'Selling Price',
+                'value_cost': 'Value (Cost)',
+                'value_retail': 'Value (Retail)'
+            })
+            st.dataframe(export_valuation_df, use_container_width=True, hide_index=True)
+            st.download_button(
+                label="📥 Export Valuation to CSV",
+                data=export_to_csv(export_valuation_df, "inventory_valuation.csv"),
+                file_name=f"inventory_valuation_{valuation_date.strftime('%Y%m%d')}.csv",
+                mime="text/csv"
+            )
     else:
         st.info("No inventory data available.")
 
 elif menu == "Trends & Analytics":
+    import plotly.graph_objects as go
     st.header("📈 Trends & Analytics")
     
     st.subheader("Multi-Month Performance Comparison")
     
-    months_options = {"3 Months": 3, "6 Months": 6, "12 Months": 12, "24 Months": 24}
-    selected_period = st.selectbox("Select Period", list(months_options.keys()), index=1)
+    selected_period = st.selectbox("Select Period", list(TREND_PERIODS.keys()), index=1)
     
-    months_back = months_options[selected_period]
-    trend_data = get_multi_month_stats(months_back)
+    months_back = TREND_PERIODS[selected_period]
+    trend_entry = get_dashboard_scheduler().entry(f"trends_{months_back}")
+    df_trends, trend_figures = build_trend_figures(months_back, trend_entry.version, trend_entry.value)
     
-    if any(d['revenue'] > 0 or d['profit'] > 0 for d in trend_data):
-        df_trends = pd.DataFrame(trend_data)
-        
+    if trend_figures:
         col1, col2 = st.columns(2)
         
         with col1:
             st.subheader("💰 Revenue Trend")
-            fig_revenue = go.Figure()
-            fig_revenue.add_trace(go.Scatter(
-                x=df_trends['month_name'],
-                y=df_trends['revenue'],
-                mode='lines+markers',
-                name='Revenue',
-                line=dict(color='#1f77b4', width=3),
-                marker=dict(size=8),
-                fill='tozeroy',
-                fillcolor='rgba(31, 119, 180, 0.2)'
-            ))
-            fig_revenue.update_layout(
-                xaxis_title="Month",
-                yaxis_title="Revenue ($)",
-                hovermode='x unified',
-                height=400
-            )
-            st.plotly_chart(fig_revenue, use_container_width=True)
+            st.plotly_chart(trend_figures['revenue'], use_container_width=True)
         
         with col2:
             st.subheader("💵 Profit Trend")
-            fig_profit = go.Figure()
-            fig_profit.add_trace(go.Scatter(
-                x=df_trends['month_name'],
-                y=df_trends['profit'],
-                mode='lines+markers',
-                name='Profit',
-                line=dict(color='#2ca02c', width=3),
-                marker=dict(size=8),
-                fill='tozeroy',
-                fillcolor='rgba(44, 160, 44, 0.2)'
-            ))
-            fig_profit.update_layout(
-                xaxis_title="Month",
-                yaxis_title="Profit ($)",
-                hovermode='x unified',
-                height=400
-            )
-            st.plotly_chart(fig_profit, use_container_width=True)
+            st.plotly_chart(trend_figures['profit'], use_container_width=True)
         
         st.subheader("📊 Combined Revenue vs Profit")
-        fig_combined = go.Figure()
-        fig_combined.add_trace(go.Bar(
-            x=df_trends['month_name'],
-            y=df_trends['revenue'],
-            name='Revenue',
-            marker_color='#1f77b4'
-        ))
-        fig_combined.add_trace(go.Bar(
-            x=df_trends['month_name'],
-            y=df_trends['profit'],
-            name='Profit',
-            marker_color='#2ca02c'
-        ))
-        fig_combined.update_layout(
-            xaxis_title="Month",
-            yaxis_title="Amount ($)",
-            barmode='group',
-            hovermode='x unified',
-            height=400
-        )
-        st.plotly_chart(fig_combined, use_container_width=True)
+        st.plotly_chart(trend_figures['combined'], use_container_width=True)
         
         st.subheader("📉 Profit Margin Trend")
-        df_trends['profit_margin'] = df_trends.apply(
-            lambda x: (x['profit'] / x['revenue'] * 100) if x['revenue'] > 0 else 0,
-            axis=1
-        )
-        
-        fig_margin = go.Figure()
-        fig_margin.add_trace(go.Scatter(
-            x=df_trends['month_name'],
-            y=df_trends['profit_margin'],
-            mode='lines+markers',
-            name='Profit Margin %',
-            line=dict(color='#ff7f0e', width=3),
-            marker=dict(size=8)
-        ))
-        fig_margin.update_layout(
-            xaxis_title="Month",
-            yaxis_title="Profit Margin (%)",
-            hovermode='x unified',
-            height=400
-        )
-        st.plotly_chart(fig_margin, use_container_width=True)
+        st.plotly_chart(trend_figures['margin'], use_container_width=True)
         
         st.subheader("📈 Key Insights")
         col1, col2, col3, col4 = st.columns(4)
@@ -1632,6 +1675,121 @@ elif menu == "Trends & Analytics":
                 st.info(f"📊 **Lowest Month**: {worst_month['month_name']} with ₹{worst_month['profit']:.2f} profit")
     else:
         st.info("No sales data available for the selected period. Start recording sales to see trends!")
+    
+    st.markdown("---")
+    st.subheader("Daily & Weekly Trends")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        selected_granularity = st.selectbox("Granularity", list(TREND_GRANULARITIES.keys()), key="trend_granularity")
+    with col2:
+        bucket_start = st.date_input("From", value=datetime.now() - relativedelta(years=2), max_value=datetime.now(), key="trend_bucket_start")
+    with col3:
+        bucket_end = st.date_input("To", value=datetime.now(), max_value=datetime.now(), key="trend_bucket_end")
+    with col4:
+        point_budget = st.number_input("Max Points per Chart", min_value=50, max_value=5000, value=DEFAULT_TREND_POINT_BUDGET, step=50, key="trend_point_budget")
+    
+    bucket_df = get_time_bucket_stats(
+        datetime.combine(bucket_start, datetime.min.time()),
+        datetime.combine(bucket_end + timedelta(days=1), datetime.min.time()),
+        TREND_GRANULARITIES[selected_granularity]
+    )
+    
+    if not bucket_df.empty and (bucket_df['revenue'] > 0).any():
+        fig_buckets = go.Figure()
+        for column, color in (('revenue', '#1f77b4'), ('profit', '#2ca02c')):
+            series = downsample_series(bucket_df, 'bucket', column, point_budget)
+            fig_buckets.add_trace(go.Scatter(
+                x=series['bucket'],
+                y=series[column],
+                mode='lines',
+                name=column.title(),
+                line=dict(color=color, width=2)
+            ))
+        fig_buckets.update_layout(
+            xaxis_title="Date",
+            yaxis_title="Amount (₹)",
+            hovermode='x unified',
+            height=400
+        )
+        st.plotly_chart(fig_buckets, use_container_width=True)
+        if len(bucket_df) > point_budget:
+            st.caption(f"{len(bucket_df)} {selected_granularity.lower()} points downsampled to {point_budget} per series.")
+    else:
+        st.info("No sales data available for the selected range.")
+
+elif menu == "Product Trends":
+    import pandas as pd
+    import plotly.graph_objects as go
+    st.header("🚀 Product Trends")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        pt_metric = st.selectbox("Metric", list(PRODUCT_TREND_METRICS.keys()), key="pt_metric")
+    with col2:
+        pt_granularity = st.selectbox("Granularity", list(TREND_GRANULARITIES.keys()), index=1, key="pt_granularity")
+    with col3:
+        pt_start = st.date_input("From", value=datetime.now() - timedelta(days=180), max_value=datetime.now(), key="pt_start")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        pt_window = st.slider("Rolling Window (buckets)", min_value=2, max_value=12, value=4, key="pt_window")
+    with col2:
+        pt_top_k = st.slider("Top Movers to Chart", min_value=1, max_value=20, value=5, key="pt_top_k")
+    
+    matrix = get_product_sales_matrix(
+        datetime.combine(pt_start, datetime.min.time()),
+        datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time()),
+        TREND_GRANULARITIES[pt_granularity],
+        pt_metric
+    )
+    
+    if matrix.empty:
+        st.info("No sales data available for the selected period.")
+    else:
+        rolling, trend_stats = compute_product_trend_stats(matrix, pt_window)
+        product_names = get_product_names()
+        
+        def _movers_table(stats):
+            return pd.DataFrame({
+                'Product': [product_names.get(pid, "Unknown") for pid in stats.index],
+                f'Total {pt_metric}': stats['total'].round(2),
+                'Recent Avg': stats['recent_avg'].round(2),
+                'Previous Avg': stats['previous_avg'].round(2),
+                'Growth %': (stats['growth'] * 100).round(1),
+                'Sales Rank': stats['total_rank']
+            })
+        
+        gainers = trend_stats.head(pt_top_k)
+        decliners = trend_stats.iloc[::-1].head(pt_top_k)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("📈 Top Gainers")
+            st.dataframe(_movers_table(gainers), use_container_width=True, hide_index=True)
+        with col2:
+            st.subheader("📉 Top Decliners")
+            st.dataframe(_movers_table(decliners), use_container_width=True, hide_index=True)
+        
+        st.subheader(f"Top Gainers: {pt_window}-Bucket Rolling Average")
+        fig_movers = go.Figure()
+        for product_id in gainers.index:
+            fig_movers.add_trace(go.Scatter(
+                x=rolling.columns,
+                y=rolling.loc[product_id],
+                mode='lines',
+                name=product_names.get(product_id, "Unknown")
+            ))
+        fig_movers.update_layout(
+            xaxis_title="Date",
+            yaxis_title=pt_metric,
+            hovermode='x unified',
+            height=450
+        )
+        st.plotly_chart(fig_movers, use_container_width=True)
 
 st.sidebar.markdown("---")
 st.sidebar.info("💡 **Tip**: Keep your product information updated for accurate financial tracking!")
+
+if os.getenv("STARTUP_TIMING") == "1":
+    report_run_timing(menu)
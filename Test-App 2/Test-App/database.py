@@ -1,66 +1,174 @@
-import importlib
 import os
-import subprocess
-import sys
+import time
+from contextvars import ContextVar
 from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
 from pathlib import Path
 
+from sqlalchemy import create_engine, event, BigInteger, Column, Integer, String, DateTime, ForeignKey, Index, TypeDecorator
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session, sessionmaker, relationship
+from sqlalchemy.sql.dml import UpdateBase
 
-def _ensure_package(package_name: str, import_name: str | None = None):
-    module_name = import_name or package_name
-    try:
-        return importlib.import_module(module_name)
-    except ModuleNotFoundError:  # pragma: no cover - dependency bootstrap
-        subprocess.check_call([sys.executable, "-m", "pip", "install", package_name])
-        return importlib.import_module(module_name)
+_DEFAULT_DB_PATH = (Path(__file__).resolve().parent / "app.db").resolve()
 
+DATABASE_URL = os.getenv("DATABASE_URL") or f"sqlite:///{_DEFAULT_DB_PATH.as_posix()}"
 
-_ensure_package("SQLAlchemy", "sqlalchemy")
+# Optional read replica for report and catalog queries (see get_read_db).
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+# After a caller (browser session or API request, see track_writes) commits,
+# its reads stay on the primary this many seconds so they see the write even
+# while the replica catches up.
+READ_AFTER_WRITE_SECONDS = float(os.getenv("DATABASE_READ_AFTER_WRITE_SECONDS", "5"))
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+# PostgreSQL connection pool: connections kept open, and extra ones allowed
+# under load. Their sum also bounds how many API requests hit the database
+# at once.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
 
-_DEFAULT_DB_PATH = (Path(__file__).resolve().parent / "app.db").resolve()
+# With sales partitioned by month (PostgreSQL, see migrations.partitions),
+# months older than this are moved to the sales archive at startup.
+SALES_PARTITION_RETAIN_MONTHS = (
+    int(os.environ["SALES_PARTITION_RETAIN_MONTHS"]) if os.getenv("SALES_PARTITION_RETAIN_MONTHS") else None
+)
 
-DATABASE_URL = os.getenv("DATABASE_URL") or f"sqlite:///{_DEFAULT_DB_PATH.as_posix()}"
+def _create_engine(url):
+    if url.startswith("sqlite"):
+        return create_engine(url, connect_args={"check_same_thread": False})
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+    )
 
 if DATABASE_URL.startswith("sqlite"):
     _DEFAULT_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    engine = create_engine(DATABASE_URL)
+engine = _create_engine(DATABASE_URL)
+read_engine = _create_engine(DATABASE_READ_URL) if DATABASE_READ_URL else engine
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+class WriteMarker:
+    """When one caller (a browser session, an API request) last committed."""
+
+    def __init__(self):
+        self.last_commit_at = float("-inf")
+
+_write_marker = ContextVar("write_marker", default=None)
+
+def track_writes(marker=None):
+    """Make reads in the current context see the writes committed from it.
+
+    Installs ``marker`` (a new ``WriteMarker`` by default) for the current
+    context and returns it; asyncio tasks and anyio worker threads started
+    from here share it. Commits made with no marker installed, such as
+    background refreshes, don't send anyone's reads to the primary.
+    """
+    marker = marker or WriteMarker()
+    _write_marker.set(marker)
+    return marker
+
+@event.listens_for(SessionLocal, "after_commit")
+def _record_commit(session):
+    marker = _write_marker.get()
+    if marker is not None:
+        marker.last_commit_at = time.monotonic()
+
+class ReadRoutingSession(Session):
+    """Session for read-only queries that uses the read replica when one is configured.
+
+    Each session picks its database when it is created: the primary if the
+    caller's ``WriteMarker`` (see ``track_writes``) committed within
+    ``READ_AFTER_WRITE_SECONDS``, so callers read their own writes, otherwise
+    the replica. Flushes and INSERT/UPDATE/DELETE statements always go to
+    the primary.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        marker = _write_marker.get()
+        recently_written = (
+            marker is not None and time.monotonic() - marker.last_commit_at < READ_AFTER_WRITE_SECONDS
+        )
+        self.read_bind = engine if recently_written else read_engine
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, UpdateBase):
+            return engine
+        return self.read_bind
+
+ReadSessionLocal = sessionmaker(class_=ReadRoutingSession, autocommit=False, autoflush=False)
+
+PAISE_PER_RUPEE = 100
+
+def to_money(value):
+    """Round a rupee amount (int, float, str or ``Decimal``) to a ``Decimal`` of whole paise."""
+    return Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+class Money(TypeDecorator):
+    """Rupee amount stored as integer paise and returned as a ``Decimal``.
+
+    Arithmetic and SUMs over Money columns run on integers in SQL, so totals
+    are exact. The difference of two Money columns is typed as a plain
+    integer by SQLAlchemy; wrap such expressions in ``type_coerce(..., Money)``
+    to get rupees back.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return int(to_money(value) * PAISE_PER_RUPEE)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return Decimal(int(value)).scaleb(-2)
+
 class Product(Base):
     __tablename__ = "products"
     
     product_id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
-    buying_price = Column(Float, nullable=False)
-    selling_price = Column(Float, nullable=False)
+    buying_price = Column(Money, nullable=False)
+    selling_price = Column(Money, nullable=False)
     current_stock = Column(Integer, nullable=False, default=0)
     reorder_level = Column(Integer, default=10)
     image_url = Column(String, nullable=True)
+    # Set by inventory.delete_product; deleted products keep their sales and
+    # stock ledger so history and past valuations stay intact.
+    deleted_at = Column(DateTime, nullable=True)
     
     sales = relationship("Sale", back_populates="product")
     purchase_orders = relationship("PurchaseOrder", back_populates="product")
 
 class Sale(Base):
     __tablename__ = "sales"
+    __table_args__ = (
+        Index("ix_sales_sale_date", "sale_date"),
+        Index("ix_sales_product_id_sale_date", "product_id", "sale_date"),
+        Index("ix_sales_idempotency_key", "idempotency_key", unique=True),
+    )
     
     sale_id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.product_id"), nullable=False)
     quantity = Column(Integer, nullable=False)
     sale_date = Column(DateTime, default=datetime.utcnow)
-    sale_price = Column(Float, nullable=False)
-    cost_price = Column(Float, nullable=False)
+    sale_price = Column(Money, nullable=False)
+    cost_price = Column(Money, nullable=False)
+    # Optional client-supplied key making retried submissions safe; see inventory.record_sale.
+    idempotency_key = Column(String(64), nullable=True)
     
     product = relationship("Product", back_populates="sales")
 
 class PurchaseOrder(Base):
     __tablename__ = "purchase_orders"
+    __table_args__ = (
+        Index("ix_purchase_orders_status_order_date", "status", "order_date"),
+    )
     
     order_id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.product_id"), nullable=False)
@@ -68,13 +176,77 @@ class PurchaseOrder(Base):
     order_date = Column(DateTime, default=datetime.utcnow)
     expected_delivery = Column(DateTime, nullable=True)
     status = Column(String, default="Pending")
-    cost_per_unit = Column(Float, nullable=False)
-    total_cost = Column(Float, nullable=False)
+    cost_per_unit = Column(Money, nullable=False)
+    total_cost = Column(Money, nullable=False)
     
     product = relationship("Product", back_populates="purchase_orders")
+    receipts = relationship("PurchaseOrderReceipt", back_populates="order")
+
+class PurchaseOrderReceipt(Base):
+    __tablename__ = "purchase_order_receipts"
+    
+    receipt_id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey("purchase_orders.order_id"), nullable=False, index=True)
+    quantity = Column(Integer, nullable=False)
+    received_date = Column(DateTime, default=datetime.utcnow)
+    
+    order = relationship("PurchaseOrder", back_populates="receipts")
+
+class StockMovement(Base):
+    __tablename__ = "stock_movements"
+    __table_args__ = (
+        Index("ix_stock_movements_product_date", "product_id", "movement_date"),
+    )
+    
+    movement_id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.product_id"), nullable=False)
+    quantity_change = Column(Integer, nullable=False)
+    movement_type = Column(String, nullable=False)
+    reference_id = Column(Integer, nullable=True)
+    movement_date = Column(DateTime, default=datetime.utcnow)
+
+class ProductClassification(Base):
+    __tablename__ = "product_classifications"
+    
+    product_id = Column(Integer, ForeignKey("products.product_id"), primary_key=True)
+    revenue = Column(Money, nullable=False, default=0)
+    profit = Column(Money, nullable=False, default=0)
+    revenue_class = Column(String(1), nullable=False, index=True)
+    profit_class = Column(String(1), nullable=False)
+    period_start = Column(DateTime, nullable=False)
+    period_end = Column(DateTime, nullable=False)
+    computed_at = Column(DateTime, default=datetime.utcnow)
+
+class SalesMonthlyRollup(Base):
+    """Per-product monthly totals of sales moved to the Parquet archive (see ``inventory.archive``)."""
+    __tablename__ = "sales_monthly_rollups"
+    
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    product_id = Column(Integer, primary_key=True)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Money, nullable=False, default=0)
+    profit = Column(Money, nullable=False, default=0)
+    transactions = Column(Integer, nullable=False, default=0)
+
+class StockSnapshot(Base):
+    __tablename__ = "stock_snapshots"
+    __table_args__ = (
+        Index("ix_stock_snapshots_product_date", "product_id", "snapshot_date"),
+    )
+    
+    snapshot_id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.product_id"), nullable=False)
+    snapshot_date = Column(DateTime, nullable=False)
+    stock_level = Column(Integer, nullable=False)
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    """Bring the schema up to the latest migration (see the ``migrations`` package)."""
+    from migrations import upgrade
+    from migrations.partitions import maintain_sales_partitions
+
+    upgrade(engine)
+    maintain_sales_partitions(engine, retain_months=SALES_PARTITION_RETAIN_MONTHS)
 
 def get_db():
     db = SessionLocal()
@@ -83,3 +255,7 @@ def get_db():
     except Exception:
         db.close()
         raise
+
+def get_read_db():
+    """Session for report and catalog reads; see ``ReadRoutingSession``."""
+    return ReadSessionLocal()
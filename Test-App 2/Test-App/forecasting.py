@@ -0,0 +1,111 @@
+"""Demand forecasting used for stock-out prediction.
+
+Daily demand is held as a products x days NumPy matrix; the smoothing
+recursions step through time once while every product is updated at the
+same time, so forecasting thousands of SKUs costs one pass over the history.
+"""
+import threading
+from datetime import timedelta
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+
+FORECAST_METHODS = {
+    "Exponential Smoothing": "exponential",
+    "Seasonal Naive (weekly)": "seasonal_naive",
+}
+
+
+def exponential_smoothing(demand, alpha=0.3, level=None):
+    """Return the simple-exponential-smoothing level of each row of ``demand``.
+
+    ``level`` continues a previous run; without it each row starts from its
+    first observation.
+    """
+    demand = np.asarray(demand, dtype=float)
+    start = 0
+    if level is None:
+        if demand.shape[1] == 0:
+            return np.zeros(demand.shape[0])
+        level = demand[:, 0]
+        start = 1
+    level = np.asarray(level, dtype=float)
+    for t in range(start, demand.shape[1]):
+        level = alpha * demand[:, t] + (1 - alpha) * level
+    return level
+
+
+def seasonal_naive(demand, season_length=7):
+    """Return each row's mean daily demand over its last full season."""
+    demand = np.asarray(demand, dtype=float)
+    if demand.shape[1] == 0:
+        return np.zeros(demand.shape[0])
+    return demand[:, -season_length:].mean(axis=1)
+
+
+def days_to_stockout(stock, daily_demand):
+    """Days until ``stock`` runs out at ``daily_demand`` (``inf`` when there is no demand)."""
+    stock = np.asarray(stock, dtype=float)
+    daily_demand = np.asarray(daily_demand, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(daily_demand > 0, np.maximum(stock, 0) / daily_demand, np.inf)
+
+
+class DemandForecaster:
+    """Per-product daily demand forecasts that are refreshed incrementally.
+
+    Only the smoothing level and the last season of demand are kept, so
+    folding in newly completed days costs a pass over those days only.
+    """
+
+    def __init__(self, alpha=0.3, season_length=7):
+        self.alpha = alpha
+        self.season_length = season_length
+        self.product_ids = np.empty(0, dtype=int)
+        self.level = np.empty(0)
+        self.recent = np.empty((0, 0))
+        self.last_day = None
+        self.lock = threading.Lock()
+
+    def _align(self, product_ids):
+        """Add rows for products seen for the first time; they start with no demand."""
+        new_ids = np.setdiff1d(np.asarray(product_ids, dtype=int), self.product_ids)
+        if len(new_ids):
+            self.product_ids = np.concatenate([self.product_ids, new_ids])
+            self.level = np.concatenate([self.level, np.zeros(len(new_ids))])
+            self.recent = np.vstack([self.recent, np.zeros((len(new_ids), self.recent.shape[1]))])
+        order = np.argsort(self.product_ids)
+        self.product_ids = self.product_ids[order]
+        self.level = self.level[order]
+        self.recent = self.recent[order]
+
+    def update(self, first_day, product_ids, demand):
+        """Fold in consecutive days of demand starting at ``first_day``.
+
+        ``demand`` has one row per id in ``product_ids`` and one column per
+        day. Days already folded in are skipped.
+        """
+        demand = np.asarray(demand, dtype=float)
+        if self.last_day is not None:
+            skip = (self.last_day - first_day).days + 1
+            if skip > 0:
+                demand = demand[:, skip:]
+                first_day = first_day + timedelta(days=skip)
+        if demand.shape[1] == 0:
+            return
+
+        self._align(product_ids)
+        full = np.zeros((len(self.product_ids), demand.shape[1]))
+        full[np.searchsorted(self.product_ids, np.asarray(product_ids, dtype=int))] = demand
+
+        first_run = self.last_day is None
+        self.level = exponential_smoothing(full, self.alpha, None if first_run else self.level)
+        self.recent = np.hstack([self.recent, full])[:, -self.season_length:]
+        self.last_day = first_day + timedelta(days=demand.shape[1] - 1)
+
+    def forecast(self, method="exponential"):
+        """Return ``{product_id: forecast daily demand}``."""
+        if method == "seasonal_naive":
+            rates = seasonal_naive(self.recent, self.season_length)
+        else:
+            rates = self.level
+        return dict(zip(self.product_ids.tolist(), rates.tolist()))
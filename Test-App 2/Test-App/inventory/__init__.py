@@ -0,0 +1,79 @@
+"""Inventory service layer.
+
+Plain functions over the ``database`` models with no Streamlit dependency, so
+the same operations can be driven from the UI, background workers, scripts
+and benchmarks. Write functions commit their own transaction, invalidate the
+affected query cache tags and either return their result or raise: an
+``InventoryError`` for requests that are refused, or the original database
+error after rolling back.
+"""
+from inventory.analytics import AnalyticsReplica, analytics_replica_from_env, get_analytics_replica
+from inventory.archive import ArchivedSale, archive_sales, archived_months, read_archived_sales
+from inventory.dashboard import DASHBOARD_REFRESH_INTERVAL, TREND_PERIODS, create_dashboard_scheduler
+from inventory.demand import FORECAST_HISTORY_DAYS, get_demand_forecaster, get_stockout_forecast, refresh_demand_forecaster
+from inventory.errors import (
+    IdempotencyKeyConflictError,
+    InsufficientStockError,
+    InvalidQuantityError,
+    InventoryError,
+    ProductNotFoundError,
+    PurchaseOrderNotOpenError,
+)
+from inventory.events import add_write_listener
+from inventory.products import (
+    ABC_CLASS_THRESHOLDS,
+    ABC_CLASSES,
+    add_product,
+    assign_abc_classes,
+    compute_abc_classification,
+    delete_product,
+    get_abc_classification,
+    get_all_products,
+    get_inventory_totals,
+    get_product,
+    get_product_names,
+    update_product,
+)
+from inventory.purchase_orders import (
+    OPEN_PURCHASE_ORDER_STATUSES,
+    PURCHASE_ORDER_STATUSES,
+    cancel_purchase_order,
+    cancel_purchase_orders,
+    create_purchase_order,
+    get_all_purchase_orders,
+    get_next_deliveries,
+    get_purchase_order_status_counts,
+    get_purchase_orders,
+    receive_purchase_order,
+    receive_purchase_orders,
+    record_purchase_order_receipt,
+)
+from inventory.sale_buffer import SaleBuffer, sale_buffer_from_env
+from inventory.sales import (
+    get_filtered_sales,
+    get_monthly_sales,
+    get_monthly_stats,
+    get_multi_month_stats,
+    get_product_sales_breakdown,
+    get_top_products,
+    month_bounds,
+    record_sale,
+    record_sales,
+)
+from inventory.stock import (
+    STOCK_SNAPSHOT_INTERVAL,
+    create_stock_snapshots,
+    ensure_recent_stock_snapshots,
+    get_stock_as_of,
+    query_inventory_valuation,
+)
+from inventory.trends import (
+    DEFAULT_TREND_POINT_BUDGET,
+    PRODUCT_TREND_METRICS,
+    TREND_GRANULARITIES,
+    compute_product_trend_stats,
+    downsample_series,
+    get_product_sales_matrix,
+    get_time_bucket_stats,
+    lttb_downsample,
+)
@@ -0,0 +1,39 @@
+"""Command line entry point: ``python -m inventory <command>``."""
+import argparse
+import os
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta  # pyright: ignore[reportMissingImports]
+
+from inventory.analytics import AnalyticsReplica, DEFAULT_REPLICA_PATH
+from inventory.archive import archive_sales
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m inventory", description="Inventory maintenance jobs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    archive_parser = commands.add_parser("archive-sales", help="move old sales to the Parquet archive")
+    cutoff = archive_parser.add_mutually_exclusive_group(required=True)
+    cutoff.add_argument("--keep-months", type=int, help="keep this many months (plus the current one) live")
+    cutoff.add_argument("--before", type=datetime.fromisoformat, help="archive whole months before this date")
+    analytics_parser = commands.add_parser("refresh-analytics", help="build or top up the DuckDB analytics replica")
+    analytics_parser.add_argument(
+        "--path",
+        default=os.getenv("ANALYTICS_DUCKDB_PATH") or DEFAULT_REPLICA_PATH,
+        help="replica file (default: ANALYTICS_DUCKDB_PATH or analytics.duckdb next to the app)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "archive-sales":
+        before = args.before or datetime.utcnow() - relativedelta(months=args.keep_months)
+        print(f"Archived {archive_sales(before)} sales before {before:%Y-%m}.")
+    elif args.command == "refresh-analytics":
+        replica = AnalyticsReplica(args.path)
+        try:
+            print(f"Copied {replica.refresh()} sales into {replica.path}.")
+        finally:
+            replica.close()
+
+
+if __name__ == "__main__":
+    main()
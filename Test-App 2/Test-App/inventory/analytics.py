@@ -0,0 +1,369 @@
+"""Optional DuckDB replica of the sales tables for reports.
+
+With ``ANALYTICS_DUCKDB=1`` the sales reports (monthly stats, trends, top
+products, the Sales History breakdown and purchase order counts) read a local
+DuckDB file instead of the main database, so multi-year aggregates are
+columnar scans that don't compete with sale inserts. Before answering, the
+replica copies the sales above its ``sale_id`` watermark, the purchase
+orders that are new or still open in the replica (received and cancelled
+orders never change again), reloads the catalog columns of ``products``
+(small, and only after product writes; stock levels aren't replicated) and
+imports any newly archived Parquet months, so it keeps every sale. It
+refreshes after writes made by this process and at least every
+``ANALYTICS_REFRESH_SECONDS`` for writes made by others.
+
+DuckDB lets one process at a time open a file for writing, so give each
+process its own ``ANALYTICS_DUCKDB_PATH``. Needs the ``analytics`` extra.
+Build or top up a replica ahead of time with
+``python -m inventory refresh-analytics``.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from dateutil.relativedelta import relativedelta  # pyright: ignore[reportMissingImports]
+
+from database import Product, PurchaseOrder, Sale, get_read_db
+from inventory.archive import ARCHIVE_DIR, archived_months
+from inventory.events import add_write_listener
+from query_cache import query_cache
+
+DEFAULT_REPLICA_PATH = Path(__file__).resolve().parent.parent / "analytics.duckdb"
+DEFAULT_REFRESH_INTERVAL = 30
+_COPY_BATCH_ROWS = 50_000
+# Sale ids are assigned before commit, so a slow transaction can commit an id
+# below the watermark after a refresh; the last ids are checked again.
+_LATE_COMMIT_OVERLAP = 1_000
+_REPLICATED_TAGS = {"sales", "products", "purchase_orders"}
+
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS sales (
+    sale_id BIGINT NOT NULL,
+    product_id BIGINT NOT NULL,
+    quantity BIGINT NOT NULL,
+    sale_date TIMESTAMP,
+    sale_price DECIMAL(18, 2) NOT NULL,
+    cost_price DECIMAL(18, 2) NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    product_id BIGINT NOT NULL,
+    name VARCHAR NOT NULL,
+    buying_price DECIMAL(18, 2) NOT NULL,
+    selling_price DECIMAL(18, 2) NOT NULL,
+    reorder_level BIGINT
+);
+-- Replicas built before stock levels were left out still have the column.
+ALTER TABLE products DROP COLUMN IF EXISTS current_stock;
+CREATE TABLE IF NOT EXISTS purchase_orders (
+    order_id BIGINT NOT NULL,
+    product_id BIGINT NOT NULL,
+    quantity BIGINT NOT NULL,
+    order_date TIMESTAMP,
+    expected_delivery TIMESTAMP,
+    status VARCHAR,
+    cost_per_unit DECIMAL(18, 2) NOT NULL,
+    total_cost DECIMAL(18, 2) NOT NULL
+);
+CREATE TABLE IF NOT EXISTS imported_archive_months (
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL
+);
+"""
+
+_SALE_COLUMNS = (Sale.sale_id, Sale.product_id, Sale.quantity, Sale.sale_date, Sale.sale_price, Sale.cost_price)
+_PRODUCT_COLUMNS = (
+    Product.product_id,
+    Product.name,
+    Product.buying_price,
+    Product.selling_price,
+    Product.reorder_level
+)
+_PURCHASE_ORDER_COLUMNS = (
+    PurchaseOrder.order_id,
+    PurchaseOrder.product_id,
+    PurchaseOrder.quantity,
+    PurchaseOrder.order_date,
+    PurchaseOrder.expected_delivery,
+    PurchaseOrder.status,
+    PurchaseOrder.cost_per_unit,
+    PurchaseOrder.total_cost
+)
+
+_REVENUE_SQL = "sum(s.quantity * s.sale_price)"
+_PROFIT_SQL = "sum(s.quantity * (s.sale_price - s.cost_price))"
+_METRIC_SQL = {"Revenue": _REVENUE_SQL, "Profit": _PROFIT_SQL, "Units Sold": "sum(s.quantity)"}
+
+
+class AnalyticsReplica:
+    def __init__(self, path=DEFAULT_REPLICA_PATH, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        self.path = Path(path)
+        self.refresh_interval = refresh_interval
+        self._connection = None
+        self._lock = threading.Lock()
+        self._stale_tags = set(_REPLICATED_TAGS)
+        self._refreshed_at = 0.0
+
+    def _connect(self):
+        if self._connection is None:
+            import duckdb  # pyright: ignore[reportMissingImports]
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = duckdb.connect(str(self.path))
+            self._connection.execute(_SCHEMA_SQL)
+        return self._connection
+
+    def mark_stale(self, tags):
+        """Have the next report copy the tables in ``tags`` again (a write listener)."""
+        stale = _REPLICATED_TAGS.intersection(tags)
+        if not stale:
+            return
+        with self._lock:
+            self._stale_tags |= stale
+        # Reports cached between the write's invalidation and this call were
+        # read from the replica before it knew about the write.
+        query_cache.invalidate(*stale)
+
+    def refresh(self, tags=None):
+        """Bring the replicated tables in ``tags`` (default: all) up to date.
+
+        Returns the number of sales copied.
+        """
+        with self._lock:
+            tags = _REPLICATED_TAGS if tags is None else _REPLICATED_TAGS.intersection(tags)
+            connection = self._connect()
+            copied = 0
+            if "sales" in tags:
+                copied = self._copy_new_sales(connection) + self._import_archived_months(connection)
+            if "products" in tags:
+                self._reload_products(connection)
+            if "purchase_orders" in tags:
+                self._copy_changed_purchase_orders(connection)
+            self._stale_tags -= tags
+            if tags == _REPLICATED_TAGS:
+                self._refreshed_at = time.monotonic()
+            return copied
+
+    def _ensure_fresh(self):
+        if time.monotonic() - self._refreshed_at >= self.refresh_interval:
+            self.refresh()
+        elif self._stale_tags:
+            self.refresh(set(self._stale_tags))
+
+    def _copy_new_sales(self, connection):
+        import pyarrow as pa
+        watermark = connection.execute("SELECT coalesce(max(sale_id), 0) FROM sales").fetchone()[0]
+        last_id = max(watermark - _LATE_COMMIT_OVERLAP, 0)
+        copied = 0
+        db = get_read_db()
+        try:
+            while True:
+                rows = db.query(*_SALE_COLUMNS).filter(
+                    Sale.sale_id > last_id
+                ).order_by(Sale.sale_id).limit(_COPY_BATCH_ROWS).all()
+                if not rows:
+                    return copied
+                batch = pa.Table.from_pylist([row._asdict() for row in rows], schema=_arrow_schema("sales"))
+                connection.register("incoming", batch)
+                try:
+                    copied += connection.execute(
+                        "INSERT INTO sales SELECT * FROM incoming "
+                        "WHERE sale_id NOT IN (SELECT sale_id FROM sales WHERE sale_id > ?)",
+                        [last_id]
+                    ).fetchone()[0]
+                finally:
+                    connection.unregister("incoming")
+                last_id = rows[-1].sale_id
+        finally:
+            db.close()
+
+    def _import_archived_months(self, connection):
+        """Copy in archive months the replica hasn't read yet, skipping sales it already has."""
+        imported = set(connection.execute("SELECT year, month FROM imported_archive_months").fetchall())
+        copied = 0
+        for year, month in archived_months():
+            if (year, month) in imported:
+                continue
+            start = datetime(year, month, 1)
+            end = start + relativedelta(months=1)
+            pattern = str(ARCHIVE_DIR / f"year={year:04d}" / f"month={month:02d}" / "*.parquet")
+            connection.execute("BEGIN")
+            try:
+                copied += connection.execute(
+                    "INSERT INTO sales SELECT sale_id, product_id, quantity, sale_date, sale_price, cost_price "
+                    "FROM read_parquet(?) WHERE sale_id NOT IN "
+                    "(SELECT sale_id FROM sales WHERE sale_date >= ? AND sale_date < ?)",
+                    [pattern, start, end]
+                ).fetchone()[0]
+                connection.execute("INSERT INTO imported_archive_months VALUES (?, ?)", [year, month])
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        return copied
+
+    def _reload_products(self, connection):
+        db = get_read_db()
+        try:
+            rows = db.query(*_PRODUCT_COLUMNS).order_by(Product.product_id).all()
+        finally:
+            db.close()
+        self._replace_rows(connection, "products", rows, "TRUE")
+
+    def _copy_changed_purchase_orders(self, connection):
+        """Copy orders above the ``order_id`` watermark and re-copy those open in the replica."""
+        from inventory.purchase_orders import OPEN_PURCHASE_ORDER_STATUSES
+        watermark = connection.execute("SELECT coalesce(max(order_id), 0) FROM purchase_orders").fetchone()[0]
+        placeholders = ", ".join("?" for _ in OPEN_PURCHASE_ORDER_STATUSES)
+        open_ids = [order_id for order_id, in connection.execute(
+            f"SELECT order_id FROM purchase_orders WHERE status IN ({placeholders})", OPEN_PURCHASE_ORDER_STATUSES
+        ).fetchall()]
+        changed = PurchaseOrder.order_id > max(watermark - _LATE_COMMIT_OVERLAP, 0)
+        if open_ids:
+            changed = changed | PurchaseOrder.order_id.in_(open_ids)
+        db = get_read_db()
+        try:
+            rows = db.query(*_PURCHASE_ORDER_COLUMNS).filter(changed).order_by(PurchaseOrder.order_id).all()
+        finally:
+            db.close()
+        self._replace_rows(connection, "purchase_orders", rows, "order_id IN (SELECT order_id FROM incoming)")
+
+    def _replace_rows(self, connection, table_name, rows, delete_where):
+        """Delete the rows matching ``delete_where`` and insert ``rows``, in one transaction."""
+        import pyarrow as pa
+        table = pa.Table.from_pylist([row._asdict() for row in rows], schema=_arrow_schema(table_name))
+        connection.register("incoming", table)
+        connection.execute("BEGIN")
+        try:
+            connection.execute(f"DELETE FROM {table_name} WHERE {delete_where}")
+            connection.execute(f"INSERT INTO {table_name} SELECT * FROM incoming")
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.unregister("incoming")
+
+    def _query(self, sql, params=()):
+        self._ensure_fresh()
+        # A cursor is a separate connection to the same database, so reports
+        # from several threads don't share one.
+        with self._lock:
+            cursor = self._connect().cursor()
+        try:
+            return cursor.execute(sql, list(params)).fetchall()
+        finally:
+            cursor.close()
+
+    def monthly_totals(self, start, end):
+        """``{(year, month): (revenue, profit, transactions)}`` for sales in ``[start, end)``."""
+        rows = self._query(
+            f"SELECT year(s.sale_date), month(s.sale_date), {_REVENUE_SQL}, {_PROFIT_SQL}, count(*) "
+            "FROM sales s WHERE s.sale_date >= ? AND s.sale_date < ? GROUP BY ALL",
+            [start, end]
+        )
+        return {(year, month): (revenue, profit, transactions) for year, month, revenue, profit, transactions in rows}
+
+    def top_products(self, start, end, limit):
+        """``(name, total_sold, product_profit)`` of the most profitable products in ``[start, end)``."""
+        return self._query(
+            f"SELECT p.name, sum(s.quantity), {_PROFIT_SQL} AS product_profit "
+            "FROM sales s JOIN products p USING (product_id) "
+            "WHERE s.sale_date >= ? AND s.sale_date < ? "
+            "GROUP BY p.name ORDER BY product_profit DESC LIMIT ?",
+            [start, end, limit]
+        )
+
+    def product_breakdown(self, start, end, product_id=None):
+        """``(name, quantity, revenue, profit)`` per product name for sales in ``[start, end]``."""
+        product_filter = " AND s.product_id = ?" if product_id else ""
+        return self._query(
+            f"SELECT p.name, sum(s.quantity), {_REVENUE_SQL}, {_PROFIT_SQL} "
+            "FROM sales s JOIN products p USING (product_id) "
+            f"WHERE s.sale_date >= ? AND s.sale_date <= ?{product_filter} GROUP BY p.name",
+            [start, end, product_id] if product_id else [start, end]
+        )
+
+    def bucket_stats(self, start, end, granularity):
+        """``(bucket, revenue, profit, transactions)`` per day, ISO week or month in ``[start, end)``."""
+        return self._query(
+            f"SELECT date_trunc('{granularity}', s.sale_date) AS bucket, {_REVENUE_SQL}, {_PROFIT_SQL}, count(*) "
+            "FROM sales s WHERE s.sale_date >= ? AND s.sale_date < ? GROUP BY bucket",
+            [start, end]
+        )
+
+    def product_bucket_values(self, start, end, granularity, metric):
+        """``(product_id, bucket, value)`` of a ``PRODUCT_TREND_METRICS`` metric in ``[start, end)``."""
+        return self._query(
+            f"SELECT s.product_id, date_trunc('{granularity}', s.sale_date) AS bucket, {_METRIC_SQL[metric]} "
+            "FROM sales s WHERE s.sale_date >= ? AND s.sale_date < ? GROUP BY s.product_id, bucket",
+            [start, end]
+        )
+
+    def purchase_order_status_counts(self):
+        return dict(self._query("SELECT status, count(*) FROM purchase_orders GROUP BY status"))
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def _arrow_schema(table_name):
+    import pyarrow as pa
+    money = pa.decimal128(18, 2)
+    return {
+        "sales": pa.schema([
+            ("sale_id", pa.int64()),
+            ("product_id", pa.int64()),
+            ("quantity", pa.int64()),
+            ("sale_date", pa.timestamp("us")),
+            ("sale_price", money),
+            ("cost_price", money),
+        ]),
+        "products": pa.schema([
+            ("product_id", pa.int64()),
+            ("name", pa.string()),
+            ("buying_price", money),
+            ("selling_price", money),
+            ("reorder_level", pa.int64()),
+        ]),
+        "purchase_orders": pa.schema([
+            ("order_id", pa.int64()),
+            ("product_id", pa.int64()),
+            ("quantity", pa.int64()),
+            ("order_date", pa.timestamp("us")),
+            ("expected_delivery", pa.timestamp("us")),
+            ("status", pa.string()),
+            ("cost_per_unit", money),
+            ("total_cost", money),
+        ]),
+    }[table_name]
+
+
+def analytics_replica_from_env():
+    """Return an ``AnalyticsReplica`` configured from the environment, or ``None`` when ``ANALYTICS_DUCKDB`` is off."""
+    if os.getenv("ANALYTICS_DUCKDB", "0").lower() not in ("1", "true", "yes"):
+        return None
+    return AnalyticsReplica(
+        path=os.getenv("ANALYTICS_DUCKDB_PATH") or DEFAULT_REPLICA_PATH,
+        refresh_interval=int(os.getenv("ANALYTICS_REFRESH_SECONDS", str(DEFAULT_REFRESH_INTERVAL))),
+    )
+
+
+_replica = None
+_replica_loaded = False
+_replica_lock = threading.Lock()
+
+
+def get_analytics_replica():
+    """Return the process-wide replica reports should read, or ``None`` to use the main database."""
+    global _replica, _replica_loaded
+    with _replica_lock:
+        if not _replica_loaded:
+            _replica = analytics_replica_from_env()
+            if _replica is not None:
+                add_write_listener(_replica.mark_stale)
+            _replica_loaded = True
+        return _replica
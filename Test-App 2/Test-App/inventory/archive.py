@@ -0,0 +1,223 @@
+"""Archival of old sales to compressed Parquet files.
+
+``archive_sales(before)`` moves every whole month of sales before ``before``
+out of the ``sales`` table into zstd-compressed Parquet files under
+``SALES_ARCHIVE_DIR/year=YYYY/month=MM/`` and adds the month's per-product
+totals to ``sales_monthly_rollups``, keeping the live table to recent months.
+Monthly reports add the rollups back in, and sales listings read the archive
+files when their date range reaches into archived months.
+
+Run it from cron with ``python -m inventory archive-sales --keep-months 24``.
+"""
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+from dateutil.relativedelta import relativedelta  # pyright: ignore[reportMissingImports]
+from sqlalchemy import func  # pyright: ignore[reportMissingImports]
+
+from database import Sale, SalesMonthlyRollup, get_db
+from inventory.events import after_write
+
+ARCHIVE_DIR = Path(os.getenv("SALES_ARCHIVE_DIR") or Path(__file__).resolve().parent.parent / "sales_archive")
+_PENDING_SUFFIX = ".pending"
+
+
+@dataclass(frozen=True)
+class ArchivedSale:
+    """A sale read back from the archive, with the same fields as ``Sale``."""
+    sale_id: int
+    product_id: int
+    quantity: int
+    sale_date: datetime
+    sale_price: Decimal
+    cost_price: Decimal
+    idempotency_key: str | None
+
+
+def _archive_schema():
+    import pyarrow as pa
+    money = pa.decimal128(18, 2)
+    return pa.schema([
+        ("sale_id", pa.int64()),
+        ("product_id", pa.int64()),
+        ("quantity", pa.int64()),
+        ("sale_date", pa.timestamp("us")),
+        ("sale_price", money),
+        ("cost_price", money),
+        ("idempotency_key", pa.string()),
+    ])
+
+
+def _month_dir(year, month):
+    return ARCHIVE_DIR / f"year={year:04d}" / f"month={month:02d}"
+
+
+def archived_months():
+    """Return the ``(year, month)`` pairs that have archived sales, oldest first."""
+    return sorted({
+        (int(path.parent.parent.name.removeprefix("year=")), int(path.parent.name.removeprefix("month=")))
+        for path in ARCHIVE_DIR.glob("year=*/month=*/*.parquet")
+    })
+
+
+def _archive_files(start_date, end_date):
+    """Archive files of the months overlapping ``start_date``..``end_date``."""
+    files = []
+    for year, month in archived_months():
+        month_start = datetime(year, month, 1)
+        if end_date and month_start > end_date:
+            continue
+        if start_date and month_start + relativedelta(months=1) <= start_date:
+            continue
+        files.extend(str(path) for path in _month_dir(year, month).glob("*.parquet"))
+    return files
+
+
+def read_archived_sales(start_date=None, end_date=None, product_id=None):
+    """Return archived sales with ``start_date <= sale_date <= end_date``, newest first.
+
+    Only the files of months overlapping the range are opened.
+    """
+    import pyarrow.parquet as pq
+    files = _archive_files(start_date, end_date)
+    if not files:
+        return []
+
+    filters = []
+    if start_date:
+        filters.append(("sale_date", ">=", start_date))
+    if end_date:
+        filters.append(("sale_date", "<=", end_date))
+    if product_id:
+        filters.append(("product_id", "=", product_id))
+    table = pq.read_table(files, schema=_archive_schema(), filters=filters or None)
+    table = table.sort_by([("sale_date", "descending")])
+    return [ArchivedSale(**row) for row in table.to_pylist()]
+
+
+def read_archived_sales_frame(start_date, end_date):
+    """Archived sales with ``start_date <= sale_date < end_date`` as a DataFrame.
+
+    Columns are ``product_id``, ``sale_date``, ``quantity`` and the float
+    ``revenue`` and ``profit`` of each sale, for aggregating in pandas.
+    """
+    import pandas as pd
+    import pyarrow.parquet as pq
+    columns = ["product_id", "sale_date", "quantity", "sale_price", "cost_price"]
+    files = _archive_files(start_date, end_date)
+    if not files:
+        return pd.DataFrame(columns=["product_id", "sale_date", "quantity", "revenue", "profit"])
+    df = pq.read_table(
+        files,
+        schema=_archive_schema(),
+        columns=columns,
+        filters=[("sale_date", ">=", start_date), ("sale_date", "<", end_date)]
+    ).to_pandas()
+    price, cost = df.pop("sale_price").astype(float), df.pop("cost_price").astype(float)
+    df["revenue"] = df["quantity"] * price
+    df["profit"] = df["quantity"] * (price - cost)
+    return df
+
+
+def _recover_pending_files(db):
+    """Finish or discard files left by an archive run that stopped part way.
+
+    Files are written under a pending name and renamed once their rows have
+    been deleted from ``sales``; if the rows are still there, that delete
+    never committed.
+    """
+    import pyarrow.parquet as pq
+    for path in ARCHIVE_DIR.glob(f"year=*/month=*/*{_PENDING_SUFFIX}"):
+        first_sale_id = pq.read_table(path, columns=["sale_id"])["sale_id"][0].as_py()
+        if db.query(Sale.sale_id).filter(Sale.sale_id == first_sale_id).first():
+            path.unlink()
+        else:
+            path.rename(path.with_suffix(""))
+
+
+def _archive_month(db, month_start):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    month_end = month_start + relativedelta(months=1)
+    in_month = (Sale.sale_date >= month_start, Sale.sale_date < month_end)
+    rows = db.query(
+        Sale.sale_id,
+        Sale.product_id,
+        Sale.quantity,
+        Sale.sale_date,
+        Sale.sale_price,
+        Sale.cost_price,
+        Sale.idempotency_key
+    ).filter(*in_month).order_by(Sale.sale_id).all()
+    if not rows:
+        return 0
+
+    directory = _month_dir(month_start.year, month_start.month)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"sales-{rows[0].sale_id}-{rows[-1].sale_id}.parquet"
+    pending = path.with_name(path.name + _PENDING_SUFFIX)
+    table = pa.Table.from_pylist([row._asdict() for row in rows], schema=_archive_schema())
+    pq.write_table(table, pending, compression="zstd")
+
+    try:
+        totals = {}
+        for row in rows:
+            units, revenue, profit, transactions = totals.get(row.product_id, (0, 0, 0, 0))
+            totals[row.product_id] = (
+                units + row.quantity,
+                revenue + row.quantity * row.sale_price,
+                profit + row.quantity * (row.sale_price - row.cost_price),
+                transactions + 1
+            )
+        for product_id, (units, revenue, profit, transactions) in totals.items():
+            key = (month_start.year, month_start.month, product_id)
+            rollup = db.get(SalesMonthlyRollup, key)
+            if rollup is None:
+                rollup = SalesMonthlyRollup(
+                    year=month_start.year, month=month_start.month, product_id=product_id,
+                    units=0, revenue=0, profit=0, transactions=0
+                )
+                db.add(rollup)
+            rollup.units += units
+            rollup.revenue += revenue
+            rollup.profit += profit
+            rollup.transactions += transactions
+
+        deleted = db.query(Sale).filter(*in_month, Sale.sale_id <= rows[-1].sale_id).delete(synchronize_session=False)
+        if deleted != len(rows):
+            raise RuntimeError(f"Sales for {month_start:%Y-%m} changed while archiving; nothing was archived")
+        db.commit()
+    except Exception:
+        db.rollback()
+        pending.unlink()
+        raise
+    pending.rename(path)
+    return len(rows)
+
+
+def archive_sales(before):
+    """Archive every whole month of sales before the month of ``before``.
+
+    Each month is written to its Parquet file, summarised in
+    ``sales_monthly_rollups`` and deleted from ``sales`` in its own
+    transaction. Returns the number of sales archived.
+    """
+    cutoff = datetime(before.year, before.month, 1)
+    archived = 0
+    db = get_db()
+    try:
+        _recover_pending_files(db)
+        first_sale = db.query(func.min(Sale.sale_date)).filter(Sale.sale_date < cutoff).scalar()
+        if first_sale is not None:
+            month_start = datetime(first_sale.year, first_sale.month, 1)
+            while month_start < cutoff:
+                archived += _archive_month(db, month_start)
+                month_start += relativedelta(months=1)
+    finally:
+        db.close()
+        if archived:
+            after_write("sales")
+    return archived
@@ -0,0 +1,28 @@
+"""Precomputed Financial Dashboard and trend aggregates."""
+from datetime import datetime
+
+from inventory.events import add_write_listener
+from inventory.products import get_inventory_totals
+from inventory.sales import get_monthly_stats, get_multi_month_stats, get_top_products
+from inventory.stock import ensure_recent_stock_snapshots
+from precompute import PrecomputeScheduler
+
+DASHBOARD_REFRESH_INTERVAL = 60
+TREND_PERIODS = {"3 Months": 3, "6 Months": 6, "12 Months": 12, "24 Months": 24}
+
+
+def create_dashboard_scheduler():
+    """Background worker keeping dashboard and trend aggregates precomputed and stock checkpoints current.
+
+    Every committed write asks it for a refresh. The caller starts it and
+    should create only one per process.
+    """
+    scheduler = PrecomputeScheduler(interval=DASHBOARD_REFRESH_INTERVAL)
+    scheduler.register("current_month_stats", lambda: get_monthly_stats(datetime.now().year, datetime.now().month))
+    scheduler.register("top_products", lambda: get_top_products(datetime.now().year, datetime.now().month))
+    scheduler.register("inventory_totals", get_inventory_totals)
+    scheduler.register("stock_snapshots", ensure_recent_stock_snapshots)
+    for months_back in TREND_PERIODS.values():
+        scheduler.register(f"trends_{months_back}", lambda months_back=months_back: get_multi_month_stats(months_back))
+    add_write_listener(lambda tags: scheduler.request_refresh())
+    return scheduler
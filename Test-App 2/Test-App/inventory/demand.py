@@ -0,0 +1,74 @@
+"""Stock-out prediction from incrementally refreshed demand forecasts."""
+import threading
+from datetime import datetime, timedelta
+
+from inventory.purchase_orders import get_next_deliveries
+from inventory.trends import get_product_sales_matrix
+
+FORECAST_HISTORY_DAYS = 90
+
+
+_forecaster = None
+_forecaster_lock = threading.Lock()
+
+
+def get_demand_forecaster():
+    """Return the process-wide forecaster, creating it on first use."""
+    global _forecaster
+    with _forecaster_lock:
+        if _forecaster is None:
+            from forecasting import DemandForecaster
+            _forecaster = DemandForecaster()
+        return _forecaster
+
+
+def refresh_demand_forecaster(forecaster, history_days=FORECAST_HISTORY_DAYS):
+    """Fold every completed day not yet seen by ``forecaster`` into its state.
+
+    The first call reads ``history_days`` of sales; later calls only read the
+    days completed since the previous refresh.
+    """
+    today = datetime.utcnow().date()
+    with forecaster.lock:
+        if forecaster.last_day is None:
+            first_day = today - timedelta(days=history_days)
+        else:
+            first_day = forecaster.last_day + timedelta(days=1)
+        if first_day >= today:
+            return forecaster
+        demand = get_product_sales_matrix(
+            datetime.combine(first_day, datetime.min.time()),
+            datetime.combine(today, datetime.min.time()),
+            "day",
+            "Units Sold"
+        )
+        forecaster.update(first_day, demand.index.to_numpy(), demand.to_numpy())
+    return forecaster
+
+
+def get_stockout_forecast(products, method="exponential"):
+    """Forecast daily demand and days to stock-out for ``products``.
+
+    Returns a DataFrame sorted by days to stock-out with a flag for products
+    expected to run out before their next scheduled delivery.
+    """
+    import pandas as pd
+    from forecasting import days_to_stockout
+    rates = refresh_demand_forecaster(get_demand_forecaster()).forecast(method)
+    deliveries = get_next_deliveries()
+
+    df = pd.DataFrame({
+        'product_id': [p.product_id for p in products],
+        'name': [p.name for p in products],
+        'current_stock': [p.current_stock for p in products]
+    })
+    df['daily_demand'] = df['product_id'].map(rates).fillna(0.0)
+    df['days_to_stockout'] = days_to_stockout(df['current_stock'], df['daily_demand'])
+    # Anything further out than ten years is as good as never.
+    horizon = df['days_to_stockout'].where(df['days_to_stockout'] <= 3650)
+    df['stockout_date'] = pd.Timestamp(datetime.utcnow()) + pd.to_timedelta(horizon, unit='D')
+    df['next_delivery'] = pd.to_datetime(df['product_id'].map(deliveries))
+    df['stockout_before_delivery'] = df['stockout_date'].notna() & (
+        df['next_delivery'].isna() | (df['stockout_date'] < df['next_delivery'])
+    )
+    return df.sort_values('days_to_stockout')
@@ -0,0 +1,39 @@
+"""Errors for requests the inventory service refuses.
+
+Messages are written to be shown to the user as-is. Database failures are
+not wrapped; they propagate unchanged after the transaction is rolled back.
+"""
+
+
+class InventoryError(Exception):
+    pass
+
+
+class ProductNotFoundError(InventoryError):
+    def __init__(self, product_id):
+        super().__init__("Product not found")
+        self.product_id = product_id
+
+
+class InsufficientStockError(InventoryError):
+    def __init__(self, product_id, available, requested):
+        super().__init__(f"Insufficient stock. Available: {available}")
+        self.product_id = product_id
+        self.available = available
+        self.requested = requested
+
+
+class PurchaseOrderNotOpenError(InventoryError):
+    def __init__(self, order_id):
+        super().__init__("Purchase order is not open for receiving")
+        self.order_id = order_id
+
+
+class InvalidQuantityError(InventoryError):
+    pass
+
+
+class IdempotencyKeyConflictError(InventoryError):
+    def __init__(self, idempotency_key):
+        super().__init__("Idempotency key was already used for a different sale")
+        self.idempotency_key = idempotency_key
@@ -0,0 +1,16 @@
+"""Post-commit write notifications."""
+from query_cache import query_cache
+
+_write_listeners = []
+
+
+def add_write_listener(listener):
+    """Call ``listener(tags)`` after every committed write to the tables in ``tags``."""
+    _write_listeners.append(listener)
+
+
+def after_write(*tags):
+    """Invalidate cached queries on the written tables and notify write listeners."""
+    query_cache.invalidate(*tags)
+    for listener in list(_write_listeners):
+        listener(tags)
@@ -0,0 +1,253 @@
+"""Product catalog: CRUD and ABC classification."""
+from datetime import datetime
+
+from dateutil.relativedelta import relativedelta  # pyright: ignore[reportMissingImports]
+from sqlalchemy import func, insert, select, type_coerce, union_all  # pyright: ignore[reportMissingImports]
+
+from database import Money, Product, ProductClassification, Sale, SalesMonthlyRollup, get_db, get_read_db, to_money
+from inventory.archive import read_archived_sales_frame
+from inventory.errors import ProductNotFoundError
+from inventory.events import after_write
+from inventory.sales import SALE_PROFIT, SALE_REVENUE
+from inventory.stock import record_stock_movements
+from query_cache import query_cache
+
+
+def add_product(name, buying_price, selling_price, stock, reorder_level=10, image_url=None):
+    """Create a product with its opening stock recorded in the ledger and return it."""
+    db = get_db()
+    try:
+        product = Product(
+            name=name,
+            buying_price=buying_price,
+            selling_price=selling_price,
+            current_stock=stock,
+            reorder_level=reorder_level,
+            image_url=image_url
+        )
+        db.add(product)
+        db.flush()
+        record_stock_movements(db, [(product.product_id, stock, "initial", None)])
+        db.commit()
+        db.refresh(product)
+        after_write("products", "stock")
+        return product
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@query_cache.cached(tags=("products", "stock"))
+def get_all_products():
+    db = get_read_db()
+    try:
+        products = db.query(Product).filter(Product.deleted_at.is_(None)).all()
+        return products
+    finally:
+        db.close()
+
+
+@query_cache.cached(tags=("products", "stock"))
+def get_product(product_id):
+    """Return the product with ``product_id``; raises ``ProductNotFoundError`` if there is none."""
+    db = get_read_db()
+    try:
+        product = db.query(Product).filter(Product.product_id == product_id, Product.deleted_at.is_(None)).first()
+        if product is None:
+            raise ProductNotFoundError(product_id)
+        return product
+    finally:
+        db.close()
+
+
+@query_cache.cached(tags=("products",))
+def get_product_names():
+    """Return ``{product_id: name}`` for the whole catalog, deleted products included so past sales keep their names."""
+    db = get_read_db()
+    try:
+        return dict(db.query(Product.product_id, Product.name).all())
+    finally:
+        db.close()
+
+
+def update_product(product_id, name, buying_price, selling_price, stock, reorder_level=10, image_url=None):
+    """Overwrite a product's fields; returns ``False`` if it doesn't exist."""
+    db = get_db()
+    try:
+        product = db.query(Product).filter(Product.product_id == product_id, Product.deleted_at.is_(None)).first()
+        if product:
+            record_stock_movements(db, [(product_id, stock - product.current_stock, "adjustment", None)])
+            product.name = name
+            product.buying_price = buying_price
+            product.selling_price = selling_price
+            product.current_stock = stock
+            product.reorder_level = reorder_level
+            product.image_url = image_url
+            db.commit()
+            after_write("products", "stock")
+            return True
+        return False
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def delete_product(product_id):
+    """Remove a product from the catalog; returns ``False`` if it doesn't exist.
+
+    The row is only marked deleted: its sales, purchase orders and stock
+    ledger stay, so reports and valuations of earlier dates are unchanged.
+    """
+    db = get_db()
+    try:
+        product = db.query(Product).filter(Product.product_id == product_id, Product.deleted_at.is_(None)).first()
+        if product:
+            product.deleted_at = datetime.utcnow()
+            db.query(ProductClassification).filter(ProductClassification.product_id == product_id).delete(synchronize_session=False)
+            db.commit()
+            after_write("products")
+            return True
+        return False
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@query_cache.cached(tags=("products", "stock"))
+def get_inventory_totals():
+    db = get_read_db()
+    try:
+        totals = db.query(
+            func.count(Product.product_id).label('product_count'),
+            func.sum(type_coerce(Product.buying_price * Product.current_stock, Money)).label('value_cost'),
+            func.sum(type_coerce(Product.selling_price * Product.current_stock, Money)).label('value_retail')
+        ).filter(Product.deleted_at.is_(None)).first()
+        return {
+            'product_count': totals.product_count or 0,
+            'value_cost': to_money(totals.value_cost or 0),
+            'value_retail': to_money(totals.value_retail or 0)
+        }
+    finally:
+        db.close()
+
+
+ABC_CLASS_THRESHOLDS = (0.80, 0.95)
+ABC_CLASSES = ["A", "B", "C"]
+
+
+def assign_abc_classes(values, thresholds=ABC_CLASS_THRESHOLDS):
+    """Pareto class per value: A until ``thresholds[0]`` of the total, B until ``thresholds[1]``, then C.
+
+    An item belongs to the class in which its cumulative share *starts*, so the
+    item that crosses a threshold stays in the higher class. Negative values
+    contribute nothing.
+    """
+    import numpy as np
+    values = np.clip(np.asarray(values, dtype=float), 0, None)
+    classes = np.full(len(values), "C", dtype=object)
+    total = values.sum()
+    if total <= 0:
+        return classes
+    order = np.argsort(-values, kind="stable")
+    share_before = (np.cumsum(values[order]) - values[order]) / total
+    classes[order] = np.select(
+        [share_before < thresholds[0], share_before < thresholds[1]],
+        ["A", "B"],
+        default="C"
+    )
+    classes[values == 0] = "C"
+    return classes
+
+
+def compute_abc_classification(start_date, end_date):
+    """Classify the whole catalog by revenue and profit contribution and store the result.
+
+    Totals come from one aggregate query over products left-joined to the
+    period's live sales and the rollups of its whole archived months;
+    archived sales in the partial months at either end of the period are
+    read from the archive files. Previous classifications are replaced in
+    the same transaction. Returns the number of products classified.
+    """
+    import pandas as pd
+    first_month, end_month = _whole_months(start_date, end_date)
+    db = get_db()
+    try:
+        month_index = SalesMonthlyRollup.year * 12 + SalesMonthlyRollup.month
+        period_sales = union_all(
+            select(Sale.product_id, SALE_REVENUE.label('revenue'), SALE_PROFIT.label('profit')).where(
+                Sale.sale_date >= start_date,
+                Sale.sale_date < end_date
+            ),
+            select(SalesMonthlyRollup.product_id, SalesMonthlyRollup.revenue, SalesMonthlyRollup.profit).where(
+                month_index >= first_month.year * 12 + first_month.month,
+                month_index < end_month.year * 12 + end_month.month
+            )
+        ).subquery()
+        product_totals = select(
+            period_sales.c.product_id,
+            func.sum(period_sales.c.revenue).label('revenue'),
+            func.sum(period_sales.c.profit).label('profit')
+        ).group_by(period_sales.c.product_id).subquery()
+
+        rows = db.query(
+            Product.product_id,
+            func.coalesce(product_totals.c.revenue, 0),
+            func.coalesce(product_totals.c.profit, 0)
+        ).outerjoin(
+            product_totals, product_totals.c.product_id == Product.product_id
+        ).filter(Product.deleted_at.is_(None)).all()
+
+        df = pd.DataFrame(rows, columns=['product_id', 'revenue', 'profit'])
+        df = df.astype({'revenue': float, 'profit': float})
+        head_end = min(first_month, end_date)
+        edges = pd.concat([
+            read_archived_sales_frame(start_date, head_end),
+            read_archived_sales_frame(max(end_month, head_end), end_date)
+        ])
+        if not edges.empty:
+            edge_totals = edges.groupby('product_id')[['revenue', 'profit']].sum()
+            df[['revenue', 'profit']] += edge_totals.reindex(df['product_id'], fill_value=0).to_numpy()
+        df['revenue_class'] = assign_abc_classes(df['revenue'].astype(float))
+        df['profit_class'] = assign_abc_classes(df['profit'].astype(float))
+        df['period_start'] = start_date
+        df['period_end'] = end_date
+        df['computed_at'] = datetime.utcnow()
+
+        db.query(ProductClassification).delete(synchronize_session=False)
+        if not df.empty:
+            db.execute(insert(ProductClassification), df.to_dict('records'))
+        db.commit()
+        after_write("products")
+        return len(df)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _whole_months(start_date, end_date):
+    """``(first, end)`` such that the months ``first <= month < end`` lie wholly in ``[start_date, end_date)``.
+
+    ``first >= end`` when the period covers no whole month.
+    """
+    first = datetime(start_date.year, start_date.month, 1)
+    if first < start_date:
+        first += relativedelta(months=1)
+    return first, datetime(end_date.year, end_date.month, 1)
+
+
+@query_cache.cached(tags=("products",))
+def get_abc_classification():
+    """Return ``{product_id: ProductClassification}`` from the last stored run."""
+    db = get_read_db()
+    try:
+        return {c.product_id: c for c in db.query(ProductClassification).all()}
+    finally:
+        db.close()
@@ -0,0 +1,267 @@
+"""Purchase orders: creation, (partial) receiving and cancellation."""
+from datetime import datetime
+
+from sqlalchemy import func, insert, update  # pyright: ignore[reportMissingImports]
+
+from database import Product, PurchaseOrder, PurchaseOrderReceipt, get_db, get_read_db, to_money
+from inventory.analytics import get_analytics_replica
+from inventory.errors import InvalidQuantityError, ProductNotFoundError, PurchaseOrderNotOpenError
+from inventory.events import after_write
+from inventory.stock import increment_stock, record_stock_movements
+from query_cache import query_cache
+
+OPEN_PURCHASE_ORDER_STATUSES = ["Pending", "Partially Received"]
+PURCHASE_ORDER_STATUSES = ["Pending", "Partially Received", "Received", "Cancelled"]
+
+
+def create_purchase_order(product_id, quantity, expected_delivery, cost_per_unit):
+    """Order ``quantity`` units of a product; raises ``ProductNotFoundError`` for unknown or deleted products."""
+    db = get_db()
+    try:
+        if not db.query(Product.product_id).filter(
+            Product.product_id == product_id, Product.deleted_at.is_(None)
+        ).first():
+            raise ProductNotFoundError(product_id)
+        cost_per_unit = to_money(cost_per_unit)
+        total_cost = quantity * cost_per_unit
+        order = PurchaseOrder(
+            product_id=product_id,
+            quantity=quantity,
+            expected_delivery=expected_delivery,
+            cost_per_unit=cost_per_unit,
+            total_cost=total_cost,
+            status="Pending"
+        )
+        db.add(order)
+        db.commit()
+        db.refresh(order)
+        after_write("purchase_orders")
+        return order
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _received_quantities(db, order_ids):
+    """Return ``{order_id: quantity received so far}`` for the given orders."""
+    if not order_ids:
+        return {}
+    return dict(
+        db.query(PurchaseOrderReceipt.order_id, func.sum(PurchaseOrderReceipt.quantity))
+        .filter(PurchaseOrderReceipt.order_id.in_(list(order_ids)))
+        .group_by(PurchaseOrderReceipt.order_id)
+        .all()
+    )
+
+
+def record_purchase_order_receipt(order_id, quantity):
+    """Record a (possibly partial) delivery against an open purchase order.
+
+    Inserts one receipt row, adds the quantity to stock and derives the order
+    status from the total received, all in one transaction.
+    """
+    db = get_db()
+    try:
+        order = (
+            db.query(PurchaseOrder)
+            .filter(PurchaseOrder.order_id == order_id)
+            .with_for_update()
+            .first()
+        )
+        if not order or order.status not in OPEN_PURCHASE_ORDER_STATUSES:
+            raise PurchaseOrderNotOpenError(order_id)
+
+        received = _received_quantities(db, [order_id]).get(order_id, 0)
+        outstanding = order.quantity - received
+        if quantity <= 0 or quantity > outstanding:
+            raise InvalidQuantityError(f"Receipt quantity must be between 1 and the outstanding {outstanding} units")
+
+        db.add(PurchaseOrderReceipt(order_id=order_id, quantity=quantity))
+        increment_stock(db, {order.product_id: quantity})
+        record_stock_movements(db, [(order.product_id, quantity, "purchase_receipt", order_id)])
+        order.status = "Received" if received + quantity >= order.quantity else "Partially Received"
+
+        db.commit()
+        after_write("purchase_orders", "stock")
+        return True
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def receive_purchase_orders(order_ids):
+    """Receive the outstanding quantity of every open order in ``order_ids`` in one transaction.
+
+    Orders are claimed with a single set-based UPDATE so concurrent callers can't
+    receive the same order twice; a receipt row is written per order and stock
+    increments are aggregated per product. Returns the number of orders received.
+    """
+    order_ids = list(order_ids)
+    if not order_ids:
+        return 0
+    db = get_db()
+    try:
+        claimed = db.execute(
+            update(PurchaseOrder)
+            .where(
+                PurchaseOrder.order_id.in_(order_ids),
+                PurchaseOrder.status.in_(OPEN_PURCHASE_ORDER_STATUSES)
+            )
+            .values(status="Received")
+            .returning(PurchaseOrder.order_id, PurchaseOrder.product_id, PurchaseOrder.quantity)
+        ).all()
+
+        received = _received_quantities(db, [order_id for order_id, _, _ in claimed])
+        receipts = []
+        movements = []
+        quantities = {}
+        for order_id, product_id, quantity in claimed:
+            outstanding = quantity - received.get(order_id, 0)
+            if outstanding <= 0:
+                continue
+            receipts.append({'order_id': order_id, 'quantity': outstanding, 'received_date': datetime.utcnow()})
+            movements.append((product_id, outstanding, "purchase_receipt", order_id))
+            quantities[product_id] = quantities.get(product_id, 0) + outstanding
+
+        if receipts:
+            db.execute(insert(PurchaseOrderReceipt), receipts)
+        increment_stock(db, quantities)
+        record_stock_movements(db, movements)
+
+        db.commit()
+        after_write("purchase_orders", "stock")
+        return len(claimed)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def receive_purchase_order(order_id):
+    return receive_purchase_orders([order_id]) == 1
+
+
+def cancel_purchase_orders(order_ids):
+    """Cancel every open order in ``order_ids`` in one transaction.
+
+    Stock already received against a partially received order is kept.
+    Returns the number of orders cancelled.
+    """
+    order_ids = list(order_ids)
+    if not order_ids:
+        return 0
+    db = get_db()
+    try:
+        result = db.execute(
+            update(PurchaseOrder)
+            .where(
+                PurchaseOrder.order_id.in_(order_ids),
+                PurchaseOrder.status.in_(OPEN_PURCHASE_ORDER_STATUSES)
+            )
+            .values(status="Cancelled")
+        )
+        db.commit()
+        after_write("purchase_orders")
+        return result.rowcount
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def cancel_purchase_order(order_id):
+    return cancel_purchase_orders([order_id]) == 1
+
+
+def get_all_purchase_orders():
+    db = get_read_db()
+    try:
+        orders = db.query(PurchaseOrder).order_by(PurchaseOrder.order_date.desc()).all()
+        return orders
+    finally:
+        db.close()
+
+
+@query_cache.cached(tags=("purchase_orders",))
+def get_purchase_order_status_counts():
+    replica = get_analytics_replica()
+    if replica is not None:
+        counts = replica.purchase_order_status_counts()
+        return {status: counts.get(status, 0) for status in PURCHASE_ORDER_STATUSES}
+
+    db = get_read_db()
+    try:
+        counts = dict(
+            db.query(PurchaseOrder.status, func.count(PurchaseOrder.order_id))
+            .group_by(PurchaseOrder.status)
+            .all()
+        )
+        return {status: counts.get(status, 0) for status in PURCHASE_ORDER_STATUSES}
+    finally:
+        db.close()
+
+
+@query_cache.cached(tags=("purchase_orders", "products"))
+def get_purchase_orders(status=None, start_date=None, end_date=None, product_id=None, limit=50, offset=0):
+    """Return one page of purchase orders with their product names, plus the total match count.
+
+    Filtering, ordering and pagination all happen in SQL; each row is an
+    ``(order, product_name, received_quantity)`` tuple.
+    """
+    db = get_read_db()
+    try:
+        received = (
+            db.query(
+                PurchaseOrderReceipt.order_id,
+                func.sum(PurchaseOrderReceipt.quantity).label('received_quantity')
+            )
+            .group_by(PurchaseOrderReceipt.order_id)
+            .subquery()
+        )
+        query = (
+            db.query(PurchaseOrder, Product.name, received.c.received_quantity)
+            .outerjoin(Product, Product.product_id == PurchaseOrder.product_id)
+            .outerjoin(received, received.c.order_id == PurchaseOrder.order_id)
+        )
+
+        if status:
+            query = query.filter(PurchaseOrder.status == status)
+        if start_date:
+            query = query.filter(PurchaseOrder.order_date >= start_date)
+        if end_date:
+            end_datetime = datetime.combine(end_date, datetime.max.time())
+            query = query.filter(PurchaseOrder.order_date <= end_datetime)
+        if product_id:
+            query = query.filter(PurchaseOrder.product_id == product_id)
+
+        total = query.order_by(None).count()
+        rows = (
+            query.order_by(PurchaseOrder.order_date.desc(), PurchaseOrder.order_id.desc())
+            .limit(limit)
+            .offset(offset)
+            .all()
+        )
+        return [(order, name or "Unknown", received_quantity or 0) for order, name, received_quantity in rows], total
+    finally:
+        db.close()
+
+
+@query_cache.cached(tags=("purchase_orders",))
+def get_next_deliveries():
+    """Return ``{product_id: earliest expected delivery}`` over open purchase orders."""
+    db = get_read_db()
+    try:
+        return dict(
+            db.query(PurchaseOrder.product_id, func.min(PurchaseOrder.expected_delivery))
+            .filter(PurchaseOrder.status.in_(OPEN_PURCHASE_ORDER_STATUSES))
+            .group_by(PurchaseOrder.product_id)
+            .all()
+        )
+    finally:
+        db.close()
@@ -0,0 +1,215 @@
+"""Write-behind sale ingestion with group commit.
+
+``SaleBuffer.submit`` queues a sale and returns a future; a background writer
+records everything queued within ``flush_interval`` seconds (or as soon as
+``max_rows`` are waiting) with one ``record_sales`` call, so a burst of sales
+shares a single commit instead of paying one each. A future resolves to the
+sale id once its group has committed, or to the error that refused it.
+
+Queued sales are appended to a journal segment and flushed to the operating
+system before ``submit`` returns, so they survive the process dying. Each
+time the writer takes the queue it starts a new segment and deletes the old
+one once its sales are committed or refused, so after a crash ``start``
+replays only sales that never reached the database. Every buffered sale
+carries an idempotency key (generated when the caller gives none), which
+makes replaying a segment whose commit did land a no-op.
+
+A running buffer holds an exclusive lock on its journal directory, so each
+process needs its own directory; a second buffer on the same one refuses to
+start instead of replaying and deleting segments that are still in use.
+"""
+import fcntl
+import json
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import Future
+from pathlib import Path
+
+from inventory.errors import InvalidQuantityError, InventoryError
+from inventory.sales import record_sale, record_sales
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_DIR = Path(__file__).resolve().parent.parent / "sale_journal"
+
+
+class SaleBuffer:
+    def __init__(self, journal_dir=DEFAULT_JOURNAL_DIR, flush_interval=0.02, max_rows=500):
+        self.journal_dir = Path(journal_dir)
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self._pending = []
+        self._segment = None
+        self._journal = None
+        self._next_segment = 0
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._thread = None
+        self._lock_file = None
+
+    def start(self):
+        """Replay sales left in the journal by a previous process, then start the writer.
+
+        Raises ``RuntimeError`` if another buffer is using the journal directory.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self._lock_journal_dir()
+        segments = sorted(self.journal_dir.glob("*.jsonl"))
+        try:
+            for segment in segments:
+                self._replay(segment)
+        except Exception:
+            self._unlock_journal_dir()
+            raise
+        self._next_segment = int(segments[-1].stem) + 1 if segments else 0
+        self._open_segment()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="sale-buffer-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Commit everything still queued and stop the writer."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread:
+            self._thread.join()
+        if self._journal:
+            self._journal.close()
+            self._segment.unlink(missing_ok=True)
+            self._journal = None
+        self._unlock_journal_dir()
+
+    def _lock_journal_dir(self):
+        if self._lock_file:
+            return
+        lock_file = open(self.journal_dir / "journal.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise RuntimeError(
+                f"Sale journal {self.journal_dir} is in use by another sale buffer; "
+                "give each process its own SALE_BUFFER_JOURNAL_DIR"
+            ) from None
+        self._lock_file = lock_file
+
+    def _unlock_journal_dir(self):
+        if self._lock_file:
+            # Closing the file releases the lock.
+            self._lock_file.close()
+            self._lock_file = None
+
+    def submit(self, product_id, quantity, idempotency_key=None):
+        """Queue a sale and return a ``Future`` resolving to its sale id once committed."""
+        if quantity <= 0:
+            raise InvalidQuantityError("Sale quantity must be at least 1")
+        item = (product_id, quantity, idempotency_key or uuid.uuid4().hex)
+        future = Future()
+        with self._condition:
+            if self._stopping or self._journal is None:
+                raise RuntimeError("Sale buffer is not running")
+            self._journal.write(json.dumps(item) + "\n")
+            self._journal.flush()
+            self._pending.append((item, future))
+            if len(self._pending) == 1 or len(self._pending) >= self.max_rows:
+                self._condition.notify()
+        return future
+
+    def _open_segment(self):
+        self._segment = self.journal_dir / f"{self._next_segment:012d}.jsonl"
+        self._next_segment += 1
+        self._journal = open(self._segment, "a", encoding="utf-8")
+
+    def _replay(self, segment):
+        items = []
+        with open(segment, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    product_id, quantity, key = json.loads(line)
+                except ValueError:
+                    # A line torn by the crash was never acknowledged as queued.
+                    continue
+                items.append(((product_id, quantity, key), Future()))
+        for start in range(0, len(items), self.max_rows):
+            self._commit(items[start:start + self.max_rows])
+        for item, future in items:
+            if future.exception():
+                logger.error("Replaying journaled sale %s failed: %s", item, future.exception())
+        logger.info("Replayed %d journaled sales from %s", len(items), segment.name)
+        segment.unlink(missing_ok=True)
+
+    def _run(self):
+        batch = []
+        try:
+            while True:
+                with self._condition:
+                    if not self._pending and not self._stopping:
+                        self._condition.wait()
+                    if self._pending and len(self._pending) < self.max_rows and not self._stopping:
+                        # Give concurrent submitters a moment to join this group.
+                        self._condition.wait(self.flush_interval)
+                    batch, self._pending = self._pending, []
+                    segment, journal = self._segment, self._journal
+                    if batch and not self._stopping:
+                        self._open_segment()
+                    else:
+                        segment = journal = None
+                    stopping = self._stopping
+
+                for start in range(0, len(batch), self.max_rows):
+                    self._commit(batch[start:start + self.max_rows])
+                if journal:
+                    journal.close()
+                    segment.unlink(missing_ok=True)
+                if stopping and not batch:
+                    return
+        except Exception as e:
+            # Nothing would resolve the waiting futures once the writer is gone;
+            # fail them and refuse new sales. Their journal segments are kept,
+            # so the next start replays whichever of them never committed.
+            logger.exception("Sale buffer writer stopped")
+            with self._condition:
+                self._stopping = True
+                failed, self._pending = batch + self._pending, []
+                if self._journal:
+                    self._journal.close()
+                    self._journal = None
+            for _, future in failed:
+                if not future.done():
+                    future.set_exception(e)
+
+    def _commit(self, batch):
+        try:
+            sale_ids = record_sales([item for item, _ in batch])
+        except InventoryError:
+            # One refused sale fails the whole group; record the sales one by
+            # one so only the refused ones fail.
+            for item, future in batch:
+                try:
+                    future.set_result(record_sale(*item).sale_id)
+                except Exception as e:
+                    future.set_exception(e)
+            return
+        except Exception as e:
+            logger.exception("Committing %d buffered sales failed", len(batch))
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), sale_id in zip(batch, sale_ids):
+            future.set_result(sale_id)
+
+
+def sale_buffer_from_env():
+    """Return a ``SaleBuffer`` configured from the environment, or ``None`` when ``SALE_BUFFER`` is off."""
+    if os.getenv("SALE_BUFFER", "0").lower() not in ("1", "true", "yes"):
+        return None
+    return SaleBuffer(
+        journal_dir=os.getenv("SALE_BUFFER_JOURNAL_DIR") or DEFAULT_JOURNAL_DIR,
+        flush_interval=int(os.getenv("SALE_BUFFER_FLUSH_MS", "20")) / 1000,
+        max_rows=int(os.getenv("SALE_BUFFER_MAX_ROWS", "500")),
+    )
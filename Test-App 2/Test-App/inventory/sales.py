@@ -0,0 +1,459 @@
+"""Sales recording and sales reports."""
+from datetime import datetime, timedelta
+
+from dateutil.relativedelta import relativedelta  # pyright: ignore[reportMissingImports]
+from sqlalchemy import case, func, insert, select, type_coerce, union_all, update  # pyright: ignore[reportMissingImports]
+from sqlalchemy.exc import IntegrityError  # pyright: ignore[reportMissingImports]
+
+from database import Money, Product, Sale, SalesMonthlyRollup, get_db, get_read_db, to_money
+from inventory.analytics import get_analytics_replica
+from inventory.archive import read_archived_sales
+from inventory.errors import (
+    IdempotencyKeyConflictError,
+    InsufficientStockError,
+    InvalidQuantityError,
+    ProductNotFoundError,
+)
+from inventory.events import after_write
+from inventory.stock import record_stock_movements
+from query_cache import query_cache
+
+# Amount of each sale in rupees. Prices are integer paise in SQL, so SUMs of
+# these are exact.
+SALE_REVENUE = type_coerce(Sale.quantity * Sale.sale_price, Money)
+SALE_PROFIT = type_coerce(Sale.quantity * (Sale.sale_price - Sale.cost_price), Money)
+
+
+def month_bounds(year: int, month: int):
+    """Return the inclusive start and exclusive end datetime for a calendar month."""
+    start = datetime(year, month, 1)
+    end = start + relativedelta(months=1)
+    return start, end
+
+
+def _sales_by_idempotency_key(db, keys):
+    """Return ``{idempotency_key: (sale_id, product_id, quantity)}`` for already recorded keys."""
+    if not keys:
+        return {}
+    return {
+        key: (sale_id, product_id, quantity)
+        for key, sale_id, product_id, quantity in db.query(
+            Sale.idempotency_key, Sale.sale_id, Sale.product_id, Sale.quantity
+        ).filter(Sale.idempotency_key.in_(list(keys)))
+    }
+
+
+def _check_replay(key, recorded, product_id, quantity):
+    """Raise unless a retried request with ``key`` asks for the same sale that was recorded."""
+    _, recorded_product_id, recorded_quantity = recorded
+    if (recorded_product_id, recorded_quantity) != (product_id, quantity):
+        raise IdempotencyKeyConflictError(key)
+
+
+def record_sale(product_id, quantity, idempotency_key=None):
+    """Sell ``quantity`` units at the product's current prices and return the ``Sale``.
+
+    Raises ``InvalidQuantityError``, ``ProductNotFoundError`` or
+    ``InsufficientStockError`` without changing anything. Stock is checked and
+    decremented in one conditional UPDATE, so concurrent sales can't oversell.
+    With an ``idempotency_key`` a retry of a sale that was already recorded
+    returns the original ``Sale`` without touching stock; reusing the key for
+    a different sale raises ``IdempotencyKeyConflictError``.
+    """
+    if quantity <= 0:
+        raise InvalidQuantityError("Sale quantity must be at least 1")
+    db = get_db()
+    try:
+        if idempotency_key is not None:
+            recorded = _sales_by_idempotency_key(db, [idempotency_key]).get(idempotency_key)
+            if recorded:
+                _check_replay(idempotency_key, recorded, product_id, quantity)
+                return db.get(Sale, recorded[0])
+
+        product = db.query(Product).filter(Product.product_id == product_id, Product.deleted_at.is_(None)).first()
+        if not product:
+            raise ProductNotFoundError(product_id)
+
+        decremented = db.execute(
+            update(Product)
+            .where(Product.product_id == product_id, Product.current_stock >= quantity)
+            .values(current_stock=Product.current_stock - quantity)
+        ).rowcount
+        if not decremented:
+            db.rollback()
+            available = db.query(Product.current_stock).filter(Product.product_id == product_id).scalar()
+            raise InsufficientStockError(product_id, available or 0, quantity)
+
+        sale = Sale(
+            product_id=product_id,
+            quantity=quantity,
+            sale_price=product.selling_price,
+            cost_price=product.buying_price,
+            idempotency_key=idempotency_key
+        )
+        db.add(sale)
+        db.flush()
+        record_stock_movements(db, [(product_id, -quantity, "sale", sale.sale_id)])
+        db.commit()
+        db.refresh(sale)
+        after_write("sales", "stock")
+        return sale
+    except IntegrityError:
+        db.rollback()
+        if idempotency_key is None:
+            raise
+        # A concurrent retry with the same key won the race; return its sale.
+        recorded = _sales_by_idempotency_key(db, [idempotency_key]).get(idempotency_key)
+        if recorded is None:
+            raise
+        _check_replay(idempotency_key, recorded, product_id, quantity)
+        return db.get(Sale, recorded[0])
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def record_sales(items):
+    """Record a batch of ``(product_id, quantity)`` or ``(product_id, quantity, idempotency_key)`` sales.
+
+    Stock is checked and decremented for all products with a single
+    conditional UPDATE and the sales are bulk-inserted in one transaction, so
+    the cost per sale stays flat as batches grow. The batch is all-or-nothing:
+    any unknown product, non-positive quantity or shortfall raises and records
+    nothing. Items whose idempotency key was already recorded are not
+    recorded again, so a client can resend a whole batch after a timeout.
+    Returns the sale ids in the order of ``items``.
+    """
+    items = [
+        (int(item[0]), int(item[1]), item[2] if len(item) > 2 else None)
+        for item in items
+    ]
+    if not items:
+        return []
+    for _, quantity, _ in items:
+        if quantity <= 0:
+            raise InvalidQuantityError("Sale quantity must be at least 1")
+
+    try:
+        return _record_sales_once(items)
+    except IntegrityError:
+        # Another request recorded some of these keys meanwhile; they are
+        # now seen as replays.
+        return _record_sales_once(items)
+
+
+def _record_sales_once(items):
+    db = get_db()
+    try:
+        recorded = _sales_by_idempotency_key(db, {key for _, _, key in items if key is not None})
+        new_items = []
+        for product_id, quantity, key in items:
+            if key is None:
+                new_items.append((product_id, quantity, key))
+            elif key in recorded:
+                _check_replay(key, recorded[key], product_id, quantity)
+            else:
+                # Mark the key as taken so a repeat inside this batch is a replay too.
+                recorded[key] = (None, product_id, quantity)
+                new_items.append((product_id, quantity, key))
+
+        quantities = {}
+        for product_id, quantity, _ in new_items:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+        new_ids = []
+        if new_items:
+            prices = {
+                product_id: (selling_price, buying_price)
+                for product_id, selling_price, buying_price in db.query(
+                    Product.product_id, Product.selling_price, Product.buying_price
+                ).filter(Product.product_id.in_(list(quantities)), Product.deleted_at.is_(None))
+            }
+            for product_id in quantities:
+                if product_id not in prices:
+                    raise ProductNotFoundError(product_id)
+
+            requested = case(quantities, value=Product.product_id, else_=0)
+            decremented = db.execute(
+                update(Product)
+                .where(Product.product_id.in_(list(quantities)), Product.current_stock >= requested)
+                .values(current_stock=Product.current_stock - requested)
+            ).rowcount
+            if decremented != len(quantities):
+                db.rollback()
+                available = dict(
+                    db.query(Product.product_id, Product.current_stock)
+                    .filter(Product.product_id.in_(list(quantities)))
+                    .all()
+                )
+                product_id = next(p for p, quantity in quantities.items() if available.get(p, 0) < quantity)
+                raise InsufficientStockError(product_id, available.get(product_id, 0), quantities[product_id])
+
+            sale_date = datetime.utcnow()
+            new_ids = db.execute(
+                insert(Sale).returning(Sale.sale_id, sort_by_parameter_order=True),
+                [
+                    {
+                        'product_id': product_id,
+                        'quantity': quantity,
+                        'sale_date': sale_date,
+                        'sale_price': prices[product_id][0],
+                        'cost_price': prices[product_id][1],
+                        'idempotency_key': key
+                    }
+                    for product_id, quantity, key in new_items
+                ]
+            ).scalars().all()
+            record_stock_movements(db, [
+                (product_id, -quantity, "sale", sale_id)
+                for (product_id, quantity, _), sale_id in zip(new_items, new_ids)
+            ])
+            db.commit()
+            after_write("sales", "stock")
+
+        new_ids = iter(new_ids)
+        sale_ids = []
+        for product_id, quantity, key in items:
+            if key is not None and recorded[key][0] is not None:
+                sale_ids.append(recorded[key][0])
+                continue
+            sale_id = next(new_ids)
+            if key is not None:
+                recorded[key] = (sale_id, product_id, quantity)
+            sale_ids.append(sale_id)
+        return sale_ids
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def get_monthly_sales(year, month):
+    """Sales of a month, including archived ones (as ``ArchivedSale``)."""
+    db = get_read_db()
+    try:
+        start, end = month_bounds(year, month)
+        sales = db.query(Sale).filter(
+            Sale.sale_date >= start,
+            Sale.sale_date < end
+        ).all()
+    finally:
+        db.close()
+    return sales + read_archived_sales(start, end - timedelta(microseconds=1))
+
+
+def _archived_month_totals(db, year, month):
+    """Revenue, profit and transaction count of a month's sales moved to the archive."""
+    return db.query(
+        func.coalesce(func.sum(SalesMonthlyRollup.revenue), 0),
+        func.coalesce(func.sum(SalesMonthlyRollup.profit), 0),
+        func.coalesce(func.sum(SalesMonthlyRollup.transactions), 0)
+    ).filter(
+        SalesMonthlyRollup.year == year,
+        SalesMonthlyRollup.month == month
+    ).one()
+
+
+@query_cache.cached(tags=("sales",))
+def get_monthly_stats(year, month):
+    start, end = month_bounds(year, month)
+    replica = get_analytics_replica()
+    if replica is not None:
+        revenue, profit, transactions = replica.monthly_totals(start, end).get((year, month), (0, 0, 0))
+        return {
+            'total_revenue': to_money(revenue),
+            'total_profit': to_money(profit),
+            'total_transactions': transactions
+        }
+
+    db = get_read_db()
+    try:
+        stats = db.query(
+            func.sum(SALE_REVENUE).label('total_revenue'),
+            func.sum(SALE_PROFIT).label('total_profit'),
+            func.count(Sale.sale_id).label('total_transactions')
+        ).filter(
+            Sale.sale_date >= start,
+            Sale.sale_date < end
+        ).first()
+        archived_revenue, archived_profit, archived_transactions = _archived_month_totals(db, year, month)
+
+        return {
+            'total_revenue': to_money(stats.total_revenue or 0) + archived_revenue,
+            'total_profit': to_money(stats.total_profit or 0) + archived_profit,
+            'total_transactions': (stats.total_transactions or 0) + archived_transactions
+        }
+    finally:
+        db.close()
+
+
+def _monthly_totals(db, start, end):
+    """``{(year, month): (revenue, profit, transactions)}`` for live and archived sales in ``[start, end)``.
+
+    ``start`` and ``end`` must be month starts. One GROUP BY over the sales
+    table and one over the archive rollups, however many months are asked for.
+    """
+    year = func.extract('year', Sale.sale_date)
+    month = func.extract('month', Sale.sale_date)
+    live = db.query(
+        year, month, func.sum(SALE_REVENUE), func.sum(SALE_PROFIT), func.count(Sale.sale_id)
+    ).filter(
+        Sale.sale_date >= start,
+        Sale.sale_date < end
+    ).group_by(year, month).all()
+
+    month_index = SalesMonthlyRollup.year * 12 + SalesMonthlyRollup.month
+    archived = db.query(
+        SalesMonthlyRollup.year,
+        SalesMonthlyRollup.month,
+        func.sum(SalesMonthlyRollup.revenue),
+        func.sum(SalesMonthlyRollup.profit),
+        func.sum(SalesMonthlyRollup.transactions)
+    ).filter(
+        month_index >= start.year * 12 + start.month,
+        month_index < end.year * 12 + end.month
+    ).group_by(SalesMonthlyRollup.year, SalesMonthlyRollup.month).all()
+
+    totals = {}
+    for row_year, row_month, revenue, profit, transactions in live + archived:
+        key = (int(row_year), int(row_month))
+        previous_revenue, previous_profit, previous_transactions = totals.get(key, (0, 0, 0))
+        totals[key] = (
+            previous_revenue + to_money(revenue or 0),
+            previous_profit + to_money(profit or 0),
+            previous_transactions + int(transactions or 0)
+        )
+    return totals
+
+
+@query_cache.cached(tags=("sales",))
+def get_multi_month_stats(months_back=6):
+    end_date = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    start_date = end_date - relativedelta(months=months_back - 1)
+    range_end = end_date + relativedelta(months=1)
+    replica = get_analytics_replica()
+    if replica is not None:
+        totals = replica.monthly_totals(start_date, range_end)
+    else:
+        db = get_read_db()
+        try:
+            totals = _monthly_totals(db, start_date, range_end)
+        finally:
+            db.close()
+
+    monthly_data = []
+    for offset in range(months_back):
+        month_start = start_date + relativedelta(months=offset)
+        revenue, profit, transactions = totals.get((month_start.year, month_start.month), (0, 0, 0))
+        monthly_data.append({
+            'year': month_start.year,
+            'month': month_start.month,
+            'month_name': month_start.strftime('%b %Y'),
+            'revenue': float(revenue),
+            'profit': float(profit),
+            'transactions': int(transactions)
+        })
+    return monthly_data
+
+
+@query_cache.cached(tags=("sales", "products"))
+def get_top_products(year, month, limit=5):
+    month_start, month_end = month_bounds(year, month)
+    replica = get_analytics_replica()
+    if replica is not None:
+        return [
+            (name, total_sold, to_money(product_profit))
+            for name, total_sold, product_profit in replica.top_products(month_start, month_end, limit)
+        ]
+
+    db = get_read_db()
+    try:
+        # Live sales plus the per-product rollups of the month, if archived.
+        month_sales = union_all(
+            select(Sale.product_id, Sale.quantity.label('units'), SALE_PROFIT.label('profit')).where(
+                Sale.sale_date >= month_start,
+                Sale.sale_date < month_end
+            ),
+            select(SalesMonthlyRollup.product_id, SalesMonthlyRollup.units, SalesMonthlyRollup.profit).where(
+                SalesMonthlyRollup.year == year,
+                SalesMonthlyRollup.month == month
+            )
+        ).subquery()
+        product_profit = func.sum(month_sales.c.profit)
+        return [tuple(row) for row in db.query(
+            Product.name,
+            func.sum(month_sales.c.units).label('total_sold'),
+            product_profit.label('product_profit')
+        ).join(
+            month_sales, month_sales.c.product_id == Product.product_id
+        ).group_by(Product.name).order_by(product_profit.desc()).limit(limit).all()]
+    finally:
+        db.close()
+
+
+def get_filtered_sales(start_date=None, end_date=None, product_id=None):
+    """Sales in the date range, newest first, including archived ones (as ``ArchivedSale``)."""
+    db = get_read_db()
+    try:
+        query = db.query(Sale)
+        end_datetime = datetime.combine(end_date, datetime.max.time()) if end_date else None
+        
+        if start_date:
+            query = query.filter(Sale.sale_date >= start_date)
+        if end_datetime:
+            query = query.filter(Sale.sale_date <= end_datetime)
+        if product_id:
+            query = query.filter(Sale.product_id == product_id)
+        
+        sales = query.order_by(Sale.sale_date.desc()).all()
+    finally:
+        db.close()
+    # Archived months all precede the sales still in the table.
+    return sales + read_archived_sales(start_date, end_datetime, product_id)
+
+
+def get_product_sales_breakdown(start_date, end_date, product_id=None):
+    """Units, revenue and profit per product name for sales between two dates (inclusive)."""
+    start = datetime.combine(start_date, datetime.min.time())
+    end = datetime.combine(end_date, datetime.max.time())
+    replica = get_analytics_replica()
+    if replica is not None:
+        return [
+            (name, quantity, to_money(revenue), to_money(profit))
+            for name, quantity, revenue, profit in replica.product_breakdown(start, end, product_id)
+        ]
+
+    db = get_read_db()
+    try:
+        query = db.query(
+            Product.name,
+            func.sum(Sale.quantity).label('total_quantity'),
+            func.sum(SALE_REVENUE).label('total_revenue'),
+            func.sum(SALE_PROFIT).label('total_profit')
+        ).join(Sale).filter(
+            Sale.sale_date >= start,
+            Sale.sale_date <= end
+        )
+        if product_id:
+            query = query.filter(Sale.product_id == product_id)
+        breakdown = {name: (quantity, revenue, profit) for name, quantity, revenue, profit in query.group_by(Product.name)}
+
+        archived = read_archived_sales(start, end, product_id)
+        if archived:
+            names = dict(db.query(Product.product_id, Product.name))
+            for sale in archived:
+                name = names.get(sale.product_id)
+                if name is None:
+                    continue
+                quantity, revenue, profit = breakdown.get(name, (0, 0, 0))
+                breakdown[name] = (
+                    quantity + sale.quantity,
+                    revenue + sale.quantity * sale.sale_price,
+                    profit + sale.quantity * (sale.sale_price - sale.cost_price)
+                )
+        return [(name, *totals) for name, totals in breakdown.items()]
+    finally:
+        db.close()
@@ -0,0 +1,183 @@
+"""Stock ledger: movements, periodic checkpoints and point-in-time stock levels."""
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, insert, literal, type_coerce, update  # pyright: ignore[reportMissingImports]
+
+from database import Money, Product, StockMovement, StockSnapshot, get_db, get_read_db
+from query_cache import query_cache
+
+STOCK_SNAPSHOT_INTERVAL = timedelta(days=1)
+
+
+def record_stock_movements(db, movements):
+    """Append rows to the stock movement ledger.
+
+    ``movements`` is a list of ``(product_id, quantity_change, movement_type, reference_id)``
+    tuples; zero changes are skipped.
+    """
+    rows = [
+        {
+            'product_id': product_id,
+            'quantity_change': quantity_change,
+            'movement_type': movement_type,
+            'reference_id': reference_id,
+            'movement_date': datetime.utcnow()
+        }
+        for product_id, quantity_change, movement_type, reference_id in movements
+        if quantity_change
+    ]
+    if rows:
+        db.execute(insert(StockMovement), rows)
+
+
+def increment_stock(db, quantities):
+    """Add per-product quantities to current stock with a single UPDATE statement."""
+    if not quantities:
+        return
+    db.execute(
+        update(Product)
+        .where(Product.product_id.in_(list(quantities)))
+        .values(current_stock=Product.current_stock + case(quantities, value=Product.product_id, else_=0))
+    )
+
+
+def create_stock_snapshots():
+    """Checkpoint the current stock level of every product."""
+    db = get_db()
+    try:
+        snapshot_date = datetime.utcnow()
+        db.execute(
+            insert(StockSnapshot).from_select(
+                ['product_id', 'snapshot_date', 'stock_level'],
+                db.query(Product.product_id, literal(snapshot_date), Product.current_stock)
+                .filter(Product.deleted_at.is_(None))
+            )
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def ensure_recent_stock_snapshots(interval=STOCK_SNAPSHOT_INTERVAL):
+    """Create a checkpoint if the latest one is older than ``interval`` (or none exists)."""
+    db = get_db()
+    try:
+        latest = db.query(func.max(StockSnapshot.snapshot_date)).scalar()
+    finally:
+        db.close()
+    if latest is None or datetime.utcnow() - latest >= interval:
+        create_stock_snapshots()
+        return True
+    return False
+
+
+def _on_hand_as_of(db, as_of, product_ids=None):
+    """Subquery of ``(product_id, on_hand)`` at ``as_of`` for every product.
+
+    A product with a checkpoint at or before ``as_of`` starts from the latest
+    one and adds the movements recorded after it up to ``as_of``. A product
+    without one (created since, or stocked before the ledger existed) is
+    rolled back from its current stock by the movements after ``as_of``.
+    """
+    latest_snapshot = db.query(
+        StockSnapshot.product_id,
+        func.max(StockSnapshot.snapshot_date).label('snapshot_date')
+    ).filter(StockSnapshot.snapshot_date <= as_of)
+    if product_ids is not None:
+        latest_snapshot = latest_snapshot.filter(StockSnapshot.product_id.in_(list(product_ids)))
+    latest_snapshot = latest_snapshot.group_by(StockSnapshot.product_id).subquery()
+
+    checkpoints = db.query(
+        StockSnapshot.product_id,
+        StockSnapshot.snapshot_date,
+        StockSnapshot.stock_level
+    ).join(
+        latest_snapshot,
+        (StockSnapshot.product_id == latest_snapshot.c.product_id)
+        & (StockSnapshot.snapshot_date == latest_snapshot.c.snapshot_date)
+    ).subquery()
+
+    movements = db.query(
+        StockMovement.product_id,
+        func.sum(case((StockMovement.movement_date <= as_of, StockMovement.quantity_change), else_=0)).label('until'),
+        func.sum(case((StockMovement.movement_date > as_of, StockMovement.quantity_change), else_=0)).label('after')
+    ).outerjoin(
+        checkpoints, checkpoints.c.product_id == StockMovement.product_id
+    ).filter(
+        (checkpoints.c.snapshot_date.is_(None)) | (StockMovement.movement_date > checkpoints.c.snapshot_date)
+    )
+    if product_ids is not None:
+        movements = movements.filter(StockMovement.product_id.in_(list(product_ids)))
+    movements = movements.group_by(StockMovement.product_id).subquery()
+
+    on_hand = case(
+        (checkpoints.c.stock_level.is_not(None), checkpoints.c.stock_level + func.coalesce(movements.c.until, 0)),
+        else_=Product.current_stock - func.coalesce(movements.c.after, 0)
+    )
+    query = db.query(
+        Product.product_id,
+        on_hand.label('on_hand')
+    ).outerjoin(
+        checkpoints, checkpoints.c.product_id == Product.product_id
+    ).outerjoin(
+        movements, movements.c.product_id == Product.product_id
+    )
+    if product_ids is not None:
+        query = query.filter(Product.product_id.in_(list(product_ids)))
+    return query.subquery()
+
+
+@query_cache.cached(tags=("products",))
+def get_stock_as_of(as_of, product_ids=None):
+    """Return ``{product_id: stock level}`` at ``as_of`` (a naive UTC datetime).
+
+    Each product starts from its nearest checkpoint at or before ``as_of`` and
+    only the movements recorded after that checkpoint are summed; products
+    with no checkpoint yet are rolled back from their current stock.
+    """
+    db = get_read_db()
+    try:
+        return {product_id: int(on_hand) for product_id, on_hand in db.query(_on_hand_as_of(db, as_of, product_ids)).all()}
+    finally:
+        db.close()
+
+
+@query_cache.cached(tags=("products",))
+def query_inventory_valuation(as_of):
+    """Return on-hand quantity and value per product at ``as_of`` (a naive UTC datetime).
+
+    Quantities come from the same checkpoints and movements as
+    ``get_stock_as_of``. Values use each product's current buying and
+    selling prices, not the prices in effect at ``as_of``. Both change with
+    later sales, receipts and price edits, which invalidate the
+    ``stock`` and ``products`` tags.
+    """
+    import pandas as pd
+    db = get_read_db()
+    try:
+        stock_then = _on_hand_as_of(db, as_of)
+        on_hand = stock_then.c.on_hand
+        rows = db.query(
+            Product.product_id,
+            Product.name,
+            on_hand.label('on_hand'),
+            Product.buying_price,
+            Product.selling_price,
+            type_coerce(on_hand * Product.buying_price, Money).label('value_cost'),
+            type_coerce(on_hand * Product.selling_price, Money).label('value_retail')
+        ).join(
+            stock_then, stock_then.c.product_id == Product.product_id
+        ).filter(
+            on_hand != 0,
+            Product.deleted_at.is_(None) | (Product.deleted_at > as_of)
+        ).order_by(Product.name).all()
+
+        return pd.DataFrame(
+            [tuple(row) for row in rows],
+            columns=['product_id', 'name', 'on_hand', 'buying_price', 'selling_price', 'value_cost', 'value_retail']
+        ).astype({'buying_price': float, 'selling_price': float, 'value_cost': float, 'value_retail': float})
+    finally:
+        db.close()
@@ -0,0 +1,226 @@
+"""Time-bucketed sales aggregates and trend statistics."""
+from sqlalchemy import func  # pyright: ignore[reportMissingImports]
+
+from database import Sale, get_read_db
+from inventory.analytics import get_analytics_replica
+from inventory.archive import read_archived_sales_frame
+from inventory.sales import SALE_PROFIT, SALE_REVENUE
+from query_cache import query_cache
+
+TREND_GRANULARITIES = {"Daily": "day", "Weekly": "week", "Monthly": "month"}
+_BUCKET_FREQUENCIES = {"day": "D", "week": "W-MON", "month": "MS"}
+DEFAULT_TREND_POINT_BUDGET = 500
+
+
+def _date_bucket(db, column, granularity):
+    """SQL expression truncating ``column`` to the start of its day, ISO week or month.
+
+    The SQL is written for the database ``db`` reads from, which is the read
+    replica when one is configured.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        if granularity == "day":
+            return func.date(column)
+        if granularity == "week":
+            return func.date(column, "-6 days", "weekday 1")
+        return func.strftime("%Y-%m-01", column)
+    return func.date_trunc(granularity, column)
+
+
+def _archived_sales(start_date, end_date, granularity):
+    """Archived sales between two datetimes with their bucket start, aligned like ``_date_bucket``.
+
+    The DuckDB replica already holds these; only queries on the main
+    database need them added.
+    """
+    import pandas as pd
+    df = read_archived_sales_frame(start_date, end_date)
+    buckets = pd.to_datetime(df['sale_date']).dt.normalize()
+    if granularity == "week":
+        buckets -= pd.to_timedelta(buckets.dt.weekday, unit="D")
+    elif granularity == "month":
+        buckets -= pd.to_timedelta(buckets.dt.day - 1, unit="D")
+    df['bucket'] = buckets
+    return df
+
+
+@query_cache.cached(tags=("sales",))
+def get_time_bucket_stats(start_date, end_date, granularity="day"):
+    """Revenue, profit and transaction count per time bucket between two datetimes.
+
+    Aggregation happens in a single GROUP BY, plus any archived sales in the
+    range; empty buckets are filled with zeros so the series is continuous.
+    """
+    import pandas as pd
+    replica = get_analytics_replica()
+    if replica is not None:
+        rows = replica.bucket_stats(start_date, end_date, granularity)
+    else:
+        db = get_read_db()
+        try:
+            bucket = _date_bucket(db, Sale.sale_date, granularity).label('bucket')
+            rows = db.query(
+                bucket,
+                func.sum(SALE_REVENUE).label('revenue'),
+                func.sum(SALE_PROFIT).label('profit'),
+                func.count(Sale.sale_id).label('transactions')
+            ).filter(
+                Sale.sale_date >= start_date,
+                Sale.sale_date < end_date
+            ).group_by(bucket).all()
+        finally:
+            db.close()
+
+    df = pd.DataFrame(rows, columns=['bucket', 'revenue', 'profit', 'transactions'])
+    df['bucket'] = pd.to_datetime(df['bucket'])
+    df = df.astype({'revenue': float, 'profit': float, 'transactions': int})
+    if replica is None:
+        archived = _archived_sales(start_date, end_date, granularity).groupby('bucket').agg(
+            revenue=('revenue', 'sum'),
+            profit=('profit', 'sum'),
+            transactions=('quantity', 'size')
+        ).reset_index()
+        if not archived.empty:
+            # Week buckets can span a live and an archived month.
+            df = pd.concat([df, archived]).groupby('bucket', as_index=False).sum()
+    index = _bucket_index(start_date, end_date, granularity)
+    return df.set_index('bucket').reindex(index, fill_value=0).reset_index()
+
+
+def _bucket_index(start_date, end_date, granularity):
+    """Every bucket start between two datetimes, aligned like ``_date_bucket``."""
+    import pandas as pd
+    first_bucket = pd.Timestamp(start_date).normalize()
+    if granularity == "week":
+        first_bucket -= pd.Timedelta(days=first_bucket.weekday())
+    elif granularity == "month":
+        first_bucket = first_bucket.replace(day=1)
+    return pd.date_range(
+        first_bucket,
+        pd.Timestamp(end_date),
+        freq=_BUCKET_FREQUENCIES[granularity],
+        inclusive="left",
+        name="bucket"
+    )
+
+
+PRODUCT_TREND_METRICS = {
+    "Revenue": SALE_REVENUE,
+    "Profit": SALE_PROFIT,
+    "Units Sold": Sale.quantity
+}
+_ARCHIVED_METRIC_COLUMNS = {"Revenue": "revenue", "Profit": "profit", "Units Sold": "quantity"}
+
+
+@query_cache.cached(tags=("sales",))
+def get_product_sales_matrix(start_date, end_date, granularity="week", metric="Revenue"):
+    """Products x time-bucket matrix of a sales metric, built from one GROUP BY query.
+
+    Rows are product ids, columns are bucket start timestamps; cells with no
+    sales are 0.
+    """
+    import pandas as pd
+    replica = get_analytics_replica()
+    if replica is not None:
+        rows = replica.product_bucket_values(start_date, end_date, granularity, metric)
+    else:
+        db = get_read_db()
+        try:
+            bucket = _date_bucket(db, Sale.sale_date, granularity).label('bucket')
+            rows = db.query(
+                Sale.product_id,
+                bucket,
+                func.sum(PRODUCT_TREND_METRICS[metric]).label('value')
+            ).filter(
+                Sale.sale_date >= start_date,
+                Sale.sale_date < end_date
+            ).group_by(Sale.product_id, bucket).all()
+        finally:
+            db.close()
+
+    df = pd.DataFrame(rows, columns=['product_id', 'bucket', 'value'])
+    df['bucket'] = pd.to_datetime(df['bucket'])
+    df['value'] = df['value'].astype(float)
+    if replica is None:
+        archived = _archived_sales(start_date, end_date, granularity)
+        if not archived.empty:
+            archived['value'] = archived[_ARCHIVED_METRIC_COLUMNS[metric]].astype(float)
+            df = pd.concat([df, archived[['product_id', 'bucket', 'value']]])
+    matrix = df.pivot_table(index='product_id', columns='bucket', values='value', aggfunc='sum', fill_value=0)
+    return matrix.reindex(columns=_bucket_index(start_date, end_date, granularity), fill_value=0).astype(float)
+
+
+def compute_product_trend_stats(matrix, window=4):
+    """Rolling averages, growth and ranks for every product at once.
+
+    Returns ``(rolling, stats)``: the rolling mean of ``matrix`` along the time
+    axis, and per product the period total, the mean of the last ``window``
+    buckets, the mean of the ``window`` buckets before that, the growth rate
+    between them and its rank (1 = fastest growing).
+    """
+    import numpy as np
+    import pandas as pd
+    values = matrix.to_numpy()
+    rolling = matrix.T.rolling(window, min_periods=1).mean().T
+
+    recent = values[:, -window:].mean(axis=1) if values.shape[1] else np.zeros(len(matrix))
+    previous_block = values[:, -2 * window:-window]
+    previous = previous_block.mean(axis=1) if previous_block.shape[1] else np.zeros(len(matrix))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.where(previous > 0, recent / previous - 1, np.where(recent > 0, np.inf, 0.0))
+
+    stats = pd.DataFrame({
+        'total': values.sum(axis=1),
+        'recent_avg': recent,
+        'previous_avg': previous,
+        'growth': growth
+    }, index=matrix.index)
+    stats['growth_rank'] = stats['growth'].rank(ascending=False, method='min').astype(int)
+    stats['total_rank'] = stats['total'].rank(ascending=False, method='min').astype(int)
+    return rolling, stats.sort_values('growth_rank')
+
+
+def lttb_downsample(x, y, threshold):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last point and, for each bucket in between, the point
+    forming the largest triangle with the previously kept point and the average
+    of the next bucket, which preserves peaks and troughs.
+    """
+    import numpy as np
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    kept = np.empty(threshold, dtype=int)
+    kept[0] = 0
+    kept[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[avg_start:avg_end].mean()
+        avg_y = y[avg_start:avg_end].mean()
+
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        areas = np.abs(
+            (x[a] - avg_x) * (y[range_start:range_end] - y[a])
+            - (x[a] - x[range_start:range_end]) * (avg_y - y[a])
+        )
+        a = range_start + int(areas.argmax())
+        kept[i + 1] = a
+    return kept
+
+
+def downsample_series(df, x_column, y_column, point_budget=DEFAULT_TREND_POINT_BUDGET):
+    """Return ``df[[x_column, y_column]]`` reduced to at most ``point_budget`` rows with LTTB."""
+    import pandas as pd
+    x = df[x_column]
+    if pd.api.types.is_datetime64_any_dtype(x):
+        x = x.astype("int64")
+    kept = lttb_downsample(x.to_numpy(), df[y_column].to_numpy(), point_budget)
+    return df[[x_column, y_column]].iloc[kept]
@@ -0,0 +1,259 @@
+"""Versioned schema migrations.
+
+Each script in ``versions/`` defines ``revision``, ``down_revision`` and
+``upgrade(op)`` / ``downgrade(op)`` functions that receive an
+:class:`Operations` helper. Applied revisions are tracked in the
+``schema_migrations`` table. Scripts that set ``transactional = False`` run
+outside a transaction, which ``CREATE INDEX CONCURRENTLY`` on PostgreSQL
+requires, so indexes can be added to a live database without blocking writes.
+
+Run ``python -m migrations --help`` for the command line interface.
+"""
+import importlib.util
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+
+from sqlalchemy import Column, MetaData, String, Table, inspect, text  # pyright: ignore[reportMissingImports]
+
+VERSIONS_DIR = Path(__file__).resolve().parent / "versions"
+BASE = "base"
+
+_version_table = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version_num", String(64), primary_key=True),
+)
+
+# Arbitrary constant key for pg_advisory_lock, so concurrent app processes
+# don't run the same migration twice.
+_ADVISORY_LOCK_KEY = 724_219_031
+
+
+class MigrationError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Migration:
+    revision: str
+    down_revision: str | None
+    module: ModuleType
+
+    @property
+    def transactional(self) -> bool:
+        return getattr(self.module, "transactional", True)
+
+    @property
+    def description(self) -> str:
+        return (self.module.__doc__ or "").strip().split("\n")[0]
+
+
+class Operations:
+    """Dialect-aware DDL helpers handed to migration scripts."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.dialect = connection.dialect.name
+
+    def _quote(self, name):
+        return self.connection.dialect.identifier_preparer.quote(name)
+
+    def execute(self, statement, params=None):
+        if isinstance(statement, str):
+            statement = text(statement)
+        return self.connection.execute(statement, params or {})
+
+    def create_table(self, table):
+        table.create(self.connection, checkfirst=True)
+
+    def drop_table(self, table_name):
+        self.execute(f"DROP TABLE IF EXISTS {self._quote(table_name)}")
+
+    def has_column(self, table_name, column_name):
+        return any(c["name"] == column_name for c in inspect(self.connection).get_columns(table_name))
+
+    def is_partitioned(self, table_name):
+        if self.dialect != "postgresql":
+            return False
+        return self.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:name))",
+            {"name": table_name},
+        ).scalar()
+
+    def add_column(self, table_name, column):
+        """Add ``column`` (an unbound ``sqlalchemy.Column``) unless it already exists."""
+        if self.has_column(table_name, column.name):
+            return
+        ddl = f"ALTER TABLE {self._quote(table_name)} ADD COLUMN {self._quote(column.name)} "
+        ddl += column.type.compile(dialect=self.connection.dialect)
+        if column.server_default is not None:
+            ddl += f" DEFAULT {column.server_default.arg}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+        self.execute(ddl)
+
+    def drop_column(self, table_name, column_name):
+        if self.has_column(table_name, column_name):
+            self.execute(f"ALTER TABLE {self._quote(table_name)} DROP COLUMN {self._quote(column_name)}")
+
+    def alter_column_type(self, table_name, column, using):
+        """Change a column to ``column``'s type, filling it from the SQL expression ``using``.
+
+        ``using`` is evaluated over the old values, e.g.
+        ``"CAST(ROUND(price * 100) AS BIGINT)"``. PostgreSQL converts in place;
+        SQLite can't change a column's type, so the values are copied into a
+        new column that then replaces the old one (non-nullable columns get a
+        ``DEFAULT 0`` there, which SQLite requires when adding them).
+        """
+        table = self._quote(table_name)
+        if self.dialect == "postgresql":
+            type_sql = column.type.compile(dialect=self.connection.dialect)
+            self.execute(f"ALTER TABLE {table} ALTER COLUMN {self._quote(column.name)} TYPE {type_sql} USING {using}")
+            return
+        temporary = f"{column.name}_new"
+        self.add_column(table_name, Column(
+            temporary,
+            column.type,
+            nullable=column.nullable,
+            server_default=None if column.nullable else "0",
+        ))
+        self.execute(f"UPDATE {table} SET {self._quote(temporary)} = {using}")
+        self.drop_column(table_name, column.name)
+        self.execute(f"ALTER TABLE {table} RENAME COLUMN {self._quote(temporary)} TO {self._quote(column.name)}")
+
+    def create_index(self, name, table_name, columns, unique=False, concurrently=False, where=None):
+        """Create an index if it doesn't exist.
+
+        With ``concurrently`` the index is built without locking out writes on
+        PostgreSQL; the calling script must set ``transactional = False``.
+        """
+        # Partitioned tables can't build indexes concurrently.
+        concurrently = concurrently and not self.is_partitioned(table_name)
+        concurrently_sql = " CONCURRENTLY" if concurrently and self.dialect == "postgresql" else ""
+        if concurrently_sql:
+            # A failed concurrent build leaves an INVALID index behind that
+            # IF NOT EXISTS would silently keep; drop it and start over.
+            invalid = self.execute(
+                "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name AND NOT i.indisvalid",
+                {"name": name},
+            ).first()
+            if invalid:
+                self.drop_index(name, concurrently=True)
+        ddl = (
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX{concurrently_sql} IF NOT EXISTS {self._quote(name)} "
+            f"ON {self._quote(table_name)} ({', '.join(self._quote(c) for c in columns)})"
+        )
+        if where:
+            ddl += f" WHERE {where}"
+        self.execute(ddl)
+
+    def drop_index(self, name, concurrently=False):
+        concurrently_sql = " CONCURRENTLY" if concurrently and self.dialect == "postgresql" else ""
+        self.execute(f"DROP INDEX{concurrently_sql} IF EXISTS {self._quote(name)}")
+
+
+def load_migrations():
+    """Return every migration script ordered from the first revision to the head."""
+    by_down_revision = {}
+    for path in sorted(VERSIONS_DIR.glob("[0-9]*.py")):
+        spec = importlib.util.spec_from_file_location(f"migrations.versions.{path.stem}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        migration = Migration(module.revision, module.down_revision, module)
+        if migration.down_revision in by_down_revision:
+            raise MigrationError(f"Multiple migrations follow {migration.down_revision!r}")
+        by_down_revision[migration.down_revision] = migration
+
+    ordered = []
+    current = by_down_revision.pop(None, None)
+    while current:
+        ordered.append(current)
+        current = by_down_revision.pop(current.revision, None)
+    if by_down_revision:
+        raise MigrationError(f"Unreachable migrations: {sorted(m.revision for m in by_down_revision.values())}")
+    return ordered
+
+
+def current_revision(engine):
+    with engine.connect() as connection:
+        _version_table.create(connection, checkfirst=True)
+        connection.commit()
+        return connection.execute(_version_table.select()).scalar()
+
+
+def _set_revision(connection, revision):
+    connection.execute(_version_table.delete())
+    if revision is not None:
+        connection.execute(_version_table.insert().values(version_num=revision))
+
+
+@contextmanager
+def _migration_lock(engine):
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+
+
+def _apply(engine, migration, direction, revision_after):
+    step = getattr(migration.module, direction)
+    if migration.transactional:
+        with engine.begin() as connection:
+            step(Operations(connection))
+            _set_revision(connection, revision_after)
+    else:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            step(Operations(connection))
+        with engine.begin() as connection:
+            _set_revision(connection, revision_after)
+
+
+def upgrade(engine, target=None):
+    """Apply every migration after the current revision up to ``target`` (default: head).
+
+    Returns the revisions applied.
+    """
+    migrations = load_migrations()
+    revisions = [m.revision for m in migrations]
+    if target is not None and target not in revisions:
+        raise MigrationError(f"Unknown revision {target!r}")
+
+    applied = []
+    with _migration_lock(engine):
+        current = current_revision(engine)
+        start = revisions.index(current) + 1 if current else 0
+        stop = revisions.index(target) + 1 if target else len(revisions)
+        for migration in migrations[start:stop]:
+            _apply(engine, migration, "upgrade", migration.revision)
+            applied.append(migration.revision)
+    return applied
+
+
+def downgrade(engine, target):
+    """Revert migrations down to ``target`` (a revision, or ``"base"`` for everything).
+
+    Returns the revisions reverted.
+    """
+    migrations = load_migrations()
+    revisions = [m.revision for m in migrations]
+    if target != BASE and target not in revisions:
+        raise MigrationError(f"Unknown revision {target!r}")
+
+    reverted = []
+    with _migration_lock(engine):
+        current = current_revision(engine)
+        if current is None:
+            return reverted
+        stop = revisions.index(target) + 1 if target != BASE else 0
+        for migration in reversed(migrations[stop:revisions.index(current) + 1]):
+            _apply(engine, migration, "downgrade", migration.down_revision)
+            reverted.append(migration.revision)
+    return reverted
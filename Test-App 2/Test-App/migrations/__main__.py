@@ -0,0 +1,54 @@
+"""Command line entry point: ``python -m migrations <command>``."""
+import argparse
+
+from migrations import BASE, current_revision, downgrade, load_migrations, upgrade
+from migrations.partitions import DEFAULT_MONTHS_AHEAD, maintain_sales_partitions, partition_sales
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m migrations", description="Manage the database schema.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = commands.add_parser("upgrade", help="apply migrations up to a revision (default: head)")
+    upgrade_parser.add_argument("revision", nargs="?")
+    downgrade_parser = commands.add_parser("downgrade", help=f"revert migrations down to a revision or '{BASE}'")
+    downgrade_parser.add_argument("revision")
+    commands.add_parser("current", help="show the applied revision")
+    commands.add_parser("history", help="list all revisions")
+    partition_parser = commands.add_parser(
+        "partition-sales", help="convert sales to monthly partitions (PostgreSQL, copies every row)"
+    )
+    partition_parser.add_argument("--months-ahead", type=int, default=DEFAULT_MONTHS_AHEAD)
+    maintain_parser = commands.add_parser(
+        "maintain-partitions", help="create upcoming sales partitions and archive old ones"
+    )
+    maintain_parser.add_argument("--months-ahead", type=int, default=DEFAULT_MONTHS_AHEAD)
+    maintain_parser.add_argument("--retain-months", type=int, help="archive partitions older than this many months")
+    args = parser.parse_args(argv)
+
+    from database import SALES_PARTITION_RETAIN_MONTHS, engine
+
+    if args.command == "upgrade":
+        applied = upgrade(engine, args.revision)
+        print(f"Applied: {', '.join(applied)}" if applied else "Already up to date.")
+    elif args.command == "downgrade":
+        reverted = downgrade(engine, args.revision)
+        print(f"Reverted: {', '.join(reverted)}" if reverted else "Nothing to revert.")
+    elif args.command == "partition-sales":
+        created = partition_sales(engine, args.months_ahead)
+        print(f"Partitioned sales into {len(created)} monthly partitions.")
+    elif args.command == "maintain-partitions":
+        retain_months = args.retain_months if args.retain_months is not None else SALES_PARTITION_RETAIN_MONTHS
+        created, archived = maintain_sales_partitions(engine, args.months_ahead, retain_months)
+        print(f"Created: {', '.join(created) or 'none'}")
+        print(f"Archived: {', '.join(archived) or 'none'}")
+    elif args.command == "current":
+        print(current_revision(engine) or BASE)
+    else:
+        current = current_revision(engine)
+        for migration in load_migrations():
+            marker = " (current)" if migration.revision == current else ""
+            print(f"{migration.revision}  {migration.description}{marker}")
+
+
+if __name__ == "__main__":
+    main()
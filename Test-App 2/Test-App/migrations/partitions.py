@@ -0,0 +1,203 @@
+"""Optional monthly range partitioning of ``sales`` on PostgreSQL.
+
+``python -m migrations partition-sales`` converts the table once; it copies
+every row, so run it in a maintenance window. From then on ``init_db`` (or
+``python -m migrations maintain-partitions`` from cron) keeps a partition for
+the current month and the next few in place, and with a retention period
+moves older months into the sales archive (``inventory.archive``: Parquet
+files plus ``sales_monthly_rollups``, so reports still include them) and
+drops their emptied partitions.
+Report queries filter on ``sale_date`` ranges, so PostgreSQL only scans the
+partitions a report covers. Sales outside every month partition land in
+``sales_default``; they are moved into their month's partition when it is
+created.
+
+PostgreSQL has no unique indexes across partitions, so on the partitioned
+table idempotency keys are kept unique by a trigger that records them in
+``sale_idempotency_keys``; inserting a duplicate key still fails.
+"""
+from datetime import date
+
+from dateutil.relativedelta import relativedelta  # pyright: ignore[reportMissingImports]
+from sqlalchemy import text  # pyright: ignore[reportMissingImports]
+
+from migrations import MigrationError, Operations, _migration_lock
+
+DEFAULT_MONTHS_AHEAD = 3
+DEFAULT_PARTITION = "sales_default"
+
+_INDEXES = {
+    "ix_sales_sale_date": "sale_date",
+    "ix_sales_product_id_sale_date": "product_id, sale_date",
+    "ix_sales_idempotency_key": "idempotency_key",
+}
+
+_IDEMPOTENCY_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION sales_track_idempotency_key() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.idempotency_key IS NOT NULL THEN
+            INSERT INTO sale_idempotency_keys (idempotency_key, sale_id)
+            VALUES (NEW.idempotency_key, NEW.sale_id);
+        END IF;
+        RETURN NEW;
+    END IF;
+    DELETE FROM sale_idempotency_keys WHERE idempotency_key = OLD.idempotency_key;
+    RETURN OLD;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER sales_idempotency_key
+AFTER INSERT OR DELETE ON sales
+FOR EACH ROW EXECUTE FUNCTION sales_track_idempotency_key();
+"""
+
+
+def partition_name(month):
+    return f"sales_{month.year:04d}_{month.month:02d}"
+
+
+def _month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def is_sales_partitioned(connection):
+    return Operations(connection).is_partitioned("sales")
+
+
+def _require_postgresql(engine):
+    if engine.dialect.name != "postgresql":
+        raise MigrationError("Sales partitioning needs PostgreSQL")
+
+
+def get_sales_partitions(connection):
+    """Return the month partitions of ``sales`` as ``{month_start: table_name}``."""
+    names = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('sales')"
+    )).scalars()
+    partitions = {}
+    for name in names:
+        if name == DEFAULT_PARTITION:
+            continue
+        year, month = name.removeprefix("sales_").split("_")
+        partitions[date(int(year), int(month), 1)] = name
+    return partitions
+
+
+def _create_partition(connection, month):
+    """Create the partition for ``month``, moving its rows out of the default partition."""
+    start, end = month, month + relativedelta(months=1)
+    bounds = {"start": start, "end": end}
+    name = partition_name(month)
+    # Rows for this month that arrived before its partition existed are in the
+    # default partition, which would otherwise make creating it fail.
+    connection.execute(text(
+        f"CREATE TEMPORARY TABLE sales_moving AS SELECT * FROM {DEFAULT_PARTITION} "
+        "WHERE sale_date >= :start AND sale_date < :end"
+    ), bounds)
+    connection.execute(text(
+        f"DELETE FROM {DEFAULT_PARTITION} WHERE sale_date >= :start AND sale_date < :end"
+    ), bounds)
+    connection.execute(text(
+        f"CREATE TABLE {name} PARTITION OF sales FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    connection.execute(text("INSERT INTO sales SELECT * FROM sales_moving"))
+    connection.execute(text("DROP TABLE sales_moving"))
+    return name
+
+
+def _drop_empty_partition(connection, name):
+    """Drop partition ``name`` if it holds no sales; returns whether it was dropped."""
+    if connection.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar():
+        return False
+    connection.execute(text(f"ALTER TABLE sales DETACH PARTITION {name}"))
+    connection.execute(text(f"DROP TABLE {name}"))
+    return True
+
+
+def partition_sales(engine, months_ahead=DEFAULT_MONTHS_AHEAD):
+    """Convert ``sales`` into a table range-partitioned by ``sale_date`` month.
+
+    Runs in one transaction and copies every row. Returns the partitions
+    created.
+    """
+    _require_postgresql(engine)
+    with _migration_lock(engine), engine.begin() as connection:
+        if is_sales_partitioned(connection):
+            raise MigrationError("sales is already partitioned")
+        execute = connection.execute
+
+        execute(text("ALTER TABLE sales RENAME TO sales_unpartitioned"))
+        # Index names are schema-wide; the old table's copies go with it.
+        execute(text("ALTER TABLE sales_unpartitioned DROP CONSTRAINT sales_pkey"))
+        for index in [*_INDEXES, "ix_sales_sale_id"]:
+            execute(text(f"DROP INDEX IF EXISTS {index}"))
+
+        execute(text(
+            "CREATE TABLE sales (LIKE sales_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (sale_date)"
+        ))
+        execute(text("ALTER TABLE sales ADD CONSTRAINT sales_pkey PRIMARY KEY (sale_id, sale_date)"))
+        execute(text("ALTER TABLE sales ADD FOREIGN KEY (product_id) REFERENCES products (product_id)"))
+        for index, columns in _INDEXES.items():
+            execute(text(f"CREATE INDEX {index} ON sales ({columns})"))
+        sequence = execute(text("SELECT pg_get_serial_sequence('sales_unpartitioned', 'sale_id')")).scalar()
+        if sequence:
+            execute(text(f"ALTER SEQUENCE {sequence} OWNED BY sales.sale_id"))
+
+        execute(text(
+            "CREATE TABLE sale_idempotency_keys ("
+            "idempotency_key VARCHAR(64) PRIMARY KEY, sale_id INTEGER NOT NULL)"
+        ))
+        execute(text(_IDEMPOTENCY_TRIGGER_SQL))
+
+        execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF sales DEFAULT"))
+        first_sale = execute(text("SELECT min(sale_date) FROM sales_unpartitioned")).scalar()
+        this_month = _month_start(date.today())
+        month = _month_start(first_sale) if first_sale else this_month
+        created = []
+        while month <= this_month + relativedelta(months=months_ahead):
+            created.append(_create_partition(connection, month))
+            month += relativedelta(months=1)
+
+        execute(text("INSERT INTO sales SELECT * FROM sales_unpartitioned"))
+        execute(text("DROP TABLE sales_unpartitioned"))
+    return created
+
+
+def maintain_sales_partitions(engine, months_ahead=DEFAULT_MONTHS_AHEAD, retain_months=None):
+    """Create partitions up to ``months_ahead`` and archive months older than ``retain_months``.
+
+    Old months go through ``inventory.archive.archive_sales``, which writes
+    them to Parquet and ``sales_monthly_rollups`` before deleting them, and
+    their emptied partitions are then dropped. A partition that received a
+    sale after archiving is kept until the next run. Does nothing unless
+    ``sales`` is partitioned. Returns ``(created, archived)`` partition names.
+    """
+    if engine.dialect.name != "postgresql":
+        return [], []
+    with _migration_lock(engine):
+        with engine.begin() as connection:
+            if not is_sales_partitioned(connection):
+                return [], []
+            partitions = get_sales_partitions(connection)
+            this_month = _month_start(date.today())
+
+            created = []
+            for offset in range(months_ahead + 1):
+                month = this_month + relativedelta(months=offset)
+                if month not in partitions:
+                    created.append(_create_partition(connection, month))
+
+        archived = []
+        if retain_months is not None:
+            from inventory.archive import archive_sales
+
+            cutoff = this_month - relativedelta(months=retain_months)
+            # Commits month by month, so it runs outside the transaction above.
+            archive_sales(cutoff)
+            with engine.begin() as connection:
+                for month, name in sorted(partitions.items()):
+                    if month < cutoff and _drop_empty_partition(connection, name):
+                        archived.append(name)
+    return created, archived
@@ -0,0 +1,101 @@
+"""Baseline schema.
+
+Creates every table and index the application had before migrations were
+introduced. Each object is created only if missing, so databases previously
+set up by ``create_all`` are simply stamped with this revision.
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, MetaData, String, Table  # pyright: ignore[reportMissingImports]
+
+revision = "0001"
+down_revision = None
+
+metadata = MetaData()
+
+products = Table(
+    "products", metadata,
+    Column("product_id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=False),
+    Column("buying_price", Float, nullable=False),
+    Column("selling_price", Float, nullable=False),
+    Column("current_stock", Integer, nullable=False, default=0),
+    Column("reorder_level", Integer, default=10),
+    Column("image_url", String, nullable=True),
+)
+
+sales = Table(
+    "sales", metadata,
+    Column("sale_id", Integer, primary_key=True, index=True),
+    Column("product_id", Integer, ForeignKey("products.product_id"), nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("sale_date", DateTime, default=datetime.utcnow),
+    Column("sale_price", Float, nullable=False),
+    Column("cost_price", Float, nullable=False),
+)
+
+purchase_orders = Table(
+    "purchase_orders", metadata,
+    Column("order_id", Integer, primary_key=True, index=True),
+    Column("product_id", Integer, ForeignKey("products.product_id"), nullable=False),
+    Column("quantity", Integer, nullable=False),
+    Column("order_date", DateTime, default=datetime.utcnow),
+    Column("expected_delivery", DateTime, nullable=True),
+    Column("status", String, default="Pending"),
+    Column("cost_per_unit", Float, nullable=False),
+    Column("total_cost", Float, nullable=False),
+    Index("ix_purchase_orders_status_order_date", "status", "order_date"),
+)
+
+purchase_order_receipts = Table(
+    "purchase_order_receipts", metadata,
+    Column("receipt_id", Integer, primary_key=True, index=True),
+    Column("order_id", Integer, ForeignKey("purchase_orders.order_id"), nullable=False, index=True),
+    Column("quantity", Integer, nullable=False),
+    Column("received_date", DateTime, default=datetime.utcnow),
+)
+
+stock_movements = Table(
+    "stock_movements", metadata,
+    Column("movement_id", Integer, primary_key=True, index=True),
+    Column("product_id", Integer, ForeignKey("products.product_id"), nullable=False),
+    Column("quantity_change", Integer, nullable=False),
+    Column("movement_type", String, nullable=False),
+    Column("reference_id", Integer, nullable=True),
+    Column("movement_date", DateTime, default=datetime.utcnow),
+    Index("ix_stock_movements_product_date", "product_id", "movement_date"),
+)
+
+product_classifications = Table(
+    "product_classifications", metadata,
+    Column("product_id", Integer, ForeignKey("products.product_id"), primary_key=True),
+    Column("revenue", Float, nullable=False, default=0),
+    Column("profit", Float, nullable=False, default=0),
+    Column("revenue_class", String(1), nullable=False, index=True),
+    Column("profit_class", String(1), nullable=False),
+    Column("period_start", DateTime, nullable=False),
+    Column("period_end", DateTime, nullable=False),
+    Column("computed_at", DateTime, default=datetime.utcnow),
+)
+
+stock_snapshots = Table(
+    "stock_snapshots", metadata,
+    Column("snapshot_id", Integer, primary_key=True, index=True),
+    Column("product_id", Integer, ForeignKey("products.product_id"), nullable=False),
+    Column("snapshot_date", DateTime, nullable=False),
+    Column("stock_level", Integer, nullable=False),
+    Index("ix_stock_snapshots_product_date", "product_id", "snapshot_date"),
+)
+
+
+def upgrade(op):
+    for table in metadata.sorted_tables:
+        op.create_table(table)
+        # Tables that already existed may predate some of their indexes.
+        for index in table.indexes:
+            index.create(op.connection, checkfirst=True)
+
+
+def downgrade(op):
+    for table in reversed(metadata.sorted_tables):
+        op.drop_table(table.name)
@@ -0,0 +1,20 @@
+"""Index sales by date and by product and date.
+
+Every report filters sales on ``sale_date`` and the per-product breakdowns
+also on ``product_id``; without these indexes each of them scans the whole
+table. Built concurrently on PostgreSQL so sale inserts keep flowing while
+the indexes are created.
+"""
+revision = "0002"
+down_revision = "0001"
+transactional = False
+
+
+def upgrade(op):
+    op.create_index("ix_sales_sale_date", "sales", ["sale_date"], concurrently=True)
+    op.create_index("ix_sales_product_id_sale_date", "sales", ["product_id", "sale_date"], concurrently=True)
+
+
+def downgrade(op):
+    op.drop_index("ix_sales_product_id_sale_date", concurrently=True)
+    op.drop_index("ix_sales_sale_date", concurrently=True)
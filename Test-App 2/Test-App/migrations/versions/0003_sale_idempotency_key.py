@@ -0,0 +1,21 @@
+"""Add an optional idempotency key to sales.
+
+The unique index makes a retried sale with the same key fail to insert
+instead of being recorded twice; rows without a key are unaffected. The index
+is built concurrently on PostgreSQL.
+"""
+from sqlalchemy import Column, String  # pyright: ignore[reportMissingImports]
+
+revision = "0003"
+down_revision = "0002"
+transactional = False
+
+
+def upgrade(op):
+    op.add_column("sales", Column("idempotency_key", String(64), nullable=True))
+    op.create_index("ix_sales_idempotency_key", "sales", ["idempotency_key"], unique=True, concurrently=True)
+
+
+def downgrade(op):
+    op.drop_index("ix_sales_idempotency_key", concurrently=True)
+    op.drop_column("sales", "idempotency_key")
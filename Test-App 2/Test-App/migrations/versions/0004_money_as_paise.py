@@ -0,0 +1,33 @@
+"""Store money as integer paise instead of floating point rupees.
+
+Each amount is rounded to the nearest paisa once, here; from then on prices
+and totals are whole numbers, so SUMs in SQL are exact. PostgreSQL rewrites
+each table while converting it, holding a lock that blocks writes to it.
+"""
+from sqlalchemy import BigInteger, Column, Float  # pyright: ignore[reportMissingImports]
+
+revision = "0004"
+down_revision = "0003"
+
+MONEY_COLUMNS = {
+    "products": ["buying_price", "selling_price"],
+    "sales": ["sale_price", "cost_price"],
+    "purchase_orders": ["cost_per_unit", "total_cost"],
+    "product_classifications": ["revenue", "profit"],
+}
+
+
+def upgrade(op):
+    for table_name, columns in MONEY_COLUMNS.items():
+        for name in columns:
+            op.alter_column_type(
+                table_name,
+                Column(name, BigInteger, nullable=False),
+                f"CAST(ROUND({name} * 100) AS BIGINT)",
+            )
+
+
+def downgrade(op):
+    for table_name, columns in MONEY_COLUMNS.items():
+        for name in columns:
+            op.alter_column_type(table_name, Column(name, Float, nullable=False), f"{name} / 100.0")
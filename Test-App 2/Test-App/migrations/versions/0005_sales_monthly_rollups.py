@@ -0,0 +1,28 @@
+"""Add monthly per-product totals for sales moved to the Parquet archive.
+
+Archived sales leave the ``sales`` table; their units, revenue, profit and
+transaction counts stay here so monthly reports still add up.
+"""
+from sqlalchemy import BigInteger, Column, Integer, MetaData, Table  # pyright: ignore[reportMissingImports]
+
+revision = "0005"
+down_revision = "0004"
+
+sales_monthly_rollups = Table(
+    "sales_monthly_rollups", MetaData(),
+    Column("year", Integer, primary_key=True),
+    Column("month", Integer, primary_key=True),
+    Column("product_id", Integer, primary_key=True),
+    Column("units", Integer, nullable=False),
+    Column("revenue", BigInteger, nullable=False),
+    Column("profit", BigInteger, nullable=False),
+    Column("transactions", Integer, nullable=False),
+)
+
+
+def upgrade(op):
+    op.create_table(sales_monthly_rollups)
+
+
+def downgrade(op):
+    op.drop_table("sales_monthly_rollups")
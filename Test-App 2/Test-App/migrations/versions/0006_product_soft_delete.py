@@ -0,0 +1,19 @@
+"""Soft-delete products.
+
+``delete_product`` now stamps ``deleted_at`` instead of removing the row, so
+the product's stock ledger and snapshots survive and valuations of earlier
+dates stay the same. Downgrading drops the column, which brings deleted
+products back into the catalog.
+"""
+from sqlalchemy import Column, DateTime  # pyright: ignore[reportMissingImports]
+
+revision = "0006"
+down_revision = "0005"
+
+
+def upgrade(op):
+    op.add_column("products", Column("deleted_at", DateTime, nullable=True))
+
+
+def downgrade(op):
+    op.drop_column("products", "deleted_at")
@@ -0,0 +1,91 @@
+"""In-process background precomputation of dashboard aggregates.
+
+Jobs are plain callables registered by name. A daemon thread recomputes all of
+them on a fixed interval, or shortly after a write asks for a refresh, and
+keeps the latest results in memory so page loads only read them.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PrecomputedValue:
+    value: Any
+    computed_at: datetime
+    version: int
+
+
+class PrecomputeScheduler:
+    def __init__(self, interval: float = 60.0, debounce: float = 0.5):
+        self.interval = interval
+        self.debounce = debounce
+        self._jobs: dict[str, Callable[[], Any]] = {}
+        self._store: dict[str, PrecomputedValue] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._version = 0
+
+    def register(self, name: str, job: Callable[[], Any]) -> None:
+        self._jobs[name] = job
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="dashboard-precompute", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+
+    def request_refresh(self) -> None:
+        """Ask the worker to recompute everything soon; bursts of requests coalesce."""
+        self._wake.set()
+
+    def entry(self, name: str) -> PrecomputedValue:
+        """Return the stored result for ``name``, computing it inline if the worker hasn't yet."""
+        with self._lock:
+            entry = self._store.get(name)
+        if entry is None:
+            entry = self._compute(name)
+        return entry
+
+    def get(self, name: str) -> Any:
+        return self.entry(name).value
+
+    def refresh_all(self) -> None:
+        for name in list(self._jobs):
+            try:
+                self._compute(name)
+            except Exception:
+                logger.exception("Precomputing %s failed", name)
+
+    def _compute(self, name: str) -> PrecomputedValue:
+        value = self._jobs[name]()
+        with self._lock:
+            self._version += 1
+            entry = PrecomputedValue(value, datetime.utcnow(), self._version)
+            self._store[name] = entry
+        return entry
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.refresh_all()
+            self._wake.wait(self.interval)
+            if self._stop.is_set():
+                break
+            if self._wake.is_set():
+                # Let a burst of writes land before recomputing once.
+                time.sleep(self.debounce)
+                self._wake.clear()
@@ -0,0 +1,221 @@
+"""Shared query result cache with TTLs and tag-based invalidation.
+
+Results are keyed by function and arguments and shared by every session in
+the process (memory backend) or every process on the machine (SQLite
+backend). Write paths invalidate the tags of the tables they touch, e.g.
+``query_cache.invalidate("sales", "products")``.
+
+Each tag has a generation that invalidation bumps. A result is only stored
+if the generations of its tags are unchanged since its computation started,
+so a write landing mid-computation can't leave a stale result behind.
+
+The backend is chosen with ``QUERY_CACHE_BACKEND`` (``memory`` or
+``sqlite``); the SQLite file lives at ``QUERY_CACHE_PATH``.
+"""
+import functools
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+DEFAULT_TTL = 300
+_MISSING = object()
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache bounded to ``max_entries``."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, _, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def generations(self, tags):
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def set(self, key, value, ttl, tags, generations=None):
+        with self._lock:
+            if generations is not None and generations != tuple(self._generations.get(tag, 0) for tag in tags):
+                return
+            self._entries[key] = (time.time() + ttl, frozenset(tags), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_tags(self, tags):
+        tags = set(tags)
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            for key in [key for key, (_, entry_tags, _) in self._entries.items() if entry_tags & tags]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCacheBackend:
+    """Pickled results in a local SQLite file, shared between processes."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS cache_tags (
+                    key TEXT NOT NULL,
+                    tag TEXT NOT NULL,
+                    PRIMARY KEY (tag, key)
+                );
+                CREATE TABLE IF NOT EXISTS cache_generations (
+                    tag TEXT PRIMARY KEY,
+                    generation INTEGER NOT NULL
+                );
+                """
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= time.time():
+            return _MISSING
+        return pickle.loads(row[0])
+
+    def _generations(self, conn, tags):
+        current = dict(conn.execute(
+            f"SELECT tag, generation FROM cache_generations WHERE tag IN ({', '.join('?' for _ in tags)})",
+            list(tags),
+        ).fetchall()) if tags else {}
+        return tuple(current.get(tag, 0) for tag in tags)
+
+    def generations(self, tags):
+        return self._generations(self._connect(), tags)
+
+    def set(self, key, value, ttl, tags, generations=None):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if generations is not None and generations != self._generations(conn, tags):
+                conn.execute("ROLLBACK")
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), time.time() + ttl),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO cache_tags (key, tag) VALUES (?, ?)",
+                [(key, tag) for tag in tags],
+            )
+            conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def invalidate_tags(self, tags):
+        tags = list(tags)
+        placeholders = ", ".join("?" for _ in tags)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO cache_generations (tag, generation) VALUES (?, 1) "
+                "ON CONFLICT (tag) DO UPDATE SET generation = generation + 1",
+                [(tag,) for tag in tags],
+            )
+            conn.execute(
+                f"DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_tags WHERE tag IN ({placeholders}))",
+                tags,
+            )
+            conn.execute(
+                "DELETE FROM cache_tags WHERE key NOT IN (SELECT key FROM cache_entries)"
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM cache_entries")
+        conn.execute("DELETE FROM cache_tags")
+
+
+class QueryCache:
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def make_key(func, args, kwargs):
+        signature = repr((args, sorted(kwargs.items())))
+        digest = hashlib.sha256(signature.encode()).hexdigest()
+        return f"{func.__qualname__}:{digest}"
+
+    def cached(self, ttl=DEFAULT_TTL, tags=()):
+        """Decorator caching a function's result for ``ttl`` seconds under ``tags``."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = self.make_key(func, args, kwargs)
+                value = self.backend.get(key)
+                if value is _MISSING:
+                    generations = self.backend.generations(tags)
+                    value = func(*args, **kwargs)
+                    self.backend.set(key, value, ttl, tags, generations)
+                return value
+
+            wrapper.uncached = func
+            return wrapper
+
+        return decorator
+
+    def invalidate(self, *tags):
+        self.backend.invalidate_tags(tags)
+
+    def clear(self):
+        self.backend.clear()
+
+
+def backend_from_env():
+    if os.getenv("QUERY_CACHE_BACKEND", "memory").lower() == "sqlite":
+        default_path = Path(__file__).resolve().parent / "query_cache.db"
+        return SQLiteCacheBackend(os.getenv("QUERY_CACHE_PATH") or default_path)
+    return MemoryCacheBackend(int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "512")))
+
+
+query_cache = QueryCache(backend_from_env())
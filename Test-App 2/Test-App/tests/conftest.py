@@ -0,0 +1,83 @@
+"""Shared fixtures: every test runs against an empty database.
+
+``database`` builds its engine from the environment at import time, so the
+environment points at a scratch directory before anything imports it. The
+database is a scratch SQLite file unless ``TEST_DATABASE_URL`` names one to
+use instead (its tables are emptied before every test).
+"""
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+_SCRATCH_DIR = Path(tempfile.mkdtemp(prefix="inventory-tests-"))
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or f"sqlite:///{(_SCRATCH_DIR / 'app.db').as_posix()}"
+os.environ.pop("DATABASE_READ_URL", None)
+os.environ["SALES_ARCHIVE_DIR"] = str(_SCRATCH_DIR / "sales_archive")
+os.environ["QUERY_CACHE_BACKEND"] = "memory"
+os.environ["ANALYTICS_DUCKDB"] = "0"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest  # noqa: E402
+
+import database  # noqa: E402
+from inventory import analytics, archive, events  # noqa: E402
+from query_cache import query_cache  # noqa: E402
+
+database.init_db()
+
+
+@pytest.fixture(autouse=True)
+def clean_state(monkeypatch):
+    """Empty every table, the query cache, the sales archive and the write listeners."""
+    with database.engine.begin() as connection:
+        for table in reversed(database.Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+    query_cache.clear()
+    shutil.rmtree(archive.ARCHIVE_DIR, ignore_errors=True)
+    monkeypatch.setattr(events, "_write_listeners", [])
+    monkeypatch.setattr(analytics, "_replica", None)
+    monkeypatch.setattr(analytics, "_replica_loaded", True)
+    database.track_writes()
+    yield
+
+
+@pytest.fixture
+def product():
+    """A product with 100 units in stock, bought at 10.00 and sold at 15.50."""
+    from inventory import add_product
+    return add_product("Widget", 10, "15.50", 100)
+
+
+@pytest.fixture
+def sales(product):
+    """Two sales every three days from January to June 2024."""
+    db = database.get_db()
+    try:
+        day = datetime(2024, 1, 1)
+        while day < datetime(2024, 7, 1):
+            for hour, quantity in ((9, 1), (17, 2)):
+                db.add(database.Sale(
+                    product_id=product.product_id,
+                    quantity=quantity,
+                    sale_date=day + timedelta(hours=hour),
+                    sale_price=product.selling_price,
+                    cost_price=product.buying_price
+                ))
+            day += timedelta(days=3)
+        db.commit()
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def analytics_replica(tmp_path, monkeypatch):
+    """Route reports through a DuckDB replica, as with ``ANALYTICS_DUCKDB=1``."""
+    pytest.importorskip("duckdb")
+    replica = analytics.AnalyticsReplica(tmp_path / "analytics.duckdb")
+    monkeypatch.setattr(analytics, "_replica", replica)
+    events.add_write_listener(replica.mark_stale)
+    yield replica
+    replica.close()
@@ -0,0 +1,101 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from inventory import (
+    analytics,
+    archive_sales,
+    cancel_purchase_orders,
+    create_purchase_order,
+    get_monthly_stats,
+    get_product_sales_breakdown,
+    get_product_sales_matrix,
+    get_purchase_order_status_counts,
+    get_time_bucket_stats,
+    get_top_products,
+    receive_purchase_orders,
+    record_purchase_order_receipt,
+    record_sale,
+    update_product,
+)
+from query_cache import query_cache
+
+START = datetime(2024, 1, 1)
+END = datetime(2024, 7, 1)
+
+
+def _reports():
+    query_cache.clear()
+    return {
+        "monthly": [get_monthly_stats(2024, month) for month in range(1, 7)],
+        "top": [[tuple(row) for row in get_top_products(2024, month)] for month in range(1, 7)],
+        "breakdown": get_product_sales_breakdown(START.date(), END.date()),
+        "buckets": {g: get_time_bucket_stats(START, END, g) for g in ("day", "week", "month")},
+        "matrix": {
+            metric: get_product_sales_matrix(START, END, "week", metric)
+            for metric in ("Revenue", "Profit", "Units Sold")
+        },
+        "purchase_orders": get_purchase_order_status_counts(),
+    }
+
+
+def _assert_same_reports(actual, expected):
+    assert actual["monthly"] == expected["monthly"]
+    assert actual["top"] == expected["top"]
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(actual["breakdown"]), pd.DataFrame(expected["breakdown"]), check_dtype=False
+    )
+    for granularity, df in expected["buckets"].items():
+        pd.testing.assert_frame_equal(actual["buckets"][granularity], df, check_dtype=False)
+    for metric, matrix in expected["matrix"].items():
+        pd.testing.assert_frame_equal(actual["matrix"][metric], matrix, check_dtype=False, check_names=False)
+    assert actual["purchase_orders"] == expected["purchase_orders"]
+
+
+def test_replica_reports_match_the_database(sales, product, analytics_replica, monkeypatch):
+    pytest.importorskip("pyarrow")
+    create_purchase_order(product.product_id, 5, None, 9)
+    archive_sales(datetime(2024, 3, 1))
+
+    replicated = _reports()
+    monkeypatch.setattr(analytics, "_replica", None)
+    _assert_same_reports(replicated, _reports())
+
+
+def test_replica_picks_up_new_sales(product, analytics_replica):
+    now = datetime.now()
+    assert get_monthly_stats(now.year, now.month)['total_transactions'] == 0
+
+    record_sale(product.product_id, 2)
+
+    assert get_monthly_stats(now.year, now.month)['total_transactions'] == 1
+
+
+def test_sales_do_not_reload_the_replica_catalog(product, analytics_replica, monkeypatch):
+    get_top_products(2024, 1)
+    reloads = []
+    reload_products = analytics_replica._reload_products
+    monkeypatch.setattr(analytics_replica, "_reload_products", lambda c: reloads.append(1) or reload_products(c))
+
+    record_sale(product.product_id, 2)
+    get_top_products(2024, 1)
+    assert reloads == []
+
+    update_product(product.product_id, "Renamed", 10, 15.5, 98)
+    get_top_products(2024, 1)
+    assert reloads == [1]
+
+
+def test_replica_tracks_purchase_order_status_changes(product, analytics_replica):
+    orders = [create_purchase_order(product.product_id, 10, None, 9).order_id for _ in range(4)]
+    assert get_purchase_order_status_counts()["Pending"] == 4
+
+    record_purchase_order_receipt(orders[0], 4)
+    receive_purchase_orders([orders[1]])
+    cancel_purchase_orders([orders[2]])
+    create_purchase_order(product.product_id, 10, None, 9)
+
+    assert get_purchase_order_status_counts() == {
+        "Pending": 2, "Partially Received": 1, "Received": 1, "Cancelled": 1
+    }
@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("starlette")
+
+import api  # noqa: E402
+from inventory import delete_product, get_all_purchase_orders, get_product  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def no_sale_buffer(monkeypatch):
+    monkeypatch.setattr(api.app.state, "sale_buffer", None, raising=False)
+
+
+def request(method, path, body=None):
+    """Send one request through the ASGI app; returns ``(status, json body)``."""
+    payload = json.dumps(body).encode() if body is not None else b""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "server": ("test", 80), "client": ("test", 1),
+        "headers": [(b"content-type", b"application/json")],
+    }
+    response = {}
+
+    async def receive():
+        return {"type": "http.request", "body": payload, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"] = response.get("body", b"") + message.get("body", b"")
+
+    asyncio.run(api.app(scope, receive, send))
+    return response["status"], json.loads(response["body"])
+
+
+def test_create_sale(product):
+    status, body = request("POST", "/sales", {"product_id": product.product_id, "quantity": 3})
+
+    assert status == 201
+    assert body["quantity"] == 3
+    assert get_product(product.product_id).current_stock == 97
+
+
+def test_sale_errors_map_to_status_codes(product):
+    assert request("POST", "/sales", {"product_id": 999, "quantity": 1})[0] == 404
+    assert request("POST", "/sales", {"product_id": product.product_id, "quantity": 101})[0] == 409
+    assert request("POST", "/sales", {"product_id": product.product_id, "quantity": 0})[0] == 400
+
+
+def test_create_purchase_order(product):
+    status, body = request("POST", "/purchase-orders", {
+        "product_id": product.product_id, "quantity": 5, "cost_per_unit": 9.5, "expected_delivery": "2024-03-01",
+    })
+
+    assert status == 201
+    assert body["total_cost"] == 47.5
+
+
+@pytest.mark.parametrize("cost_per_unit", [0, -1.5])
+def test_purchase_order_cost_must_be_positive(product, cost_per_unit):
+    status, body = request("POST", "/purchase-orders", {
+        "product_id": product.product_id, "quantity": 5, "cost_per_unit": cost_per_unit,
+    })
+
+    assert status == 400
+    assert body == {"error": "'cost_per_unit' must be greater than 0"}
+    assert get_all_purchase_orders() == []
+
+
+def test_purchase_order_for_unknown_or_deleted_product_is_404(product):
+    order = {"quantity": 5, "cost_per_unit": 9.5}
+    assert request("POST", "/purchase-orders", {**order, "product_id": 9999})[0] == 404
+
+    delete_product(product.product_id)
+    assert request("POST", "/purchase-orders", {**order, "product_id": product.product_id})[0] == 404
+    assert get_all_purchase_orders() == []
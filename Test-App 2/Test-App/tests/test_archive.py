@@ -0,0 +1,96 @@
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+import database
+from inventory import (
+    archive_sales,
+    archived_months,
+    compute_abc_classification,
+    get_abc_classification,
+    get_filtered_sales,
+    get_monthly_sales,
+    get_monthly_stats,
+    get_product_sales_breakdown,
+    get_product_sales_matrix,
+    get_time_bucket_stats,
+    get_top_products,
+    read_archived_sales,
+)
+from query_cache import query_cache
+
+pytest.importorskip("pyarrow")
+
+START = datetime(2024, 1, 1)
+END = datetime(2024, 7, 1)
+
+
+def _abc_classification(start, end):
+    compute_abc_classification(start, end)
+    return {
+        product_id: (c.revenue, c.profit, c.revenue_class, c.profit_class)
+        for product_id, c in get_abc_classification().items()
+    }
+
+
+def _reports():
+    query_cache.clear()
+    return {
+        "monthly": [get_monthly_stats(2024, month) for month in range(1, 7)],
+        "top": [get_top_products(2024, month) for month in range(1, 7)],
+        "month_listing": [
+            sorted((s.sale_id, s.quantity, s.sale_date, s.sale_price) for s in get_monthly_sales(2024, month))
+            for month in range(1, 7)
+        ],
+        "abc": _abc_classification(datetime(2024, 1, 15), datetime(2024, 5, 10)),
+        "listing": [(s.sale_id, s.quantity, s.sale_date, s.sale_price) for s in get_filtered_sales(START, END.date())],
+        "breakdown": get_product_sales_breakdown(START.date(), END.date()),
+        "buckets": {g: get_time_bucket_stats(START, END, g) for g in ("day", "week", "month")},
+        "matrix": {
+            metric: get_product_sales_matrix(START, END, "week", metric)
+            for metric in ("Revenue", "Profit", "Units Sold")
+        },
+    }
+
+
+def test_reports_are_unchanged_by_archiving(sales):
+    before = _reports()
+    assert archive_sales(datetime(2024, 4, 15)) > 0
+    assert archived_months() == [(2024, 1), (2024, 2), (2024, 3)]
+    after = _reports()
+
+    assert after["monthly"] == before["monthly"]
+    assert after["top"] == before["top"]
+    assert after["month_listing"] == before["month_listing"]
+    assert after["abc"] == before["abc"]
+    assert after["listing"] == before["listing"]
+    assert after["breakdown"] == before["breakdown"]
+    for granularity, df in before["buckets"].items():
+        pd.testing.assert_frame_equal(after["buckets"][granularity], df)
+        assert (df.set_index("bucket").loc["2024-01-01":"2024-03-31", "transactions"] > 0).any()
+    for metric, matrix in before["matrix"].items():
+        pd.testing.assert_frame_equal(after["matrix"][metric], matrix)
+
+
+def test_archiving_moves_rows_out_of_the_sales_table(sales):
+    archived = archive_sales(datetime(2024, 3, 1))
+    db = database.get_db()
+    try:
+        live = db.query(database.Sale).filter(database.Sale.sale_date < datetime(2024, 3, 1)).count()
+    finally:
+        db.close()
+    assert live == 0
+    assert len(read_archived_sales(START, datetime(2024, 3, 1))) == archived
+    assert archive_sales(datetime(2024, 3, 1)) == 0
+
+
+def test_money_round_trips_through_the_archive(sales, product):
+    archive_sales(datetime(2024, 2, 1))
+    sale = read_archived_sales(START, datetime(2024, 2, 1))[0]
+    assert sale.sale_price == product.selling_price
+    assert sale.cost_price == product.buying_price
+    assert get_monthly_stats(2024, 1)["total_revenue"] == sum(
+        s.quantity * s.sale_price for s in read_archived_sales(START, datetime(2024, 2, 1))
+    )
+    assert date(2024, 1, 1) <= sale.sale_date.date() < date(2024, 2, 1)
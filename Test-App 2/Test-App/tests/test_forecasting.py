@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from forecasting import DemandForecaster
+
+FIRST_DAY = date(2024, 3, 1)
+
+
+@pytest.fixture
+def demand():
+    """30 days of demand for products 3, 5 and 9."""
+    return np.random.default_rng(7).poisson([[2], [5], [0.5]], size=(3, 30)).astype(float)
+
+
+@pytest.mark.parametrize("method", ["exponential", "seasonal_naive"])
+def test_incremental_updates_match_a_full_refit(demand, method):
+    refit = DemandForecaster()
+    refit.update(FIRST_DAY, [3, 5, 9], demand)
+
+    incremental = DemandForecaster()
+    incremental.update(FIRST_DAY, [3, 5, 9], demand[:, :12])
+    incremental.update(FIRST_DAY + timedelta(days=12), [3, 5, 9], demand[:, 12:20])
+    # Overlaps the days already folded in, which are skipped.
+    incremental.update(FIRST_DAY + timedelta(days=15), [3, 5, 9], demand[:, 15:])
+
+    assert incremental.last_day == refit.last_day == FIRST_DAY + timedelta(days=29)
+    assert incremental.forecast(method) == pytest.approx(refit.forecast(method))
+
+
+def test_products_missing_from_an_update_had_no_demand(demand):
+    refit = DemandForecaster()
+    refit.update(FIRST_DAY, [3, 5, 9], np.hstack([demand[:, :20], np.zeros((3, 10))]))
+
+    incremental = DemandForecaster()
+    incremental.update(FIRST_DAY, [9, 3, 5], demand[[2, 0, 1], :20])
+    incremental.update(FIRST_DAY + timedelta(days=20), [], np.zeros((0, 10)))
+
+    assert incremental.forecast() == pytest.approx(refit.forecast())
+    assert list(incremental.forecast()) == [3, 5, 9]
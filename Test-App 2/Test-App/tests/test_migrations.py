@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text  # pyright: ignore[reportMissingImports]
+
+import database
+from migrations import BASE, current_revision, downgrade, load_migrations, upgrade
+
+
+@pytest.fixture
+def scratch_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{(tmp_path / 'migrations.db').as_posix()}")
+    yield engine
+    engine.dispose()
+
+
+def test_head_schema_matches_the_models(scratch_engine):
+    upgrade(scratch_engine)
+
+    inspector = inspect(scratch_engine)
+    for table in database.Base.metadata.sorted_tables:
+        assert {c["name"] for c in inspector.get_columns(table.name)} == set(table.columns.keys()), table.name
+    assert current_revision(scratch_engine) == load_migrations()[-1].revision
+
+
+def test_downgrade_to_base_and_back(scratch_engine):
+    upgrade(scratch_engine)
+
+    reverted = downgrade(scratch_engine, BASE)
+
+    assert reverted == [m.revision for m in reversed(load_migrations())]
+    assert inspect(scratch_engine).get_table_names() == ["schema_migrations"]
+    assert current_revision(scratch_engine) is None
+    assert upgrade(scratch_engine) == [m.revision for m in load_migrations()]
+
+
+def test_money_migration_rounds_rupees_to_paise(scratch_engine):
+    upgrade(scratch_engine, "0003")
+    with scratch_engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO products (product_id, name, buying_price, selling_price, current_stock) "
+            "VALUES (1, 'Widget', 10.999, 15.5, 3)"
+        ))
+
+    upgrade(scratch_engine, "0004")
+    with scratch_engine.connect() as connection:
+        assert tuple(connection.execute(text("SELECT buying_price, selling_price FROM products")).one()) == (1100, 1550)
+
+    downgrade(scratch_engine, "0003")
+    with scratch_engine.connect() as connection:
+        assert tuple(connection.execute(text("SELECT buying_price, selling_price FROM products")).one()) == (11.0, 15.5)
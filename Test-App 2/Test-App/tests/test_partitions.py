@@ -0,0 +1,48 @@
+from datetime import date, datetime
+
+import pytest
+from dateutil.relativedelta import relativedelta  # pyright: ignore[reportMissingImports]
+
+import database
+from inventory import get_filtered_sales, get_monthly_stats, get_top_products
+from migrations.partitions import get_sales_partitions, is_sales_partitioned, maintain_sales_partitions, partition_sales
+from query_cache import query_cache
+
+pytestmark = pytest.mark.skipif(
+    database.engine.dialect.name != "postgresql",
+    reason="sales partitioning needs PostgreSQL; set TEST_DATABASE_URL"
+)
+
+
+@pytest.fixture
+def partitioned(sales):
+    with database.engine.connect() as connection:
+        already = is_sales_partitioned(connection)
+    if not already:
+        partition_sales(database.engine)
+
+
+def _reports():
+    query_cache.clear()
+    return (
+        [get_monthly_stats(2024, month) for month in range(1, 7)],
+        [get_top_products(2024, month) for month in range(1, 7)],
+        [(s.sale_id, s.quantity, s.sale_date) for s in get_filtered_sales(datetime(2024, 1, 1), date(2024, 6, 30))],
+    )
+
+
+def test_retention_keeps_old_months_in_reports(partitioned):
+    pytest.importorskip("pyarrow")
+    before = _reports()
+    this_month = date.today().replace(day=1)
+    cutoff = date(2024, 4, 1)
+    retain_months = (this_month.year - cutoff.year) * 12 + this_month.month - cutoff.month
+
+    maintain_sales_partitions(database.engine, retain_months=retain_months)
+
+    assert _reports() == before
+    with database.engine.connect() as connection:
+        assert min(get_sales_partitions(connection)) >= cutoff
+        assert connection.execute(
+            database.Sale.__table__.select().where(database.Sale.sale_date < datetime(2024, 4, 1))
+        ).first() is None
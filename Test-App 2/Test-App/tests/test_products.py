@@ -0,0 +1,40 @@
+from datetime import datetime
+
+import pytest
+
+import database
+from inventory import add_product, assign_abc_classes, compute_abc_classification, get_abc_classification
+
+
+@pytest.mark.parametrize("values, expected", [
+    # Cumulative shares before each item: 0, 0.5, 0.8, 0.95 - the exact cutoffs.
+    ([50, 30, 15, 5], ["A", "A", "B", "C"]),
+    # The item crossing a cutoff stays in the class where its share starts.
+    ([70, 20, 10], ["A", "A", "B"]),
+    ([5, 15, 50, 30], ["C", "B", "A", "A"]),
+    ([90, 0, -10, 10], ["A", "C", "C", "B"]),
+    ([0, 0], ["C", "C"]),
+])
+def test_abc_class_boundaries(values, expected):
+    assert assign_abc_classes(values).tolist() == expected
+
+
+def test_compute_abc_classification_stores_revenue_and_profit_classes():
+    products = [add_product(f"Product {i}", "0.50", 1, 100) for i in range(5)]
+    db = database.get_db()
+    try:
+        for product, quantity in zip(products, (50, 30, 15, 5, 0)):
+            if quantity:
+                db.add(database.Sale(
+                    product_id=product.product_id, quantity=quantity, sale_date=datetime(2024, 3, 10),
+                    sale_price=product.selling_price, cost_price=product.buying_price
+                ))
+        db.commit()
+    finally:
+        db.close()
+
+    assert compute_abc_classification(datetime(2024, 3, 1), datetime(2024, 4, 1)) == 5
+
+    classes = get_abc_classification()
+    assert [classes[p.product_id].revenue_class for p in products] == ["A", "A", "B", "C", "C"]
+    assert [classes[p.product_id].profit_class for p in products] == ["A", "A", "B", "C", "C"]
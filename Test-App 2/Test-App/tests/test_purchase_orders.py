@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import database
+from inventory import (
+    InvalidQuantityError,
+    PurchaseOrderNotOpenError,
+    cancel_purchase_order,
+    cancel_purchase_orders,
+    create_purchase_order,
+    get_product,
+    get_purchase_order_status_counts,
+    receive_purchase_order,
+    receive_purchase_orders,
+    record_purchase_order_receipt,
+)
+
+
+def _expected_delivery():
+    return datetime.utcnow() + timedelta(days=7)
+
+
+def test_status_counts_follow_writes(product):
+    order = create_purchase_order(product.product_id, 10, _expected_delivery(), 5)
+    assert get_purchase_order_status_counts()["Pending"] == 1
+
+    cancel_purchase_order(order.order_id)
+    counts = get_purchase_order_status_counts()
+    assert counts["Pending"] == 0
+    assert counts["Cancelled"] == 1
+
+
+def test_status_counts_from_analytics_replica_follow_writes(analytics_replica, product):
+    assert sum(get_purchase_order_status_counts().values()) == 0
+
+    order = create_purchase_order(product.product_id, 10, _expected_delivery(), 5)
+    assert get_purchase_order_status_counts()["Pending"] == 1
+
+    cancel_purchase_order(order.order_id)
+    second = create_purchase_order(product.product_id, 4, _expected_delivery(), 5)
+    receive_purchase_order(second.order_id)
+    assert get_purchase_order_status_counts() == {
+        "Pending": 0,
+        "Partially Received": 0,
+        "Received": 1,
+        "Cancelled": 1,
+    }
+
+
+def _order_status(order_id):
+    db = database.get_db()
+    try:
+        return db.get(database.PurchaseOrder, order_id).status
+    finally:
+        db.close()
+
+
+def _receipt_movements(product_id):
+    db = database.get_db()
+    try:
+        return [
+            (m.quantity_change, m.reference_id)
+            for m in db.query(database.StockMovement).filter(
+                database.StockMovement.product_id == product_id,
+                database.StockMovement.movement_type == "purchase_receipt"
+            ).order_by(database.StockMovement.movement_id)
+        ]
+    finally:
+        db.close()
+
+
+def test_partial_receipts_until_received(product):
+    order = create_purchase_order(product.product_id, 10, _expected_delivery(), 5)
+
+    record_purchase_order_receipt(order.order_id, 4)
+    assert _order_status(order.order_id) == "Partially Received"
+    assert get_product(product.product_id).current_stock == 104
+
+    record_purchase_order_receipt(order.order_id, 6)
+    assert _order_status(order.order_id) == "Received"
+    assert get_product(product.product_id).current_stock == 110
+    assert _receipt_movements(product.product_id) == [(4, order.order_id), (6, order.order_id)]
+
+    with pytest.raises(PurchaseOrderNotOpenError):
+        record_purchase_order_receipt(order.order_id, 1)
+
+
+@pytest.mark.parametrize("quantity", [0, 7])
+def test_receipt_outside_the_outstanding_quantity_is_refused(product, quantity):
+    order = create_purchase_order(product.product_id, 10, _expected_delivery(), 5)
+    record_purchase_order_receipt(order.order_id, 4)
+
+    with pytest.raises(InvalidQuantityError):
+        record_purchase_order_receipt(order.order_id, quantity)
+    assert get_product(product.product_id).current_stock == 104
+    assert _receipt_movements(product.product_id) == [(4, order.order_id)]
+
+
+def test_bulk_receive_skips_closed_orders(product):
+    pending, partial, received, cancelled = (
+        create_purchase_order(product.product_id, quantity, _expected_delivery(), 5) for quantity in (10, 8, 3, 2)
+    )
+    record_purchase_order_receipt(partial.order_id, 5)
+    receive_purchase_order(received.order_id)
+    cancel_purchase_order(cancelled.order_id)
+    stock = get_product(product.product_id).current_stock
+
+    order_ids = [pending.order_id, partial.order_id, received.order_id, cancelled.order_id]
+    assert receive_purchase_orders(order_ids) == 2
+
+    assert [_order_status(order_id) for order_id in order_ids] == ["Received", "Received", "Received", "Cancelled"]
+    # Only the outstanding 10 + 3 units arrive.
+    assert get_product(product.product_id).current_stock == stock + 13
+    assert _receipt_movements(product.product_id)[-2:] == [(10, pending.order_id), (3, partial.order_id)]
+    assert receive_purchase_orders(order_ids) == 0
+
+
+def test_bulk_cancel_skips_closed_orders_and_keeps_received_stock(product):
+    pending, partial, received = (
+        create_purchase_order(product.product_id, 10, _expected_delivery(), 5) for _ in range(3)
+    )
+    record_purchase_order_receipt(partial.order_id, 4)
+    receive_purchase_order(received.order_id)
+
+    order_ids = [pending.order_id, partial.order_id, received.order_id]
+    assert cancel_purchase_orders(order_ids) == 2
+
+    assert [_order_status(order_id) for order_id in order_ids] == ["Cancelled", "Cancelled", "Received"]
+    assert get_product(product.product_id).current_stock == 114
+    assert cancel_purchase_orders(order_ids) == 0
+    assert receive_purchase_orders(order_ids) == 0
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from query_cache import MemoryCacheBackend, QueryCache, SQLiteCacheBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return QueryCache(MemoryCacheBackend())
+    return QueryCache(SQLiteCacheBackend(tmp_path / "cache.db"))
+
+
+def test_results_are_cached_until_their_tag_is_invalidated(cache):
+    calls = []
+
+    @cache.cached(tags=("sales",))
+    def report(month):
+        calls.append(month)
+        return len(calls)
+
+    assert report(1) == report(1) == 1
+    assert report(2) == 2
+    cache.invalidate("products")
+    assert report(1) == 1
+    cache.invalidate("sales")
+    assert report(1) == 3
+
+
+def test_results_expire_after_ttl(cache):
+    calls = []
+
+    @cache.cached(ttl=0.05)
+    def report():
+        calls.append(None)
+        return len(calls)
+
+    assert report() == report() == 1
+    time.sleep(0.1)
+    assert report() == 2
+
+
+def test_invalidation_during_computation_is_not_lost(cache):
+    calls = []
+
+    @cache.cached(tags=("sales",))
+    def report():
+        calls.append(None)
+        if len(calls) == 1:
+            # A write commits while the first computation is still running.
+            cache.invalidate("sales")
+            return "stale"
+        return "fresh"
+
+    assert report() == "stale"
+    assert report() == "fresh"
+    assert report() == "fresh"
+    assert len(calls) == 2
+
+
+def test_memory_backend_evicts_least_recently_used():
+    cache = QueryCache(MemoryCacheBackend(max_entries=2))
+    calls = []
+
+    @cache.cached()
+    def report(month):
+        calls.append(month)
+        return month
+
+    report(1)
+    report(2)
+    report(1)
+    report(3)
+    report(1)
+    report(2)
+    assert calls == [1, 2, 3, 2]
@@ -0,0 +1,89 @@
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine  # pyright: ignore[reportMissingImports]
+
+import database
+from inventory import add_product, get_all_products, get_time_bucket_stats, record_sale
+from inventory.trends import _date_bucket
+from migrations import upgrade
+from query_cache import query_cache
+
+
+@pytest.fixture
+def read_replica(tmp_path, monkeypatch):
+    """A second SQLite database standing in for ``DATABASE_READ_URL``."""
+    replica = create_engine(f"sqlite:///{(tmp_path / 'replica.db').as_posix()}")
+    upgrade(replica)
+    monkeypatch.setattr(database, "read_engine", replica)
+    yield replica
+    replica.dispose()
+
+
+def test_reads_use_the_replica_unless_this_caller_just_wrote(read_replica):
+    with read_replica.begin() as connection:
+        connection.execute(database.Product.__table__.insert().values(
+            product_id=1, name="On replica", buying_price=100, selling_price=200, current_stock=1
+        ))
+    add_product("On primary", 1, 2, 1)
+
+    assert [p.name for p in get_all_products()] == ["On primary"]
+
+    database.track_writes()
+    query_cache.clear()
+    assert [p.name for p in get_all_products()] == ["On replica"]
+
+
+def test_other_callers_writes_keep_reads_on_the_replica(read_replica):
+    with read_replica.begin() as connection:
+        connection.execute(database.Product.__table__.insert().values(
+            product_id=1, name="On replica", buying_price=100, selling_price=200, current_stock=1
+        ))
+
+    def other_caller():
+        database.track_writes()
+        add_product("On primary", 1, 2, 1)
+
+    # Threads start with an empty context: a new caller, and then a background writer.
+    for writer in (other_caller, lambda: add_product("Background", 1, 2, 1)):
+        thread = threading.Thread(target=writer)
+        thread.start()
+        thread.join()
+        query_cache.clear()
+        assert [p.name for p in get_all_products()] == ["On replica"]
+
+def test_writes_go_to_the_primary_even_on_a_read_session(read_replica):
+    product = add_product("Widget", 10, 15, 100)
+    database.track_writes()
+
+    record_sale(product.product_id, 5)
+
+    with database.engine.connect() as connection:
+        assert connection.execute(database.Sale.__table__.select()).all()
+
+
+def test_date_buckets_use_the_read_database_dialect(monkeypatch):
+    pytest.importorskip("psycopg2")
+    monkeypatch.setattr(database, "read_engine", create_engine("postgresql+psycopg2://localhost/replica"))
+
+    db = database.get_read_db()
+    try:
+        bucket = _date_bucket(db, database.Sale.sale_date, "week")
+        assert "date_trunc" in str(bucket.compile(dialect=db.get_bind().dialect))
+    finally:
+        db.close()
+
+
+def test_bucket_stats_on_the_replica(read_replica, monkeypatch):
+    with read_replica.begin() as connection:
+        connection.execute(database.Product.__table__.insert().values(
+            product_id=1, name="Widget", buying_price=1000, selling_price=1550, current_stock=10
+        ))
+        connection.execute(database.Sale.__table__.insert().values(
+            product_id=1, quantity=2, sale_date=datetime(2024, 3, 6, 12), sale_price=1550, cost_price=1000
+        ))
+
+    stats = get_time_bucket_stats(datetime(2024, 3, 1), datetime(2024, 3, 31), "week")
+
+    assert stats.loc[stats['revenue'] > 0, 'bucket'].tolist() == [datetime(2024, 3, 4)]
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from inventory import InsufficientStockError, SaleBuffer, get_filtered_sales, get_product
+
+
+@pytest.fixture
+def buffer(tmp_path):
+    sale_buffer = SaleBuffer(tmp_path / "journal", flush_interval=0.005)
+    sale_buffer.start()
+    yield sale_buffer
+    sale_buffer.stop()
+
+
+def test_submitted_sales_commit(buffer, product):
+    futures = [buffer.submit(product.product_id, 2) for _ in range(5)]
+    assert len({future.result(timeout=5) for future in futures}) == 5
+    assert get_product.uncached(product.product_id).current_stock == 90
+
+
+def test_refused_sale_fails_only_its_future(buffer, product):
+    ok = buffer.submit(product.product_id, 1)
+    refused = buffer.submit(product.product_id, 1000)
+    assert ok.result(timeout=5)
+    with pytest.raises(InsufficientStockError):
+        refused.result(timeout=5)
+
+
+def test_start_replays_orphaned_segments(tmp_path, product):
+    journal_dir = tmp_path / "journal"
+    journal_dir.mkdir()
+    segment = journal_dir / "000000000007.jsonl"
+    segment.write_text(
+        json.dumps([product.product_id, 3, "replayed-key"]) + "\n" + '[1, 2, "torn',
+        encoding="utf-8",
+    )
+
+    buffer = SaleBuffer(journal_dir)
+    buffer.start()
+    try:
+        assert not segment.exists()
+        assert [sale.idempotency_key for sale in get_filtered_sales()] == ["replayed-key"]
+    finally:
+        buffer.stop()
+
+
+def test_second_buffer_on_same_journal_dir_refuses_to_start(buffer, product):
+    other = SaleBuffer(buffer.journal_dir)
+    with pytest.raises(RuntimeError, match="in use"):
+        other.start()
+
+    # The first buffer's live segment is untouched and it keeps working.
+    assert buffer.submit(product.product_id, 1).result(timeout=5)
+
+
+def test_journal_dir_is_free_again_after_stop(tmp_path, product):
+    first = SaleBuffer(tmp_path / "journal")
+    first.start()
+    first.stop()
+
+    second = SaleBuffer(tmp_path / "journal")
+    second.start()
+    try:
+        assert second.submit(product.product_id, 1).result(timeout=5)
+    finally:
+        second.stop()
+
+
+def test_writer_failure_fails_pending_futures(buffer, product, monkeypatch):
+    def broken_commit(batch):
+        raise OSError("disk gone")
+
+    monkeypatch.setattr(buffer, "_commit", broken_commit)
+    future = buffer.submit(product.product_id, 1)
+    with pytest.raises(OSError):
+        future.result(timeout=5)
+    with pytest.raises(RuntimeError, match="not running"):
+        buffer.submit(product.product_id, 1)
+
+
+def test_missing_segment_does_not_stop_the_writer(buffer, product):
+    buffer._segment.unlink()
+    assert buffer.submit(product.product_id, 1).result(timeout=5)
+    assert buffer.submit(product.product_id, 1).result(timeout=5)
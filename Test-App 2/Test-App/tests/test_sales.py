@@ -0,0 +1,210 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from dateutil.relativedelta import relativedelta  # pyright: ignore[reportMissingImports]
+from sqlalchemy import event, text  # pyright: ignore[reportMissingImports]
+
+import database
+from inventory import (
+    IdempotencyKeyConflictError,
+    InsufficientStockError,
+    InvalidQuantityError,
+    archive_sales,
+    get_monthly_stats,
+    get_multi_month_stats,
+    get_product,
+    record_sale,
+    record_sales,
+)
+from inventory import sales as sales_module
+
+
+def _add_sales(product, dates):
+    db = database.get_db()
+    try:
+        for sale_date in dates:
+            db.add(database.Sale(
+                product_id=product.product_id,
+                quantity=2,
+                sale_date=sale_date,
+                sale_price=product.selling_price,
+                cost_price=product.buying_price
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def statements():
+    """SQL statements sent to the database while the test runs."""
+    sent = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        sent.append(statement)
+
+    event.listen(database.engine, "before_cursor_execute", record)
+    yield sent
+    event.remove(database.engine, "before_cursor_execute", record)
+
+
+def test_money_is_stored_as_paise(product):
+    sale = record_sale(product.product_id, 3)
+
+    with database.engine.connect() as connection:
+        stored = connection.execute(text("SELECT sale_price, cost_price FROM sales")).one()
+    assert tuple(stored) == (1550, 1000)
+    assert sale.sale_price == Decimal("15.50")
+    now = datetime.now()
+    assert get_monthly_stats(now.year, now.month)['total_revenue'] == Decimal("46.50")
+
+
+def test_multi_month_stats_match_monthly_stats(product):
+    this_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    _add_sales(product, [
+        this_month - relativedelta(months=months_ago) + timedelta(days=day, hours=10)
+        for months_ago in (0, 2, 3, 7)
+        for day in (0, 5, 27)
+        if months_ago or day == 0
+    ])
+    pytest.importorskip("pyarrow")
+    archive_sales(this_month - relativedelta(months=2))
+
+    stats = get_multi_month_stats(6)
+
+    assert [(row['year'], row['month']) for row in stats] == [
+        ((this_month - relativedelta(months=offset)).year, (this_month - relativedelta(months=offset)).month)
+        for offset in range(5, -1, -1)
+    ]
+    for row in stats:
+        expected = get_monthly_stats(row['year'], row['month'])
+        assert row['revenue'] == float(expected['total_revenue'])
+        assert row['profit'] == float(expected['total_profit'])
+        assert row['transactions'] == expected['total_transactions']
+    assert [row['transactions'] for row in stats] == [0, 0, 3, 3, 0, 1]
+
+
+def test_multi_month_stats_query_count_does_not_grow_with_months(product, statements):
+    get_multi_month_stats(3)
+    few = len(statements)
+    statements.clear()
+
+    get_multi_month_stats(24)
+
+    assert len(statements) == few <= 2
+
+
+@pytest.mark.parametrize("quantity", [0, -5])
+def test_record_sale_rejects_non_positive_quantities(product, quantity):
+    with pytest.raises(InvalidQuantityError):
+        record_sale(product.product_id, quantity)
+    assert get_product(product.product_id).current_stock == 100
+
+
+def test_concurrent_sales_do_not_lose_decrements(product):
+    def sell(_):
+        try:
+            record_sale(product.product_id, 3)
+            return True
+        except InsufficientStockError:
+            return False
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        sold = sum(pool.map(sell, range(40)))
+
+    db = database.get_db()
+    try:
+        recorded = db.query(database.Sale).count()
+    finally:
+        db.close()
+    assert sold == recorded == 33
+    assert get_product(product.product_id).current_stock == 1
+
+
+def _sale_count():
+    db = database.get_db()
+    try:
+        return db.query(database.Sale).count()
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def missed_first_lookup(monkeypatch):
+    """Make the first idempotency key lookup miss, as if a concurrent request recorded the key just after it."""
+    lookup = sales_module._sales_by_idempotency_key
+    calls = []
+
+    def racing_lookup(db, keys):
+        calls.append(keys)
+        return {} if len(calls) == 1 else lookup(db, keys)
+
+    monkeypatch.setattr(sales_module, "_sales_by_idempotency_key", racing_lookup)
+    return calls
+
+
+def test_replayed_sale_returns_the_original(product):
+    first = record_sale(product.product_id, 3, "key-1")
+    again = record_sale(product.product_id, 3, "key-1")
+
+    assert again.sale_id == first.sale_id
+    assert _sale_count() == 1
+    assert get_product(product.product_id).current_stock == 97
+
+
+def test_reused_key_for_a_different_sale_conflicts(product):
+    record_sale(product.product_id, 3, "key-1")
+
+    with pytest.raises(IdempotencyKeyConflictError):
+        record_sale(product.product_id, 4, "key-1")
+    with pytest.raises(IdempotencyKeyConflictError):
+        record_sales([(product.product_id, 4, "key-1")])
+    assert get_product(product.product_id).current_stock == 97
+
+
+def test_batch_replays_recorded_and_repeated_keys(product):
+    recorded = record_sale(product.product_id, 1, "key-1")
+
+    sale_ids = record_sales([
+        (product.product_id, 1, "key-1"),
+        (product.product_id, 2, "key-2"),
+        (product.product_id, 2, "key-2"),
+        (product.product_id, 5),
+    ])
+
+    assert sale_ids[0] == recorded.sale_id
+    assert sale_ids[1] == sale_ids[2] != sale_ids[3]
+    assert _sale_count() == 3
+    assert get_product(product.product_id).current_stock == 92
+    assert record_sales([(product.product_id, 2, "key-2")]) == [sale_ids[1]]
+
+
+def test_record_sale_recovers_from_a_concurrent_insert_of_its_key(product, missed_first_lookup):
+    db = database.get_db()
+    try:
+        winner = database.Sale(
+            product_id=product.product_id, quantity=3, sale_price=product.selling_price,
+            cost_price=product.buying_price, idempotency_key="key-1"
+        )
+        db.add(winner)
+        db.commit()
+        winner_id = winner.sale_id
+    finally:
+        db.close()
+
+    assert record_sale(product.product_id, 3, "key-1").sale_id == winner_id
+    assert len(missed_first_lookup) == 2
+    assert _sale_count() == 1
+    assert get_product(product.product_id).current_stock == 100
+
+
+def test_record_sales_recovers_from_a_concurrent_insert_of_its_key(product, missed_first_lookup):
+    winner_id = record_sales([(product.product_id, 3, "key-1")])[0]
+    missed_first_lookup.clear()
+
+    assert record_sales([(product.product_id, 3, "key-1"), (product.product_id, 1)])[0] == winner_id
+    assert len(missed_first_lookup) == 2
+    assert _sale_count() == 2
+    assert get_product(product.product_id).current_stock == 96
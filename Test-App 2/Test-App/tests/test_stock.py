@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import database
+from database import StockMovement, get_db
+from inventory import (
+    ProductNotFoundError,
+    create_stock_snapshots,
+    delete_product,
+    get_all_products,
+    get_inventory_totals,
+    get_product,
+    get_product_names,
+    get_stock_as_of,
+    query_inventory_valuation,
+    record_sale,
+    update_product,
+)
+
+
+def test_valuation_rolls_back_later_sales(product):
+    as_of = datetime.utcnow()
+    record_sale(product.product_id, 30)
+
+    assert query_inventory_valuation(as_of)['on_hand'].tolist() == [100]
+    assert query_inventory_valuation(datetime.utcnow() + timedelta(seconds=1))['on_hand'].tolist() == [70]
+    assert get_stock_as_of(as_of) == {product.product_id: 100}
+
+
+def test_past_valuation_follows_price_edits(product):
+    as_of = datetime.utcnow()
+    assert query_inventory_valuation(as_of)['value_cost'].tolist() == [1000.0]
+
+    update_product(product.product_id, product.name, 12, product.selling_price, product.current_stock)
+    assert query_inventory_valuation(as_of)['value_cost'].tolist() == [1200.0]
+
+
+def test_delete_product_keeps_its_ledger(product):
+    record_sale(product.product_id, 30)
+    create_stock_snapshots()
+    as_of = datetime.utcnow()
+
+    assert delete_product(product.product_id)
+    assert not delete_product(product.product_id)
+
+    db = get_db()
+    try:
+        assert db.query(StockMovement).filter(StockMovement.product_id == product.product_id).count() == 2
+    finally:
+        db.close()
+    assert get_stock_as_of(as_of) == {product.product_id: 70}
+    assert query_inventory_valuation(as_of)['on_hand'].tolist() == [70]
+    assert query_inventory_valuation(datetime.utcnow() + timedelta(seconds=1)).empty
+
+
+def test_deleted_product_leaves_the_catalog(product):
+    delete_product(product.product_id)
+
+    assert get_all_products() == []
+    assert get_inventory_totals()['product_count'] == 0
+    assert get_product_names() == {product.product_id: "Widget"}
+    with pytest.raises(ProductNotFoundError):
+        get_product(product.product_id)
+    with pytest.raises(ProductNotFoundError):
+        record_sale(product.product_id, 1)
+    assert not update_product(product.product_id, "Widget", 10, 15, 100)
+
+
+def test_stock_before_the_first_checkpoint_rolls_back_from_current_stock(product):
+    with database.engine.begin() as connection:
+        # A product stocked before the ledger existed: no movements at all.
+        connection.execute(database.Product.__table__.insert().values(
+            product_id=99, name="Legacy", buying_price=1, selling_price=2, current_stock=50
+        ))
+    yesterday = datetime.utcnow() - timedelta(days=1)
+    before_sale = datetime.utcnow()
+    record_sale(product.product_id, 30)
+
+    assert get_stock_as_of(yesterday) == {product.product_id: 0, 99: 50}
+    assert get_stock_as_of(before_sale) == {product.product_id: 100, 99: 50}
+    assert query_inventory_valuation(yesterday)['on_hand'].tolist() == [50]
+
+    create_stock_snapshots()
+    record_sale(99, 5)
+    assert get_stock_as_of(datetime.utcnow()) == {product.product_id: 70, 99: 45}
+
+
+def test_valuation_and_stock_history_agree(product):
+    record_sale(product.product_id, 30)
+    create_stock_snapshots()
+    as_of = datetime.utcnow()
+    with database.engine.begin() as connection:
+        # A stock change the ledger never saw, e.g. an edit made outside the app.
+        connection.execute(database.Product.__table__.update().values(current_stock=60))
+    record_sale(product.product_id, 5)
+
+    valuation = query_inventory_valuation(as_of)
+    assert dict(zip(valuation['product_id'], valuation['on_hand'])) == get_stock_as_of(as_of) == {product.product_id: 70}
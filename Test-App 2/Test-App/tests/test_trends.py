@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import database
+from inventory import add_product, compute_product_trend_stats, get_product_sales_matrix, lttb_downsample
+
+
+def _add_sales(product, quantities_by_date):
+    db = database.get_db()
+    try:
+        for sale_date, quantity in quantities_by_date.items():
+            db.add(database.Sale(
+                product_id=product.product_id,
+                quantity=quantity,
+                sale_date=sale_date,
+                sale_price=product.selling_price,
+                cost_price=product.buying_price
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_lttb_keeps_the_endpoints_within_the_threshold():
+    x = np.arange(1000)
+    y = np.sin(x / 50)
+
+    kept = lttb_downsample(x, y, 100)
+
+    assert len(kept) == 100
+    assert kept[0] == 0 and kept[-1] == 999
+    assert (np.diff(kept) > 0).all()
+
+
+def test_lttb_preserves_a_spike():
+    y = np.zeros(500)
+    y[321] = 50
+
+    assert 321 in lttb_downsample(np.arange(500), y, 20)
+
+
+def test_lttb_returns_short_series_whole():
+    assert lttb_downsample(range(10), range(10), 10).tolist() == list(range(10))
+    assert lttb_downsample(range(10), range(10), 2).tolist() == list(range(10))
+
+
+def test_sales_matrix_zero_fills_empty_buckets(product):
+    other = add_product("Gadget", 1, 2, 10)
+    unsold = add_product("Spare", 1, 2, 10)
+    _add_sales(product, {datetime(2024, 3, 5, 10): 2, datetime(2024, 3, 20, 10): 1})
+    _add_sales(other, {datetime(2024, 3, 21, 10): 4})
+
+    matrix = get_product_sales_matrix(datetime(2024, 3, 1), datetime(2024, 3, 29), "week", "Units Sold")
+
+    assert matrix.columns.tolist() == list(pd.date_range("2024-02-26", "2024-03-25", freq="W-MON"))
+    assert matrix.loc[product.product_id].tolist() == [0, 2, 0, 1, 0]
+    assert matrix.loc[other.product_id].tolist() == [0, 0, 0, 4, 0]
+    assert unsold.product_id not in matrix.index
+
+
+def test_trend_stats_compare_the_last_two_windows():
+    matrix = pd.DataFrame(
+        [[1, 1, 2, 2], [4, 4, 1, 1], [0, 0, 3, 0], [0, 0, 0, 0]],
+        index=[10, 20, 30, 40],
+        columns=pd.date_range("2024-03-04", periods=4, freq="W-MON")
+    ).astype(float)
+
+    rolling, stats = compute_product_trend_stats(matrix, window=2)
+
+    assert rolling.loc[10].tolist() == [1, 1, 1.5, 2]
+    assert stats.index.tolist() == [30, 10, 40, 20]
+    assert stats['recent_avg'].tolist() == [1.5, 2, 0, 1]
+    assert stats['previous_avg'].tolist() == [0, 1, 0, 4]
+    assert stats['growth'].tolist() == [np.inf, 1, 0, -0.75]
+    assert stats['total_rank'].loc[[20, 10, 30, 40]].tolist() == [1, 2, 3, 4]